@@ -0,0 +1,2457 @@
+#!/usr/bin/env python3
+"""
+Opslag voor de activity log
+
+Standaard wordt er gelogd naar een CSV bestand (puntkomma gescheiden).
+Alternatieven, zodat de UI niet bij elke refresh de complete historie
+hoeft te parsen:
+- Gepartitioneerde CSV: één bestand per dag (activity_log/2026/10/2026-10-18.csv)
+- SQLite database (WAL mode, met indexes op datum, project, categorie en app)
+
+Alle backends bieden dezelfde interface:
+    append(record)                  - schrijf een activiteit (dict met kolomnamen)
+    append_many(records)            - schrijf een batch direct weg (bijv. bij een import)
+    rows(start_date, end_date)      - itereer over rijen (dicts met kolomnamen)
+    select(columns, start, end)     - alleen de gevraagde kolommen (tuples)
+    aggregate(group_by, ...)        - som van een kolom per groep
+    delete(ids)                     - verwijder rijen op basis van 'ID'
+    reassign(ids, project, rate)    - zet rijen op een ander project (en tarief)
+    read_new(cursor)                - alleen wijzigingen sinds cursor
+    flush() / close()               - schrijf gebufferde rijen weg
+
+Elke rij krijgt bij het schrijven een vaste, unieke 'ID'. Verwijderen van
+CSV rijen herschrijft het bestand niet, maar voegt een "tombstone" toe aan
+een apart edits bestand (JSONL) dat lezers toepassen; een projectwijziging
+gaat op dezelfde manier.
+
+Schrijven gaat via een buffer ("group commit"): rijen worden verzameld en
+weggeschreven zodra er flush_rows rijen zijn of flush_seconds verstreken
+is, eventueel gevolgd door een fsync. Lezers zien alleen weggeschreven
+rijen; roep flush() aan op de schrijvende log voordat je leest. Met
+on_flush(records) kan de schrijver na elke weggeschreven batch iets
+bijwerken (de tracker: de dagtotalen van precies die rijen).
+
+De tracker, desktop app, tray app en CLI zijn aparte processen. Schrijven
+en herschrijven (compact, rotate, ...) sluiten elkaar daarom uit met een
+OS-lock op een <bestand>.lock naast het bestand (zie PathLock).
+"""
+
+import csv
+import gzip
+import hashlib
+import json
+import mmap
+import operator
+import os
+import io
+import lzma
+import uuid
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Kolommen van activity_tracker_enhanced.py (15 kolommen + ID)
+DETAILED_FIELDS = [
+    'Datum', 'Starttijd', 'Eindtijd', 'Duur (sec)', 'Duur (uren)',
+    'Applicatie', 'Venstertitel', 'URL', 'Categorie',
+    'Email Subject', 'Email Van', 'Project', 'Tarief', 'Bedrag', 'Was Idle',
+    'ID'
+]
+
+# Kolommen van activity_tracker.py (7 kolommen + ID)
+BASIC_FIELDS = [
+    'Datum', 'Starttijd', 'Eindtijd', 'Duur (sec)',
+    'Applicatie', 'Venstertitel', 'Project', 'ID'
+]
+
+# CSV kolom -> (SQLite kolom, type)
+SQLITE_COLUMNS = [
+    ('Datum', 'datum', 'TEXT NOT NULL'),
+    ('Starttijd', 'starttijd', 'TEXT'),
+    ('Eindtijd', 'eindtijd', 'TEXT'),
+    ('Duur (sec)', 'duur_sec', 'INTEGER'),
+    ('Duur (uren)', 'duur_uren', 'REAL'),
+    ('Applicatie', 'applicatie', 'TEXT'),
+    ('Venstertitel', 'venstertitel', 'TEXT'),
+    ('URL', 'url', 'TEXT'),
+    ('Categorie', 'categorie', 'TEXT'),
+    ('Email Subject', 'email_subject', 'TEXT'),
+    ('Email Van', 'email_van', 'TEXT'),
+    ('Project', 'project', 'TEXT'),
+    ('Tarief', 'tarief', 'REAL'),
+    ('Bedrag', 'bedrag', 'REAL'),
+    ('Was Idle', 'was_idle', 'TEXT'),
+]
+SQLITE_NAMES = {field: column for field, column, _ in SQLITE_COLUMNS}
+# Rijen per SELECT bij het lezen van SQLite (in pagina's op id)
+SQLITE_PAGE_ROWS = 5000
+
+# Compressie van geroteerde segmenten: extensie -> open functie
+SEGMENT_OPENERS = {'.gz': gzip.open, '.xz': lzma.open}
+
+
+def normalize_row(row):
+    """
+    Zet een rij uit een willekeurige CSV layout om naar de 15-koloms layout.
+    Ontbrekende kolommen (bijv. uit de 7-koloms activity_log.csv) worden
+    aangevuld; 'Duur (uren)' wordt berekend uit 'Duur (sec)'.
+    """
+    record = {field: row.get(field) or '' for field in DETAILED_FIELDS}
+    if not record['Duur (uren)'] and record['Duur (sec)']:
+        record['Duur (uren)'] = round(int(float(record['Duur (sec)'])) / 3600, 2)
+    if not record['Tarief']:
+        record['Tarief'] = 0
+    if not record['Bedrag']:
+        record['Bedrag'] = 0
+    if not record['Was Idle']:
+        record['Was Idle'] = 'Nee'
+    return record
+
+
+def new_row_id():
+    """Nieuwe unieke ID voor een rij."""
+    return uuid.uuid4().hex[:16]
+
+
+def derived_row_id(raw, offset):
+    """
+    Vaste ID voor een rij uit een oud bestand zonder ID kolom, afgeleid
+    van de inhoud en positie van de regel (twee identieke regels krijgen
+    zo toch een verschillende ID).
+    """
+    digest = hashlib.sha1(b'%d:' % offset + raw.rstrip(b'\r\n')).hexdigest()
+    return 'h' + digest[:15]
+
+
+def in_range(date, start_date=None, end_date=None):
+    """Check of een datum (YYYY-MM-DD) binnen een (inclusieve) periode valt."""
+    if start_date and date < start_date:
+        return False
+    if end_date and date > end_date:
+        return False
+    return True
+
+
+class PathLock:
+    """
+    Lock voor een bestand, ook tussen processen (tracker, desktop app, tray
+    app en CLI): een RLock voor threads in dit proces plus een OS-lock op
+    <bestand>.lock (fcntl.flock op macOS/Linux, msvcrt.locking op
+    Windows). Herbruikbaar binnen een thread; het lock bestand wordt alleen
+    bij de buitenste acquire geopend en bij de laatste release gesloten.
+    Kan het lock bestand niet aangemaakt worden (alleen-lezen map), dan
+    blijft het bij de lock binnen dit proces.
+    """
+
+    def __init__(self, path):
+        self.lock_path = Path(str(path) + '.lock')
+        self.rlock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def acquire(self):
+        self.rlock.acquire()
+        if self.depth == 0:
+            try:
+                self._lock_file()
+            except BaseException:
+                self.rlock.release()
+                raise
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            self._unlock_file()
+        self.rlock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _lock_file(self):
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            self.handle = open(self.lock_path, 'a+b')
+        except OSError:
+            self.handle = None
+            return
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+            return
+        while True:
+            # LK_LOCK geeft na ~10 seconden wachten een OSError; blijf wachten
+            self.handle.seek(0)
+            try:
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock_file(self):
+        if self.handle is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            else:
+                self.handle.seek(0)
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.handle.close()
+            self.handle = None
+
+
+# Eén lock per bestand, gedeeld door alle log objecten in dit proces,
+# zodat schrijven en herschrijven (delete) elkaar niet kruisen; via
+# PathLock ook niet als dat in verschillende processen gebeurt
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def path_lock(path):
+    """Geef de (gedeelde) lock voor een bestand."""
+    key = os.path.abspath(str(path))
+    with _path_locks_guard:
+        if key not in _path_locks:
+            _path_locks[key] = PathLock(key)
+        return _path_locks[key]
+
+
+class BufferedLog:
+    """
+    Basis voor logs met een schrijfbuffer.
+    Subclasses implementeren _write_batch(records).
+    """
+
+    def __init__(self, flush_rows=1, flush_seconds=0, fsync=False, on_flush=None):
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.on_flush = on_flush
+        self.buffer = []
+        self.buffer_lock = threading.RLock()
+        self.last_flush = time.monotonic()
+
+    def append(self, record):
+        """Voeg een activiteit toe aan de buffer (en flush indien nodig)."""
+        if not record.get('ID'):
+            record['ID'] = new_row_id()
+        with self.buffer_lock:
+            self.buffer.append(record)
+            self.flush_if_due()
+
+    def append_many(self, records):
+        """Schrijf een batch activiteiten direct weg (bijv. bij een import)."""
+        for record in records:
+            if not record.get('ID'):
+                record['ID'] = new_row_id()
+        with self.buffer_lock:
+            self.buffer.extend(records)
+            self.flush()
+
+    def flush_if_due(self):
+        """Flush als de rij- of tijdsdrempel bereikt is."""
+        with self.buffer_lock:
+            if not self.buffer:
+                return
+            if (len(self.buffer) >= self.flush_rows
+                    or time.monotonic() - self.last_flush >= self.flush_seconds):
+                self.flush()
+
+    def flush(self):
+        """Schrijf alle gebufferde rijen weg."""
+        with self.buffer_lock:
+            if self.buffer:
+                records = self.buffer
+                self._write_batch(records)
+                self.buffer = []
+                if self.on_flush is not None:
+                    self.on_flush(records)
+            self.last_flush = time.monotonic()
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+
+def reassign_record(row_id, project, rate=None):
+    """Edits record dat een rij op een ander project zet."""
+    record = {'op': 'reassign', 'id': row_id, 'project': project}
+    if rate is not None:
+        record['rate'] = rate
+    return record
+
+
+def apply_reassign(row, record):
+    """Verwerk een reassign record in een rij (Project, en met rate Tarief en Bedrag)."""
+    row['Project'] = record.get('project', '')
+    if record.get('rate') is not None and 'Tarief' in row:
+        row['Tarief'] = record['rate']
+        hours = float(row.get('Duur (uren)', 0) or 0)
+        row['Bedrag'] = round(hours * float(record['rate']), 2)
+    return row
+
+
+class EditLog:
+    """
+    Append-only correcties op een activity log (één JSON record per regel):
+        {"op": "delete", "id": "..."}
+        {"op": "reassign", "id": "...", "project": "...", "rate": 85}
+    Lezers houden de toegepaste correcties bij en lezen bij een refresh
+    alleen nieuw toegevoegde regels. Compaction verwerkt ze in de log zelf.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = path_lock(self.path)
+        self.deleted = set()
+        self.reassigned = {}  # id -> reassign record
+        self._state = None  # (inode, offset) tot waar gelezen is
+
+    def append(self, records):
+        """Voeg correcties toe."""
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def read_from(self, state):
+        """
+        Lees records vanaf een eerdere (inode, offset).
+        Retourneert (records, nieuwe state, reset); reset=True als het
+        bestand vervangen is en vanaf het begin gelezen is.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return [], None, state is not None
+
+        reset = state is None or state[0] != stat.st_ino or stat.st_size < state[1]
+        offset = 0 if reset else state[1]
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records, (stat.st_ino, offset), reset and state is not None
+
+    def apply(self, record):
+        """Verwerk één correctie in de in-memory toestand."""
+        if record.get('op') == 'delete':
+            self.deleted.add(record.get('id'))
+        elif record.get('op') == 'reassign':
+            self.reassigned[record.get('id')] = record
+
+    def refresh(self):
+        """Werk de in-memory toestand bij met nieuwe correcties."""
+        with self.lock:
+            records, state, reset = self.read_from(self._state)
+            if reset or self._state is None:
+                self.deleted = set()
+                self.reassigned = {}
+            for record in records:
+                self.apply(record)
+            self._state = state
+        return self
+
+    def snapshot(self):
+        """Losse kopie van alle correcties tot nu toe (voor compaction)."""
+        copy = EditLog(self.path)
+        return copy.refresh()
+
+    def apply_to(self, row):
+        """Pas correcties toe op een rij; None als de rij verwijderd is."""
+        row_id = row.get('ID')
+        if row_id in self.deleted:
+            return None
+        record = self.reassigned.get(row_id)
+        if record is not None:
+            apply_reassign(row, record)
+        return row
+
+    def truncate(self, state, applied):
+        """
+        Verwijder de correcties tot state die door compaction in de log
+        verwerkt zijn (hun ID staat in applied). Correcties voor rijen die
+        elders staan (bijv. in een gecomprimeerd segment) en later
+        toegevoegde correcties blijven staan.
+        """
+        with self.lock:
+            before, _, _ = self.read_from(None)
+            records, _, reset = self.read_from(state)
+            if reset:
+                return
+            records = [r for r in before[:len(before) - len(records)]
+                       if r.get('id') not in applied] + records
+            if not records:
+                if self.path.exists():
+                    self.path.unlink()
+            else:
+                tmp = self.path.with_name(self.path.name + '.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                os.replace(tmp, self.path)
+            self._state = None
+
+
+# Het "epoch" log formaat slaat de start op als seconden sinds 1970 (lokale
+# tijd, zoals het archief) plus de duur in seconden; Starttijd, Eindtijd en
+# Duur (uren) worden pas bij het lezen geformatteerd.
+EPOCH_FIELD = 'Start (epoch)'
+DERIVED_TIME_FIELDS = ('Starttijd', 'Eindtijd', 'Duur (uren)')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def epoch_seconds(moment):
+    """datetime (lokale tijd) -> seconden sinds 1970 (zonder tijdzone)."""
+    return int((moment - _EPOCH).total_seconds())
+
+
+def to_epoch(date, time_of_day=''):
+    """'YYYY-MM-DD' + 'HH:MM:SS' -> seconden sinds 1970 (zonder tijdzone)."""
+    try:
+        moment = datetime.strptime(f"{date} {time_of_day}", '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        moment = datetime.strptime(date, '%Y-%m-%d')
+    return epoch_seconds(moment)
+
+
+def from_epoch(seconds):
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def clock(seconds):
+    """Seconden sinds 1970 (of sinds middernacht) -> 'HH:MM:SS', zonder strftime."""
+    seconds %= 86400
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _epoch_reader(header, decode):
+    """
+    Breid een reader uit voor een epoch bestand: de header krijgt de
+    afgeleide tijdkolommen achteraan, decode berekent hun waarden.
+    """
+    width = len(header)
+    start_position = header.index(EPOCH_FIELD)
+    duration_position = header.index('Duur (sec)') if 'Duur (sec)' in header else None
+
+    def decode_epoch(values):
+        values = decode(values) if decode else list(values)
+        values = values[:width] + [''] * (width - len(values))
+        try:
+            start = int(values[start_position])
+            duration = int(float(values[duration_position] or 0)) if duration_position is not None else 0
+        except ValueError:
+            return values + ['', '', '']
+        return values + [clock(start), clock(start + duration), str(round(duration / 3600, 2))]
+    return header + list(DERIVED_TIME_FIELDS), decode_epoch
+
+
+# Kolommen die in het "dict" log formaat als id worden opgeslagen. In de
+# header krijgen ze een '#' achter de naam (bijv. 'Applicatie#').
+ENCODED_FIELDS = ('Applicatie', 'Categorie', 'Project', 'URL')
+
+
+class DictionaryCodec:
+    """
+    Persistente tabel met strings -> kleine integer ids, per kolom.
+    Opslag: JSONL bestand met per regel {"c": kolom, "v": waarde}; de id
+    is de volgorde van de waarde binnen zijn kolom. Nieuwe waarden worden
+    eerst hier weggeschreven en pas daarna in de log gebruikt.
+
+    Bij URLs wordt alleen het begin (schema + host) als id opgeslagen:
+    'https://github.com/org/repo' -> '3/org/repo'.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = path_lock(self.path)
+        self.values = {}  # kolom -> [waarde, ...]
+        self.ids = {}  # kolom -> {waarde: id}
+        self._offset = 0
+
+    def refresh(self):
+        """Lees waarden die (ook door andere processen) zijn toegevoegd."""
+        with self.lock:
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(self._offset)
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break
+                        self._offset += len(line)
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # afgebroken regel van een gecrasht proces
+                        values = self.values.setdefault(entry['c'], [])
+                        self.ids.setdefault(entry['c'], {}).setdefault(entry['v'], len(values))
+                        values.append(entry['v'])
+            except OSError:
+                pass
+        return self
+
+    def _split(self, field, value):
+        """Deel een waarde op in (te internen deel, rest)."""
+        if field == 'URL':
+            scheme_end = value.find('://')
+            path_start = value.find('/', scheme_end + 3) if scheme_end != -1 else -1
+            if path_start != -1:
+                return value[:path_start], value[path_start:]
+        return value, ''
+
+    def encode_row(self, record, columns, fsync=False):
+        """
+        Waarden voor de kolommen van een regel, met '#' kolommen als id.
+        Nieuwe waarden worden onder de (OS-)lock achter de tabel gezet en
+        daarna ingelezen, zodat de ids altijd uit het bestand komen.
+        """
+        with self.lock:
+            keys = []
+            new_entries = []
+            for column in columns:
+                if not column.endswith('#'):
+                    keys.append(None)
+                    continue
+                field = column[:-1]
+                value = str(record.get(field, '') or '')
+                key, rest = self._split(field, value) if value else ('', '')
+                keys.append((field, key, rest))
+                if key and key not in self.ids.get(field, {}):
+                    self.refresh()
+                    entry = {'c': field, 'v': key}
+                    if key not in self.ids.get(field, {}) and entry not in new_entries:
+                        new_entries.append(entry)
+
+            if new_entries:
+                data = ''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in new_entries)
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'ab') as f:
+                    if f.tell() > self._offset:
+                        # Afgebroken laatste regel: niet aan onze regel vastplakken
+                        data = '\n' + data
+                    f.write(data.encode('utf-8'))
+                    f.flush()
+                    if fsync:
+                        os.fsync(f.fileno())
+                self.refresh()
+
+            result = []
+            for column, key in zip(columns, keys):
+                if key is None:
+                    result.append(record.get(column, ''))
+                elif not key[1]:
+                    result.append('')
+                else:
+                    field, key, rest = key
+                    result.append(f"{self.ids[field][key]}{rest}")
+        return result
+
+    def decode(self, field, value):
+        """id (eventueel met rest van de URL) -> oorspronkelijke waarde."""
+        if not value:
+            return ''
+        digits = len(value) - len(value.lstrip('0123456789'))
+        number = int(value[:digits]) if digits else -1
+        values = self.values.get(field, ())
+        if not 0 <= number < len(values):
+            values = self.refresh().values.get(field, ())
+            if not 0 <= number < len(values):
+                return value
+        # De tabel string zelf teruggeven: alle rijen delen zo hetzelfde object
+        return values[number] + value[digits:] if digits < len(value) else values[number]
+
+    def reader(self, header):
+        """
+        (kolomnamen zonder '#', decode functie of None) voor een header.
+        decode(values) geeft een nieuwe lijst met de oorspronkelijke waarden.
+        """
+        encoded = [(i, name[:-1]) for i, name in enumerate(header) if name.endswith('#')]
+        plain = [name[:-1] if name.endswith('#') else name for name in header]
+        if not encoded:
+            return plain, None
+        self.refresh()
+
+        def decode(values):
+            values = list(values)
+            for i, field in encoded:
+                if i < len(values):
+                    values[i] = self.decode(field, values[i])
+            return values
+        return plain, decode
+
+
+def _raw_records(f, offset):
+    """
+    Lees ruwe CSV records uit een binair bestand vanaf offset.
+    Yield (offset, bytes); records met een newline binnen quotes blijven heel.
+    """
+    record = b''
+    start = offset
+    for line in f:
+        if not record:
+            start = offset
+        record += line
+        offset += len(line)
+        if record.count(b'"') % 2 == 0:
+            yield start, record
+            record = b''
+    if record:
+        yield start, record
+
+
+def _parse_records(raw_records):
+    """Parse ruwe records met csv.reader; yield (offset, ruwe bytes, waarden)."""
+    current = [0, b'']
+
+    def texts():
+        for offset, raw in raw_records:
+            current[0] = offset
+            current[1] = raw
+            yield raw.decode('utf-8')
+
+    for values in csv.reader(texts(), delimiter=';'):
+        if values:
+            yield current[0], current[1], values
+
+
+def _decoded(records, decode):
+    """Records van _parse_records met de waarden gedecodeerd (als decode gegeven is)."""
+    if decode is None:
+        return records
+    return ((offset, raw, decode(values)) for offset, raw, values in records)
+
+
+def _make_row(header, offset, raw, values):
+    """Bouw een rij-dict; zonder ID kolom wordt de ID afgeleid van de inhoud."""
+    if len(values) < len(header):
+        values += [''] * (len(header) - len(values))
+    row = dict(zip(header, values))
+    if not row.get('ID'):
+        row['ID'] = derived_row_id(raw, offset)
+    return row
+
+
+# Rijen met gelijke waarden in deze kolommen kunnen samengevoegd worden
+COALESCE_FIELDS = (
+    'Datum', 'Applicatie', 'Venstertitel', 'URL', 'Categorie',
+    'Email Subject', 'Email Van', 'Project', 'Tarief', 'Was Idle'
+)
+
+
+def _time_seconds(value):
+    """'HH:MM:SS' -> seconden sinds middernacht (None als ongeldig)."""
+    try:
+        hours, minutes, seconds = str(value).split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    except ValueError:
+        return None
+
+
+def _can_coalesce(previous, row, max_gap):
+    """Sluit row direct (binnen max_gap seconden) aan op dezelfde activiteit?"""
+    if any(previous.get(f, '') != row.get(f, '') for f in COALESCE_FIELDS):
+        return False
+    end = _time_seconds(previous.get('Eindtijd'))
+    start = _time_seconds(row.get('Starttijd'))
+    if end is None or start is None:
+        return False
+    return 0 <= start - end <= max_gap
+
+
+def coalesce_rows(rows, max_gap=60, stats=None):
+    """
+    Voeg opeenvolgende rijen van dezelfde activiteit samen. De eerste rij
+    houdt zijn ID; duur, uren en bedrag worden opgeteld zodat de totalen
+    gelijk blijven.
+    """
+    previous = None
+    for row in rows:
+        if previous is not None and _can_coalesce(previous, row, max_gap):
+            previous['Eindtijd'] = row.get('Eindtijd', '')
+            previous['Duur (sec)'] = (int(float(previous.get('Duur (sec)') or 0))
+                                      + int(float(row.get('Duur (sec)') or 0)))
+            for field in ('Duur (uren)', 'Bedrag'):
+                if field in previous:
+                    previous[field] = round(float(previous.get(field) or 0)
+                                            + float(row.get(field) or 0), 2)
+            if stats is not None:
+                stats['coalesced'] += 1
+            continue
+        if previous is not None:
+            yield previous
+        previous = row
+    if previous is not None:
+        yield previous
+
+
+# Rijen van vóór de retentiegrens worden per uur samengevoegd op deze kolommen
+DOWNSAMPLE_KEY = ('Datum', 'Project', 'Categorie', 'Applicatie', 'Tarief', 'Was Idle')
+DROPPED_FIELDS = ('Venstertitel', 'URL', 'Email Subject', 'Email Van')
+
+
+def downsample_rows(rows, before_date, stats=None):
+    """
+    Vervang rijen van vóór before_date door synthetische uurrijen: één rij
+    per (datum, uur van de starttijd, project, categorie, applicatie, tarief,
+    idle) met de opgetelde duur, uren en bedrag, zodat alle totalen gelijk
+    blijven. Titel, URL en e-mail vervallen; de rij houdt de ID en
+    starttijd van de eerste rij. Nieuwere rijen komen ongewijzigd door.
+    De rijen zijn chronologisch, dus er staat steeds maar één uur open.
+    Opnieuw toepassen op synthetische rijen verandert niets.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault('downsampled', 0)
+    stats.setdefault('synthetic', 0)
+    hour = None
+    bucket = {}
+
+    def emit():
+        for row, seconds, hours, amount in bucket.values():
+            row['Duur (sec)'] = seconds
+            row['Duur (uren)'] = round(hours, 6)
+            row['Bedrag'] = round(amount, 6)
+            start = _time_seconds(row.get('Starttijd'))
+            row['Eindtijd'] = clock(start + seconds) if start is not None else ''
+            stats['synthetic'] += 1
+            yield row
+        bucket.clear()
+
+    for row in rows:
+        date = str(row.get('Datum', ''))
+        if not date or date >= before_date:
+            yield from emit()
+            hour = None
+            yield row
+            continue
+
+        row_hour = (date, str(row.get('Starttijd', ''))[:2])
+        if row_hour != hour:
+            yield from emit()
+            hour = row_hour
+        key = tuple(str(row.get(field, '')) for field in DOWNSAMPLE_KEY)
+        seconds = int(float(row.get('Duur (sec)') or 0))
+        hours = float(row.get('Duur (uren)') or 0)
+        amount = float(row.get('Bedrag') or 0)
+        totals = bucket.get(key)
+        if totals is None:
+            synthetic = dict(row)
+            for field in DROPPED_FIELDS:
+                if field in synthetic:
+                    synthetic[field] = ''
+            if EPOCH_FIELD in synthetic:
+                synthetic[EPOCH_FIELD] = ''  # opnieuw berekend bij schrijven
+            bucket[key] = [synthetic, seconds, hours, amount]
+        else:
+            totals[1] += seconds
+            totals[2] += hours
+            totals[3] += amount
+        stats['downsampled'] += 1
+    yield from emit()
+
+
+def _snapshot_records(f, offset, end, position):
+    """
+    Ruwe records tot byte end (alleen complete regels); position[0] wordt
+    bijgewerkt tot het einde van het laatst gelezen record.
+    """
+    for record_offset, raw in _raw_records(f, offset):
+        if record_offset + len(raw) > end or not raw.endswith(b'\n'):
+            return
+        position[0] = record_offset + len(raw)
+        yield record_offset, raw
+
+
+def _corrected_rows(header, records, edits, applied, keep=None, stats=None):
+    """
+    Rijen met correcties toegepast; verwijderde rijen (en rijen waarvoor
+    keep False geeft) vallen weg. IDs met een correctie komen in applied.
+    """
+    if stats is None:
+        stats = {'rows': 0, 'deleted': 0, 'reassigned': 0}
+    for row_offset, raw, values in records:
+        row = _make_row(header, row_offset, raw, values)
+        stats['rows'] += 1
+        if edits:
+            row_id = row['ID']
+            if row_id in edits.deleted or row_id in edits.reassigned:
+                applied.add(row_id)
+            if row_id in edits.reassigned:
+                stats['reassigned'] += 1
+            if edits.apply_to(row) is None:
+                stats['deleted'] += 1
+                continue
+        if keep is not None and not keep(row):
+            stats['deleted'] += 1
+            continue
+        yield row
+
+
+def _looks_like_row(data, pos):
+    """Check of er op pos een rij begint ('YYYY-MM-DD;')."""
+    chunk = data[pos:pos + 11]
+    return (len(chunk) == 11 and chunk[4:5] == b'-' and chunk[7:8] == b'-'
+            and chunk[10:11] == b';' and chunk[:4].isdigit())
+
+
+def _row_start(data, pos, data_start):
+    """Eerste rij-begin op of na pos (regels binnen quotes worden overgeslagen)."""
+    size = len(data)
+    if pos <= data_start:
+        pos = data_start
+    elif data[pos - 1:pos] != b'\n':
+        newline = data.find(b'\n', pos)
+        pos = size if newline == -1 else newline + 1
+    while pos < size and not _looks_like_row(data, pos):
+        newline = data.find(b'\n', pos)
+        pos = size if newline == -1 else newline + 1
+    return pos
+
+
+def bisect_date(data, date, data_start=0):
+    """
+    Binary search over de regels van een chronologische log (bytes of mmap).
+    Retourneert de offset van de eerste rij met Datum >= date.
+    """
+    target = date.encode('ascii')
+    lo = _row_start(data, data_start, data_start)
+    hi = len(data)
+    while lo < hi:
+        mid = _row_start(data, (lo + hi) // 2, data_start)
+        if mid >= hi:
+            break
+        if data[mid:mid + 10] < target:
+            lo = _row_start(data, mid + 1, data_start)
+        else:
+            hi = mid
+
+    # Restant (lange regels): lineair verder zoeken
+    while lo < hi and data[lo:lo + 10] < target:
+        lo = _row_start(data, lo + 1, data_start)
+    return lo
+
+
+# Sommen worden bijgehouden als geheel aantal miljoensten: exact, dus de
+# volgorde van optellen (serieel of per stuk in een worker) maakt niet uit
+VALUE_SCALE = 1000000
+
+# Boven deze grootte (van het te lezen deel van de log) telt totals() de
+# log in stukken op in meerdere processen
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def _scaled(value):
+    return round(float(value or 0) * VALUE_SCALE)
+
+
+def sum_rows(rows, keys, totals):
+    """
+    Tel tuples (sleutelkolommen..., waarden...) op in totals:
+    {sleutel tuple: [geschaalde som, ...]}.
+    """
+    for values in rows:
+        key = values[:keys]
+        sums = totals.get(key)
+        if sums is None:
+            sums = totals[key] = [0] * (len(values) - keys)
+        for i, value in enumerate(values[keys:]):
+            sums[i] += _scaled(value)
+    return totals
+
+
+def merge_totals(totals, part):
+    """Voeg (geschaalde) deeltotalen samen in totals."""
+    for key, sums in part.items():
+        target = totals.get(key)
+        if target is None:
+            totals[key] = list(sums)
+        else:
+            for i, value in enumerate(sums):
+                target[i] += value
+    return totals
+
+
+def unscaled_totals(totals):
+    return {key: [value / VALUE_SCALE for value in sums] for key, sums in totals.items()}
+
+
+def _chunk_totals(task):
+    """
+    Worker (ProcessPoolExecutor): tel één stuk [begin, end) van een CSV log
+    op. Het stuk begint en eindigt op een rij-begin; de header wordt ervoor
+    gezet zodat _select_file het als een los bestand kan lezen.
+    """
+    (path, fields, log_format, codec_path, begin, end,
+     group_by, values, start_date, end_date, deleted, reassigned) = task
+    codec = DictionaryCodec(codec_path) if codec_path else None
+    log = CsvActivityLog(path, fields, use_index=False, edits=None,
+                         log_format=log_format, codec=codec)
+    edits = None
+    if deleted or reassigned:
+        edits = EditLog(Path(path).with_name(Path(path).name + '.edits'))
+        edits.deleted, edits.reassigned = deleted, reassigned
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        f.seek(begin)
+        chunk = io.BytesIO(header_line + f.read(end - begin))
+    rows = log._select_file(chunk, tuple(group_by) + tuple(values), start_date, end_date, edits)
+    return sum_rows(rows, len(group_by), {})
+
+
+class CsvActivityLog(BufferedLog):
+    """
+    Activity log als CSV bestand (de standaard opslag).
+
+    Naast het bestand staat een kleine index (<log>.idx) met per datum de
+    byte offset van de eerste rij. Omdat de log chronologisch wordt
+    aangevuld kan een lezer direct naar een datum springen. Ontbreekt de
+    index of klopt hij niet meer, dan wordt er met een binary search via
+    mmap gezocht (en de index weer aangevuld).
+
+    Elke rij heeft een vaste 'ID' kolom. Verwijderde rijen worden als
+    tombstone vastgelegd in <log>.edits en door lezers overgeslagen. Het
+    bestand blijft open zolang er geschreven wordt.
+
+    Met log_format='dict' krijgt een nieuw bestand ids in plaats van
+    tekst voor de ENCODED_FIELDS (tabel in <log>.dict); met 'epoch' een
+    EPOCH_FIELD kolom in plaats van Starttijd, Eindtijd en Duur (uren).
+    Combineren kan met 'dict+epoch'. Het formaat van een bestaand bestand
+    volgt uit zijn header; compact() en rotate() schrijven in het
+    ingestelde formaat en zetten een log dus om.
+    """
+
+    def __init__(self, path, fields=DETAILED_FIELDS, use_index=True, edits='auto',
+                 log_format='plain', codec='auto', **buffer_options):
+        super().__init__(**buffer_options)
+        self.path = Path(path)
+        self.lock = path_lock(self.path)
+        # Herschrijven (compact, rotate, downsample, delete_range) gebeurt
+        # buiten self.lock zodat de tracker door kan schrijven; deze lock
+        # zorgt dat er maar één proces tegelijk herschrijft
+        self.rewrite_lock = path_lock(self.path.with_name(self.path.name + '.rewrite'))
+        self.handle = None
+        self.fields = fields
+        self.columns = None  # header van het bestand waarnaar geschreven wordt
+        self.index_path = self.path.with_name(self.path.name + '.idx') if use_index else None
+        self._index = None
+        self._last_indexed = None  # hoogste datum in de index
+        if edits == 'auto':
+            edits = EditLog(self.path.with_name(self.path.name + '.edits'))
+        self.edits = edits
+        self.log_format = log_format
+        if codec == 'auto':
+            codec = DictionaryCodec(self.path.with_name(self.path.name + '.dict'))
+        self.codec = codec
+
+    # ==================== DATUM INDEX ====================
+
+    def load_index(self):
+        """Laad de datum -> offset index (leeg als er geen is)."""
+        if self._index is None:
+            self._index = {}
+            if self.index_path and self.index_path.exists():
+                try:
+                    with open(self.index_path, 'r', encoding='utf-8') as f:
+                        self._index = json.load(f)
+                except (OSError, ValueError):
+                    self._index = {}
+            self._last_indexed = max(self._index, default=None)
+        return self._index
+
+    def save_index(self):
+        """Sla de index op (atomisch via een tijdelijk bestand)."""
+        if not self.index_path or self._index is None:
+            return
+        tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def drop_index(self):
+        """Verwijder de index (na herschrijven van het bestand)."""
+        self._index = None
+        self._last_indexed = None
+        if self.index_path and self.index_path.exists():
+            self.index_path.unlink()
+
+    def index_date(self, date, offset):
+        """Registreer de offset van de eerste rij van een nieuwe datum."""
+        if not self.index_path:
+            return
+        index = self.load_index()
+        # Rijen staan op datum: alleen een datum na de laatste is nieuw (O(1) per rij)
+        if self._last_indexed is not None and date <= self._last_indexed:
+            return
+        index[date] = offset
+        self._last_indexed = date
+        self.save_index()
+
+    def _valid_offset(self, data, offset, date):
+        """Check of offset echt naar de eerste rij van date wijst."""
+        if offset >= len(data) or data[offset:offset + 10] != date.encode('ascii'):
+            return False
+        if data[offset - 1:offset] != b'\n':
+            return False
+        # Vorige rij moet een eerdere datum hebben (of de header zijn)
+        chunk = data[max(0, offset - 4096):offset - 1]
+        previous = chunk[chunk.rfind(b'\n') + 1:]
+        return not _looks_like_row(previous, 0) or previous[:10] < date.encode('ascii')
+
+    def find_offset(self, date):
+        """Byte offset van de eerste rij met Datum >= date (None als die er niet is)."""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return None
+
+        with open(self.path, 'rb') as f:
+            header_end = len(f.readline())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                index = self.load_index() if self.index_path else {}
+                offset = index.get(date)
+                if offset is not None and self._valid_offset(data, offset, date):
+                    return offset
+
+                # Index ontbreekt of is verouderd: binary search
+                offset = bisect_date(data, date, header_end)
+                if offset >= len(data):
+                    return None
+                if self.index_path and data[offset:offset + 10] == date.encode('ascii'):
+                    index[date] = offset
+                    self._last_indexed = max(self._last_indexed or date, date)
+                    self.save_index()
+                return offset
+
+    # ==================== LEZEN EN SCHRIJVEN ====================
+
+    def _open_handle(self):
+        """Open (of heropen) het bestand om aan toe te voegen."""
+        if self.handle is not None:
+            # Bestand vervangen (bijv. na delete)? Dan opnieuw openen.
+            try:
+                current = os.stat(self.path)
+                same = os.path.samestat(current, os.fstat(self.handle.fileno()))
+            except OSError:
+                same = False
+            if same:
+                return self.handle
+            self.handle.close()
+            self.handle = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = self.read_header()
+        if header and 'ID' in self.fields and 'ID' not in header:
+            header = self.upgrade_ids()
+
+        self.handle = open(self.path, 'ab')
+        self.handle.seek(0, os.SEEK_END)
+        if self.handle.tell() == 0:
+            # Voeg header toe als bestand nog leeg is
+            header = self._target_columns(self.fields)
+            self.handle.write(self._encode(header))
+        self.columns = header
+        return self.handle
+
+    def read_header(self):
+        """Kolomnamen uit de eerste regel van het bestand (leeg als er geen is)."""
+        try:
+            with open(self.path, 'rb') as f:
+                header_line = f.readline()
+        except OSError:
+            return []
+        return next(csv.reader([header_line.decode('utf-8')], delimiter=';'), [])
+
+    def _reader(self, header_line):
+        """(kolomnamen, decode functie of None) voor de header van een bestand."""
+        header = next(csv.reader([header_line.decode('utf-8')], delimiter=';'), [])
+        decode = None
+        if self.codec is not None:
+            header, decode = self.codec.reader(header)
+        if EPOCH_FIELD in header:
+            header, decode = _epoch_reader(header, decode)
+        return header, decode
+
+    def _target_columns(self, header):
+        """Kolommen (zonder '#') zoals ze in het ingestelde formaat geschreven worden."""
+        columns = [c[:-1] if c.endswith('#') else c for c in header]
+        if EPOCH_FIELD in columns:
+            # Epoch bestand: terug naar de gewone tijdkolommen op hun plek
+            columns = [c for c in columns if c not in DERIVED_TIME_FIELDS]
+            position = columns.index(EPOCH_FIELD)
+            columns[position:position + 1] = ['Starttijd', 'Eindtijd']
+            if 'Duur (uren)' in self.fields and 'Duur (sec)' in columns:
+                columns.insert(columns.index('Duur (sec)') + 1, 'Duur (uren)')
+        if 'ID' not in columns:
+            columns.append('ID')
+
+        formats = self.log_format.split('+')
+        if 'epoch' in formats:
+            columns = [EPOCH_FIELD if c == 'Starttijd' else c for c in columns
+                       if c not in ('Eindtijd', 'Duur (uren)')]
+        if 'dict' in formats and self.codec is not None:
+            columns = [c + '#' if c in ENCODED_FIELDS else c for c in columns]
+        return columns
+
+    def _row_values(self, row, columns):
+        """Waarden van een rij voor de kolommen van een bestand."""
+        if EPOCH_FIELD in columns and row.get(EPOCH_FIELD, '') == '':
+            row = dict(row)
+            row[EPOCH_FIELD] = to_epoch(row.get('Datum', ''), row.get('Starttijd', ''))
+            row['Duur (sec)'] = int(float(row.get('Duur (sec)') or 0))
+        if self.codec is not None and any(c.endswith('#') for c in columns):
+            return self.codec.encode_row(row, columns, self.fsync)
+        return [row.get(c, '') for c in columns]
+
+    def upgrade_ids(self):
+        """
+        Eenmalige upgrade van een bestand zonder ID kolom: voeg de kolom toe
+        met dezelfde (afgeleide) IDs die lezers tot nu toe gebruikten.
+        """
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(self.path, 'rb') as src, open(tmp, 'wb') as dst:
+            header_line = src.readline()
+            header = next(csv.reader([header_line.decode('utf-8')], delimiter=';'), [])
+            dst.write(self._encode(header + ['ID']))
+            for offset, raw, values in _parse_records(_raw_records(src, len(header_line))):
+                values = (values + [''] * len(header))[:len(header)]
+                dst.write(self._encode(values + [derived_row_id(raw, offset)]))
+        os.replace(tmp, self.path)
+        self.drop_index()
+        return header + ['ID']
+
+    def _encode(self, values):
+        line = io.StringIO()
+        csv.writer(line, delimiter=';').writerow(values)
+        return line.getvalue().encode('utf-8')
+
+    def _write_batch(self, records):
+        """Schrijf een batch rijen in één keer naar het bestand."""
+        with self.lock:
+            handle = self._open_handle()
+            offset = handle.tell()
+            data = []
+            for record in records:
+                line = self._encode(self._row_values(record, self.columns))
+                self.index_date(str(record.get('Datum', '')), offset)
+                data.append(line)
+                offset += len(line)
+            handle.write(b''.join(data))
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+
+    # ==================== GEROTEERDE SEGMENTEN ====================
+
+    def segments(self, start_date=None, end_date=None):
+        """
+        Gecomprimeerde segmenten van deze log die (deels) binnen de periode
+        vallen, op volgorde: [(eerste datum, laatste datum, pad)].
+        Naam: <log>.<eerste>_<laatste>.csv.gz (of .xz).
+        """
+        result = []
+        stem = self.path.stem
+        for path in self.path.parent.glob(f"{stem}.*_*.csv.*"):
+            if path.suffix not in SEGMENT_OPENERS:
+                continue
+            dates = path.name[len(stem) + 1:].split('.')[0]
+            first, last = dates[:10], dates[11:21]
+            if (start_date and last < start_date) or (end_date and first > end_date):
+                continue
+            result.append((first, last, path))
+        return sorted(result)
+
+    def segment_path(self, first, last, suffix='.gz'):
+        """Vrije naam voor een nieuw segment met rijen van first t/m last."""
+        segment = self.path.with_name(f"{self.path.stem}.{first}_{last}.csv{suffix}")
+        number = 1
+        while segment.exists():
+            number += 1
+            segment = self.path.with_name(f"{self.path.stem}.{first}_{last}-{number}.csv{suffix}")
+        return segment
+
+    def segment_writer(self, compression='gzip'):
+        """SegmentWriter om chronologische rijen als nieuw segment toe te voegen."""
+        return SegmentWriter(self, '.xz' if compression in ('lzma', 'xz') else '.gz')
+
+    def last_date(self):
+        """Datum van de laatste rij in de log zelf (zonder segmenten), of None."""
+        self.flush()
+        try:
+            with open(self.path, 'rb') as f:
+                header_end = len(f.readline())
+                size = os.fstat(f.fileno()).st_size
+                if size <= header_end:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    position = size
+                    while position > header_end:
+                        start = _row_start(data, max(header_end, position - 65536), header_end)
+                        last = None
+                        while start < position:
+                            last = start
+                            start = _row_start(data, start + 1, header_end)
+                        if last is not None:
+                            return data[last:last + 10].decode('ascii')
+                        position = max(header_end, position - 65536)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _segment_rows(self, path, start_date=None, end_date=None, edits=None):
+        """Rijen uit één gecomprimeerd segment (streaming gedecomprimeerd)."""
+        with SEGMENT_OPENERS[path.suffix](path, 'rb') as f:
+            header_line = f.readline()
+            header, decode = self._reader(header_line)
+            for row_offset, raw, values in _parse_records(_raw_records(f, len(header_line))):
+                row = _make_row(header, row_offset, raw, decode(values) if decode else values)
+                date = row.get('Datum', '')
+                if end_date and date > end_date:
+                    break
+                if start_date and date < start_date:
+                    continue
+                if edits and edits.apply_to(row) is None:
+                    continue
+                yield row
+
+    def needs_rotation(self, max_bytes=0, max_days=0, today=None):
+        """Moet de log geroteerd worden (groter dan max_bytes of ouder dan max_days)?"""
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        if max_bytes and size >= max_bytes:
+            return True
+        if max_days:
+            with open(self.path, 'rb') as f:
+                f.readline()
+                first_row = f.read(11)
+            if _looks_like_row(first_row, 0):
+                today = datetime.strptime(today, '%Y-%m-%d') if today else datetime.now()
+                limit = (today - timedelta(days=max_days)).strftime('%Y-%m-%d')
+                return first_row[:10].decode('ascii') < limit
+        return False
+
+    def rotate(self, compression='gzip'):
+        """
+        Verplaats alle rijen van de log naar een nieuw gecomprimeerd segment
+        (gzip of lzma) en begin met een lege log. Correcties worden daarbij
+        verwerkt. Rijen die tijdens het comprimeren zijn toegevoegd blijven
+        in de log. Retourneert het pad van het segment (None als de log leeg is).
+        """
+        with self.rewrite_lock:
+            self.flush()
+            if not self.path.exists():
+                return None
+
+            suffix = '.xz' if compression in ('lzma', 'xz') else '.gz'
+            edits = self.edits.snapshot() if self.edits else None
+            applied = set()
+            tmp = self.path.with_name(self.path.name + '.rotate' + suffix)
+            first = last = None
+
+            with open(self.path, 'rb') as src:
+                header_line = src.readline()
+                header, decode = self._reader(header_line)
+                columns = self._target_columns(header)
+                end = os.fstat(src.fileno()).st_size
+                position = [len(header_line)]
+
+                with SEGMENT_OPENERS[suffix](tmp, 'wb') as dst:
+                    dst.write(self._encode(columns))
+                    records = _parse_records(_snapshot_records(src, len(header_line), end, position))
+                    for row in _corrected_rows(header, _decoded(records, decode), edits, applied):
+                        dst.write(self._encode(self._row_values(row, columns)))
+                        first = first or row.get('Datum', '')
+                        last = row.get('Datum', '')
+
+                if first is None:
+                    tmp.unlink()
+                    return None
+
+                segment = self.segment_path(first, last, suffix)
+
+                with self.lock:
+                    # Nieuwe log: header + rijen die tijdens het comprimeren zijn toegevoegd
+                    live_tmp = self.path.with_name(self.path.name + '.tmp')
+                    with open(live_tmp, 'wb') as live:
+                        live.write(self._encode(columns))
+                        src.seek(position[0])
+                        tail = ((o, raw) for o, raw in _raw_records(src, position[0])
+                                if raw.endswith(b'\n'))
+                        records = _decoded(_parse_records(tail), decode)
+                        for row in _corrected_rows(header, records, edits, applied):
+                            live.write(self._encode(self._row_values(row, columns)))
+                        live.flush()
+                        os.fsync(live.fileno())
+                    os.replace(tmp, segment)
+                    os.replace(live_tmp, self.path)
+                    self.drop_index()
+                    if self.edits:
+                        self.edits.truncate(edits._state, applied)
+            return segment
+
+    # ==================== LEZEN ====================
+
+    def rows(self, start_date=None, end_date=None):
+        """
+        Itereer over rijen, optioneel gefilterd op datum: eerst die uit de
+        gecomprimeerde segmenten, dan die uit de log zelf.
+        Bij een startdatum wordt direct naar de eerste rij van die datum
+        gesprongen; na de einddatum wordt gestopt (de log is chronologisch).
+        """
+        self.flush()
+        edits = self.edits.refresh() if self.edits else None
+        for _, _, path in self.segments(start_date, end_date):
+            yield from self._segment_rows(path, start_date, end_date, edits)
+        yield from self._log_rows(start_date, end_date, edits)
+
+    def runs(self, segments=None):
+        """
+        De rijen per chronologisch deel: één iterator per segment en één
+        voor de log zelf. Segmenten (bijv. van een import) kunnen elkaar en
+        de log overlappen; elk deel op zich is wel gesorteerd, dus geschikt
+        voor een k-way merge.
+        segments: alleen deze segmentbestanden (zonder de log zelf).
+        """
+        self.flush()
+        edits = self.edits.refresh() if self.edits else None
+        if segments is not None:
+            return [self._segment_rows(Path(path), edits=edits) for path in segments]
+        return ([self._segment_rows(path, edits=edits) for _, _, path in self.segments()]
+                + [self._log_rows(edits=edits)])
+
+    def _log_rows(self, start_date=None, end_date=None, edits=None):
+        """Rijen uit de log zelf (zonder segmenten)."""
+        if not self.path.exists():
+            return
+
+        offset = None
+        if start_date:
+            offset = self.find_offset(start_date)
+            if offset is None:
+                return
+
+        with open(self.path, 'rb') as f:
+            header_line = f.readline()
+            if not header_line:
+                return
+            header, decode = self._reader(header_line)
+            if offset is None:
+                offset = len(header_line)
+            f.seek(offset)
+
+            for row_offset, raw, values in _parse_records(_raw_records(f, offset)):
+                row = _make_row(header, row_offset, raw, decode(values) if decode else values)
+                date = row.get('Datum', '')
+                if end_date and date > end_date:
+                    break
+                if start_date and date < start_date:
+                    continue
+                if edits and edits.apply_to(row) is None:
+                    continue
+                yield row
+
+    def select(self, columns, start_date=None, end_date=None):
+        """
+        Snelle lezer: yield per rij alleen de gevraagde kolommen als tuple.
+        Kolomposities worden één keer uit de header bepaald; rijen buiten de
+        periode worden op hun datum-prefix overgeslagen zonder ze te
+        splitsen, en alleen de gevraagde velden worden gedecodeerd.
+        """
+        self.flush()
+        edits = self.edits.refresh() if self.edits else None
+        if edits and not (edits.deleted or edits.reassigned):
+            edits = None
+
+        for _, _, path in self.segments(start_date, end_date):
+            with SEGMENT_OPENERS[path.suffix](path, 'rb') as f:
+                yield from self._select_file(f, columns, start_date, end_date, edits)
+
+        if not self.path.exists():
+            return
+
+        offset = None
+        if start_date:
+            offset = self.find_offset(start_date)
+            if offset is None:
+                return
+
+        with open(self.path, 'rb') as f:
+            yield from self._select_file(f, columns, start_date, end_date, edits, offset)
+
+    def _select_file(self, f, columns, start_date, end_date, edits, offset=None):
+        """select() voor één (eventueel gedecomprimeerd) bestand."""
+        header_line = f.readline()
+        if not header_line:
+            return
+        header, decode = self._reader(header_line)
+        if header[:1] != ['Datum'] or ('ID' not in header and (edits or 'ID' in columns)):
+            # Afwijkende layout of oud bestand zonder ID kolom: via de volledige rijen
+            if offset is None:
+                offset = len(header_line)
+            f.seek(offset)
+            for row_offset, raw, values in _parse_records(_raw_records(f, offset)):
+                row = _make_row(header, row_offset, raw, decode(values) if decode else values)
+                date = row.get('Datum', '')
+                if end_date and date > end_date:
+                    break
+                if (start_date and date < start_date) or (edits and edits.apply_to(row) is None):
+                    continue
+                yield tuple(row.get(column, '') for column in columns)
+            return
+
+        # Ontbrekende kolommen wijzen naar een extra lege waarde achteraan
+        width = len(header) + 1
+        positions = [header.index(c) if c in header else len(header) for c in columns]
+        getter = operator.itemgetter(*positions)
+        pick = getter if len(positions) > 1 else (lambda values: (getter(values),))
+        id_position = header.index('ID') if edits else None
+        # Alleen gevraagde kolommen die als id zijn opgeslagen decoderen;
+        # afgeleide tijdkolommen (epoch formaat) via de volledige decode
+        encoded = []
+        derive = False
+        if decode:
+            raw_header = next(csv.reader([header_line.decode('utf-8')], delimiter=';'), [])
+            encoded = [(p, header[p]) for p in sorted(set(positions))
+                       if p < len(raw_header) and raw_header[p].endswith('#')]
+            derive = any(len(raw_header) <= p < len(header) for p in positions)
+        start_key = start_date.encode('ascii') if start_date else None
+        end_key = end_date.encode('ascii') if end_date else None
+        if offset is not None:
+            f.seek(offset)
+
+        pending = b''
+        for line in f:
+            if pending:
+                line = pending + line
+                pending = b''
+            quoted = b'"' in line
+            if quoted and line.count(b'"') % 2:
+                pending = line  # newline binnen quotes: record loopt door
+                continue
+
+            date = line[:10]
+            if end_key and date > end_key:
+                break
+            if start_key and date < start_key:
+                continue
+
+            if quoted:
+                values = next(csv.reader([line.decode('utf-8')], delimiter=';'), [])
+            else:
+                values = line.decode('utf-8').rstrip('\r\n').split(';')
+            if derive:
+                values = decode(values)
+            if len(values) < width:
+                values += [''] * (width - len(values))
+
+            if edits:
+                row_id = values[id_position]
+                if row_id in edits.deleted:
+                    continue
+                if row_id in edits.reassigned:
+                    row = dict(zip(header, decode(values) if decode and not derive else values))
+                    edits.apply_to(row)
+                    yield tuple(row.get(column, '') for column in columns)
+                    continue
+
+            if not derive:
+                for position, field in encoded:
+                    values[position] = self.codec.decode(field, values[position])
+            yield pick(values)
+
+    def read_new(self, cursor=None):
+        """
+        Lees alleen wijzigingen sinds de vorige aanroep.
+        cursor is (device, inode, offset, edits state, segmenten) van de
+        vorige keer, of None. Retourneert (rijen, nieuwe cursor, reset,
+        verwijderde IDs); reset=True betekent dat het bestand vervangen of
+        ingekort is (bijv. door rotatie) en alles opnieuw gelezen is,
+        inclusief de gecomprimeerde segmenten.
+        """
+        self.flush()
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return [], None, True, set()
+
+        segments = tuple(path.name for _, _, path in self.segments())
+        reset = (cursor is None or cursor[:2] != (stat.st_dev, stat.st_ino)
+                 or stat.st_size < cursor[2] or cursor[4] != segments)
+
+        # Nieuwe tombstones; een vervangen edits bestand of een nieuwe
+        # projectwijziging betekent alles opnieuw lezen
+        edits_state = None
+        removed = set()
+        if self.edits:
+            records, edits_state, edits_reset = self.edits.read_from(
+                None if reset else cursor[3])
+            reassigned = any(r.get('op') != 'delete' for r in records)
+            reset = reset or edits_reset or reassigned
+            removed = {r.get('id') for r in records if r.get('op') == 'delete'}
+
+        edits = self.edits.refresh() if self.edits else None
+        rows = []
+        if reset:
+            for _, _, path in self.segments():
+                rows.extend(self._segment_rows(path, edits=edits))
+
+        with open(self.path, 'rb') as f:
+            header_line = f.readline()
+            header, decode = self._reader(header_line)
+            offset = len(header_line) if reset else cursor[2]
+            f.seek(offset)
+
+            def complete_records():
+                # Een half geschreven laatste regel laten we voor de volgende keer
+                for record_offset, raw in _raw_records(f, offset):
+                    if not raw.endswith(b'\n'):
+                        return
+                    complete_records.end = record_offset + len(raw)
+                    yield record_offset, raw
+            complete_records.end = offset
+
+            for row_offset, raw, values in _parse_records(complete_records()):
+                row = _make_row(header, row_offset, raw, decode(values) if decode else values)
+                if not edits or edits.apply_to(row) is not None:
+                    rows.append(row)
+
+        if reset:
+            removed = set()
+        cursor = (stat.st_dev, stat.st_ino, complete_records.end, edits_state, segments)
+        return rows, cursor, reset, removed
+
+    def aggregate(self, group_by, start_date=None, end_date=None, value='Duur (sec)'):
+        """Tel een kolom op per waarde van group_by."""
+        return {key[0]: sums[0] for key, sums in
+                self.totals((group_by,), (value,), start_date, end_date).items()}
+
+    def totals(self, group_by, values, start_date=None, end_date=None, workers=None, scaled=False):
+        """
+        Exacte sommen van de kolommen values per combinatie van group_by:
+        {(sleutel, ...): [som, ...]}. Is het te lezen deel van de log groter
+        dan PARALLEL_MIN_BYTES (of workers > 1), dan wordt het opgedeeld in
+        stukken op rij-grenzen die in een ProcessPoolExecutor worden
+        opgeteld; het resultaat is precies gelijk aan de seriële telling.
+        Gecomprimeerde segmenten worden altijd serieel gelezen.
+        scaled=True geeft de sommen als geheel aantal miljoensten (VALUE_SCALE).
+        """
+        finish = (lambda totals: totals) if scaled else unscaled_totals
+        group_by, values = tuple(group_by), tuple(values)
+        columns = group_by + values
+        self.flush()
+        chunks = self.chunks(start_date, end_date) if workers != 1 else []
+        span = chunks[-1][1] - chunks[0][0] if chunks else 0
+        if len(chunks) < 2 or (span < PARALLEL_MIN_BYTES and not workers):
+            return finish(sum_rows(self.select(columns, start_date, end_date), len(group_by), {}))
+
+        edits = self.edits.refresh() if self.edits else None
+        if edits and not (edits.deleted or edits.reassigned):
+            edits = None
+        totals = {}
+        for _, _, path in self.segments(start_date, end_date):
+            with SEGMENT_OPENERS[path.suffix](path, 'rb') as f:
+                sum_rows(self._select_file(f, columns, start_date, end_date, edits),
+                         len(group_by), totals)
+
+        codec_path = str(self.codec.path) if self.codec is not None else None
+        tasks = [(str(self.path), self.fields, self.log_format, codec_path, begin, end,
+                  group_by, values, start_date, end_date,
+                  edits.deleted if edits else None, edits.reassigned if edits else None)
+                 for begin, end in chunks]
+        try:
+            with ProcessPoolExecutor(max_workers=workers or None) as executor:
+                parts = list(executor.map(_chunk_totals, tasks))
+        except Exception:
+            # Geen processen beschikbaar (bijv. sandbox): zelf tellen
+            parts = [_chunk_totals(task) for task in tasks]
+        for part in parts:
+            merge_totals(totals, part)
+        return finish(totals)
+
+    def chunks(self, start_date=None, end_date=None, chunk_bytes=PARALLEL_CHUNK_BYTES):
+        """
+        Deel het deel van de log binnen de periode op in byte ranges
+        [(begin, eind)] die op een rij-begin beginnen en eindigen (alleen
+        complete regels).
+        """
+        try:
+            if self.path.stat().st_size == 0:
+                return []
+        except OSError:
+            return []
+        with open(self.path, 'rb') as f:
+            header_length = len(f.readline())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                begin = header_length
+                if start_date:
+                    begin = bisect_date(data, start_date, header_length)
+                end = data.rfind(b'\n') + 1
+                if end_date and end_date < '9999-12-31':  # open einde: geen volgende dag
+                    next_day = (datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+                    end = min(end, bisect_date(data, next_day.strftime('%Y-%m-%d'), header_length))
+                if end <= begin:
+                    return []
+
+                boundaries = [begin]
+                position = begin + chunk_bytes
+                while position < end:
+                    start = _row_start(data, position, header_length)
+                    if start >= end:
+                        break
+                    boundaries.append(start)
+                    position = start + chunk_bytes
+                boundaries.append(end)
+        return list(zip(boundaries, boundaries[1:]))
+
+    def delete(self, ids):
+        """
+        Verwijder rijen op ID door tombstones toe te voegen aan het edits
+        bestand; de log zelf wordt niet herschreven.
+        """
+        ids = [str(i) for i in ids]
+        if not ids or not self.edits:
+            return 0
+        self.flush()
+        self.edits.append([{'op': 'delete', 'id': row_id} for row_id in ids])
+        return len(ids)
+
+    def reassign(self, ids, project, rate=None):
+        """
+        Zet rijen op ID op een ander project (met rate ook Tarief en Bedrag)
+        via records in het edits bestand; de log wordt niet herschreven.
+        """
+        ids = [str(i) for i in ids]
+        if not ids or not self.edits:
+            return 0
+        self.flush()
+        self.edits.append([reassign_record(row_id, project, rate) for row_id in ids])
+        return len(ids)
+
+    def compact(self, max_gap=60, edits=None, keep=None, applied=None, transform=None):
+        """
+        Herschrijf de log in één streaming pass: verwijderde rijen vallen
+        weg, projectwijzigingen worden verwerkt en aaneengesloten rijen van
+        dezelfde activiteit samengevoegd. Het nieuwe bestand vervangt het
+        oude atomisch; rijen die tijdens het herschrijven zijn toegevoegd
+        worden op het eind overgenomen. Gecomprimeerde segmenten blijven
+        ongemoeid.
+
+        edits: correcties om toe te passen (default: een snapshot van het
+        eigen edits bestand; verwerkte correcties worden daaruit verwijderd).
+        keep: optionele functie(rij) -> bool; rijen waarvoor die False
+        geeft worden ook verwijderd.
+        applied: optionele set die aangevuld wordt met de IDs waarop een
+        correctie is toegepast.
+        transform: optionele functie(rijen) -> rijen, toegepast na de
+        correcties (bijv. downsample_rows).
+        Retourneert statistieken als dict.
+        """
+        with self.rewrite_lock:
+            transform = transform or (lambda rows: rows)
+            stats = {'rows': 0, 'kept': 0, 'deleted': 0, 'reassigned': 0,
+                     'coalesced': 0, 'bytes_before': 0, 'bytes_after': 0}
+            self.flush()
+            if not self.path.exists():
+                return stats
+
+            own_edits = edits is None and self.edits is not None
+            if own_edits:
+                edits = self.edits.snapshot()
+            if applied is None:
+                applied = set()
+            tmp = self.path.with_name(self.path.name + '.compact')
+
+            with open(self.path, 'rb') as src, open(tmp, 'wb') as dst:
+                header_line = src.readline()
+                header, decode = self._reader(header_line)
+                columns = self._target_columns(header)
+                dst.write(self._encode(columns))
+
+                # Alleen complete regels tot de huidige grootte; de rest is de staart
+                end = os.fstat(src.fileno()).st_size
+                position = [len(header_line)]
+                records = _parse_records(_snapshot_records(src, len(header_line), end, position))
+                rows = _corrected_rows(header, _decoded(records, decode), edits, applied, keep, stats)
+                for row in coalesce_rows(transform(rows), max_gap, stats):
+                    dst.write(self._encode(self._row_values(row, columns)))
+                    stats['kept'] += 1
+
+                with self.lock:
+                    # Rijen die intussen zijn toegevoegd overnemen (zonder samenvoegen)
+                    src.seek(position[0])
+                    tail = ((o, raw) for o, raw in _raw_records(src, position[0])
+                            if raw.endswith(b'\n'))
+                    for row in transform(_corrected_rows(header, _decoded(_parse_records(tail), decode),
+                                                         edits, applied, keep, stats)):
+                        dst.write(self._encode(self._row_values(row, columns)))
+                        stats['kept'] += 1
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                    stats['bytes_before'] = os.fstat(src.fileno()).st_size
+                    stats['bytes_after'] = dst.tell()
+
+                    os.replace(tmp, self.path)
+                    self.drop_index()
+                    if own_edits:
+                        self.edits.truncate(edits._state, applied)
+            return stats
+
+    def downsample(self, before_date, since=None):
+        """
+        Retentie: vervang de rijen van vóór before_date door synthetische
+        uurrijen (zie downsample_rows), in de segmenten en in de log zelf.
+        Segmenten die helemaal vóór since liggen zijn bij een vorige ronde
+        al verwerkt en worden overgeslagen. Retourneert statistieken.
+        """
+        with self.rewrite_lock:
+            stats = {'downsampled': 0, 'synthetic': 0, 'bytes_before': 0, 'bytes_after': 0}
+            self.flush()
+            edits = self.edits.snapshot() if self.edits is not None else None
+            applied = set()
+
+            for first, last, path in self.segments(since, before_date):
+                if first >= before_date:
+                    continue
+                tmp = path.with_name(path.name + '.tmp')
+                with SEGMENT_OPENERS[path.suffix](path, 'rb') as f, \
+                        SEGMENT_OPENERS[path.suffix](tmp, 'wb') as dst:
+                    header_line = f.readline()
+                    header, decode = self._reader(header_line)
+                    columns = self._target_columns(header)
+                    dst.write(self._encode(columns))
+                    records = _parse_records(_raw_records(f, len(header_line)))
+                    rows = _corrected_rows(header, _decoded(records, decode), edits, applied)
+                    for row in downsample_rows(rows, before_date, stats):
+                        dst.write(self._encode(self._row_values(row, columns)))
+                stats['bytes_before'] += path.stat().st_size
+                stats['bytes_after'] += tmp.stat().st_size
+                os.replace(tmp, path)
+
+            compact_stats = self.compact(max_gap=-1, edits=edits, applied=applied,
+                                         transform=lambda rows: downsample_rows(rows, before_date, stats))
+            stats['bytes_before'] += compact_stats['bytes_before']
+            stats['bytes_after'] += compact_stats['bytes_after']
+            if edits is not None:
+                self.edits.truncate(edits._state, applied)
+            return stats
+
+    def delete_range(self, start_date, end_date, ids=None):
+        """
+        Verwijder alle rijen binnen een periode (herschrijft de log en de
+        segmenten die de periode overlappen). Met ids alleen de rijen uit
+        de periode met een ID uit die set (bijv. de gearchiveerde rijen),
+        zodat rijen die een ander proces intussen toevoegt blijven staan.
+        """
+        with self.rewrite_lock:
+            def keep(row):
+                if ids is not None and row.get('ID') not in ids:
+                    return True
+                return not in_range(row.get('Datum', ''), start_date, end_date)
+
+            deleted = 0
+            for first, last, path in self.segments(start_date, end_date):
+                with SEGMENT_OPENERS[path.suffix](path, 'rb') as f:
+                    header_line = f.readline()
+                    header, _ = self._reader(header_line)  # alleen Datum nodig: niet decoderen
+                    tmp = path.with_name(path.name + '.tmp')
+                    kept = 0
+                    with SEGMENT_OPENERS[path.suffix](tmp, 'wb') as dst:
+                        dst.write(header_line)
+                        for row_offset, raw, values in _parse_records(_raw_records(f, len(header_line))):
+                            if keep(_make_row(header, row_offset, raw, values)):
+                                dst.write(raw)
+                                kept += 1
+                            else:
+                                deleted += 1
+                if kept:
+                    os.replace(tmp, path)
+                else:
+                    tmp.unlink()
+                    path.unlink()
+
+            stats = self.compact(max_gap=-1, keep=keep)
+            return deleted + stats['deleted']
+
+    def close(self):
+        """Schrijf de buffer weg en sluit het bestand."""
+        self.flush()
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+
+class SegmentWriter:
+    """
+    Schrijft rijen (op volgorde van datum) naar een nieuw gecomprimeerd
+    segment van een CsvActivityLog, bijvoorbeeld bij het importeren van
+    rijen die ouder zijn dan de log. Lezers zien het segment pas na close().
+    """
+
+    def __init__(self, log, suffix='.gz'):
+        self.log = log
+        self.suffix = suffix
+        self.tmp = log.path.with_name(f"{log.path.name}.import{os.getpid()}{suffix}")
+        self.handle = None
+        self.first = self.last = None
+
+    def append_many(self, records):
+        """Voeg een batch rijen toe (datums niet lager dan die van de vorige batch)."""
+        if not records:
+            return
+        if self.handle is None:
+            self.log.path.parent.mkdir(parents=True, exist_ok=True)
+            self.columns = self.log._target_columns(self.log.fields)
+            self.handle = SEGMENT_OPENERS[self.suffix](self.tmp, 'wb')
+            self.handle.write(self.log._encode(self.columns))
+        for record in records:
+            if not record.get('ID'):
+                record['ID'] = new_row_id()
+            self.handle.write(self.log._encode(self.log._row_values(record, self.columns)))
+        self.first = self.first or str(records[0]['Datum'])
+        self.last = str(records[-1]['Datum'])
+
+    def close(self):
+        """Sluit het segment af en geef het pad terug (None als er niets geschreven is)."""
+        if self.handle is None:
+            return None
+        self.handle.close()
+        self.handle = None
+        segment = self.log.segment_path(self.first, self.last, self.suffix)
+        os.replace(self.tmp, segment)
+        return segment
+
+
+class PartitionedCsvLog:
+    """
+    Activity log als map met één CSV bestand per dag:
+        <map>/2026/10/2026-10-18.csv
+
+    Schrijven rolt automatisch over naar een nieuw bestand als de datum
+    verandert. Lezen opent alleen de partities binnen de gevraagde periode.
+    Tombstones voor alle partities staan in <map>/edits.jsonl, de
+    dictionary tabel (log_format='dict') in <map>/dictionary.jsonl.
+    """
+
+    def __init__(self, path, fields=DETAILED_FIELDS, log_format='plain', **buffer_options):
+        self.path = Path(path)
+        self.fields = fields
+        self.log_format = log_format
+        self.buffer_options = buffer_options
+        self.writer = None
+        self.writer_lock = threading.RLock()
+        self.edits = EditLog(self.path / 'edits.jsonl')
+        self.codec = DictionaryCodec(self.path / 'dictionary.jsonl')
+        # Eén herschrijver tegelijk (ook tussen processen), zie CsvActivityLog
+        self.rewrite_lock = path_lock(self.path / 'rewrite')
+
+    def partition_log(self, date, edits=None, **buffer_options):
+        """CsvActivityLog voor één partitie (zonder eigen index of edits bestand)."""
+        return CsvActivityLog(self.partition_path(date), self.fields, use_index=False,
+                              edits=edits, log_format=self.log_format, codec=self.codec,
+                              **buffer_options)
+
+    def partition_path(self, date):
+        """Pad van de partitie voor een datum (YYYY-MM-DD)."""
+        return self.path / date[:4] / date[5:7] / f"{date}.csv"
+
+    def partitions(self, start_date=None, end_date=None):
+        """Geef (datum, pad) van alle partities binnen de periode, op volgorde."""
+        if not self.path.exists():
+            return []
+
+        result = []
+        for year_dir in sorted(self.path.iterdir()):
+            year = year_dir.name
+            if not year_dir.is_dir():
+                continue
+            if (start_date and year < start_date[:4]) or (end_date and year > end_date[:4]):
+                continue
+            for month_dir in sorted(year_dir.iterdir()):
+                month = f"{year}-{month_dir.name}"
+                if not month_dir.is_dir():
+                    continue
+                if (start_date and month < start_date[:7]) or (end_date and month > end_date[:7]):
+                    continue
+                for path in sorted(month_dir.glob('*.csv')):
+                    if in_range(path.stem, start_date, end_date):
+                        result.append((path.stem, path))
+        return result
+
+    def append(self, record):
+        """Schrijf één activiteit naar de partitie van zijn datum."""
+        path = self.partition_path(str(record['Datum']))
+        with self.writer_lock:
+            if self.writer is None or self.writer.path != path:
+                # Nieuwe dag: vorige partitie afsluiten
+                if self.writer is not None:
+                    self.writer.close()
+                self.writer = self.partition_log(str(record['Datum']), **self.buffer_options)
+            self.writer.append(record)
+
+    def append_many(self, records):
+        """Schrijf een batch activiteiten, per dag in één keer naar de partitie."""
+        by_date = {}
+        for record in records:
+            by_date.setdefault(str(record['Datum']), []).append(record)
+        with self.writer_lock:
+            for date, day_records in by_date.items():
+                if self.writer is not None and self.writer.path == self.partition_path(date):
+                    self.writer.append_many(day_records)
+                    continue
+                partition = self.partition_log(date)
+                partition.append_many(day_records)
+                partition.close()
+
+    def flush_if_due(self):
+        """Flush de huidige partitie als de drempel bereikt is."""
+        with self.writer_lock:
+            if self.writer is not None:
+                self.writer.flush_if_due()
+
+    def flush(self):
+        """Schrijf gebufferde rijen van de huidige partitie weg."""
+        with self.writer_lock:
+            if self.writer is not None:
+                self.writer.flush()
+
+    def rows(self, start_date=None, end_date=None):
+        """Itereer over de rijen van alle partities binnen de periode."""
+        self.flush()
+        edits = self.edits.refresh()
+        for date, _ in self.partitions(start_date, end_date):
+            for row in self.partition_log(date).rows():
+                if edits.apply_to(row) is not None:
+                    yield row
+
+    def select(self, columns, start_date=None, end_date=None):
+        """Alleen de gevraagde kolommen als tuples (zie CsvActivityLog.select)."""
+        self.flush()
+        for date, _ in self.partitions(start_date, end_date):
+            yield from self.partition_log(date, edits=self.edits).select(columns)
+
+    def read_new(self, cursor=None):
+        """
+        Lees alleen wijzigingen (zie CsvActivityLog.read_new).
+        Oudere partities veranderen normaal niet meer; een wijziging wordt
+        gedetecteerd via een fingerprint (naam, inode, grootte) en leidt tot
+        een volledige herlaadactie. Van de nieuwste partitie wordt alleen
+        het nieuwe deel gelezen, van edits.jsonl alleen nieuwe tombstones.
+        """
+        self.flush()
+        partitions = self.partitions()
+        if not partitions:
+            return [], None, True, set()
+
+        def fingerprint(before):
+            parts = []
+            for date, path in partitions:
+                if date < before:
+                    stat = path.stat()
+                    parts.append((date, stat.st_ino, stat.st_size))
+            return hash(tuple(parts))
+
+        def read_partition(date, inner_cursor=None):
+            new_rows, inner_cursor, inner_reset, _ = self.partition_log(date).read_new(inner_cursor)
+            return new_rows, inner_cursor, inner_reset
+
+        dates = [date for date, _ in partitions]
+        reset = (cursor is None or cursor[0] not in dates
+                 or fingerprint(cursor[0]) != cursor[1])
+
+        records, edits_state, edits_reset = self.edits.read_from(None if reset else cursor[3])
+        reassigned = any(r.get('op') != 'delete' for r in records)
+        if (edits_reset or reassigned) and not reset:
+            return self.read_new(None)
+        removed = {r.get('id') for r in records if r.get('op') == 'delete'}
+        edits = self.edits.refresh()
+
+        rows = []
+        inner_cursor = None
+        if reset:
+            for date in dates:
+                new_rows, inner_cursor, _ = read_partition(date)
+                rows.extend(new_rows)
+        else:
+            # Verder lezen in de vorige nieuwste partitie, daarna nieuwere dagen
+            new_rows, inner_cursor, inner_reset = read_partition(cursor[0], cursor[2])
+            if inner_reset:
+                return self.read_new(None)
+            rows.extend(new_rows)
+            for date in dates:
+                if date > cursor[0]:
+                    new_rows, inner_cursor, _ = read_partition(date)
+                    rows.extend(new_rows)
+
+        rows = [row for row in rows if edits.apply_to(row) is not None]
+        if reset:
+            removed = set()
+        latest_date = dates[-1]
+        cursor = (latest_date, fingerprint(latest_date), inner_cursor, edits_state)
+        return rows, cursor, reset, removed
+
+    def aggregate(self, group_by, start_date=None, end_date=None, value='Duur (sec)'):
+        """Tel een kolom op per waarde van group_by."""
+        totals = {}
+        for key, amount in self.select((group_by, value), start_date, end_date):
+            totals[key] = totals.get(key, 0) + float(amount or 0)
+        return totals
+
+    def delete(self, ids):
+        """Verwijder rijen op ID via tombstones in edits.jsonl."""
+        ids = [str(i) for i in ids]
+        if not ids:
+            return 0
+        self.flush()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.edits.append([{'op': 'delete', 'id': row_id} for row_id in ids])
+        return len(ids)
+
+    def reassign(self, ids, project, rate=None):
+        """Zet rijen op ID op een ander project via edits.jsonl."""
+        ids = [str(i) for i in ids]
+        if not ids:
+            return 0
+        self.flush()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.edits.append([reassign_record(row_id, project, rate) for row_id in ids])
+        return len(ids)
+
+    def compact(self, max_gap=60):
+        """
+        Compacteer alle partities (zie CsvActivityLog.compact) en verwerk
+        daarmee de correcties in edits.jsonl.
+        """
+        with self.rewrite_lock:
+            self.flush()
+            edits = self.edits.snapshot()
+            applied = set()
+            stats = {}
+            for date, _ in self.partitions():
+                partition_stats = self.partition_log(date).compact(max_gap, edits, applied=applied)
+                for key, value in partition_stats.items():
+                    stats[key] = stats.get(key, 0) + value
+            self.edits.truncate(edits._state, applied)
+            return stats
+
+    def downsample(self, before_date, since=None):
+        """
+        Retentie: vervang de rijen van de partities vóór before_date door
+        synthetische uurrijen (zie downsample_rows). Partities vóór since
+        zijn bij een vorige ronde al verwerkt.
+        """
+        with self.rewrite_lock:
+            self.flush()
+            edits = self.edits.snapshot()
+            applied = set()
+            stats = {'downsampled': 0, 'synthetic': 0, 'bytes_before': 0, 'bytes_after': 0}
+            for date, _ in self.partitions(since, None):
+                if date >= before_date:
+                    break
+                partition_stats = self.partition_log(date).compact(
+                    -1, edits, applied=applied,
+                    transform=lambda rows: downsample_rows(rows, before_date, stats)
+                )
+                stats['bytes_before'] += partition_stats['bytes_before']
+                stats['bytes_after'] += partition_stats['bytes_after']
+            self.edits.truncate(edits._state, applied)
+            return stats
+
+    def delete_range(self, start_date, end_date, ids=None):
+        """
+        Verwijder alle rijen binnen een periode door de partities te
+        verwijderen. Met ids worden de partities herschreven zonder de rijen
+        met een ID uit die set (zie CsvActivityLog.delete_range).
+        """
+        with self.rewrite_lock:
+            self.flush()
+            deleted = 0
+            for date, path in self.partitions(start_date, end_date):
+                partition = self.partition_log(date)
+                if ids is not None:
+                    stats = partition.compact(-1, keep=lambda row: row.get('ID') not in ids)
+                    deleted += stats['deleted']
+                    if stats['kept']:
+                        continue
+                # Onder de lock van de partitie: een schrijver opent daarna een nieuw bestand
+                with partition.lock:
+                    if ids is None:
+                        deleted += sum(1 for _ in partition.rows())
+                    path.unlink()
+            return deleted
+
+    def close(self):
+        """Sluit de huidige partitie."""
+        with self.writer_lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+
+
+class SqliteActivityLog(BufferedLog):
+    """Activity log in een SQLite database (WAL mode, met indexes)."""
+
+    def __init__(self, path, **buffer_options):
+        super().__init__(**buffer_options)
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL' if self.fsync else 'PRAGMA synchronous=NORMAL')
+        self.create_schema()
+
+    def create_schema(self):
+        """Maak tabel en indexes aan als ze nog niet bestaan."""
+        columns = ", ".join(f"{column} {kind}" for _, column, kind in SQLITE_COLUMNS)
+        with self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS activities (id INTEGER PRIMARY KEY, {columns})"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_activities_datum ON activities(datum, starttijd)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_activities_project ON activities(project, datum)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_activities_categorie ON activities(categorie, datum)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_activities_applicatie ON activities(applicatie, datum)"
+            )
+
+    def _insert_sql(self):
+        columns = ", ".join(column for _, column, _ in SQLITE_COLUMNS)
+        placeholders = ", ".join("?" for _ in SQLITE_COLUMNS)
+        return f"INSERT INTO activities ({columns}) VALUES ({placeholders})"
+
+    def _values(self, record):
+        return [record.get(field, '') for field, _, _ in SQLITE_COLUMNS]
+
+    @staticmethod
+    def _row(values):
+        """Rij (dict met kolomnamen) uit (id, kolommen...) van een SELECT."""
+        row = {'ID': str(values[0])}
+        for (field, _, _), value in zip(SQLITE_COLUMNS, values[1:]):
+            row[field] = '' if value is None else value
+        return row
+
+    def _write_batch(self, records):
+        """Schrijf de buffer in één transactie weg."""
+        self.append_many(records)
+
+    def append_many(self, records):
+        """Schrijf een batch activiteiten in één transactie."""
+        with self.lock, self.conn:
+            self.conn.executemany(self._insert_sql(), (self._values(r) for r in records))
+
+    def _where(self, start_date, end_date):
+        clauses, params = [], []
+        if start_date:
+            clauses.append("datum >= ?")
+            params.append(start_date)
+        if end_date:
+            clauses.append("datum <= ?")
+            params.append(end_date)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def _pages(self, names, start_date=None, end_date=None, after=0):
+        """
+        Itereer (id, kolommen...) op volgorde van id, per SQLITE_PAGE_ROWS
+        rijen (WHERE id > vorige). Er staat zo nooit de hele selectie in het
+        geheugen en de lock wordt tussen twee pagina's losgelaten, zodat de
+        tracker tijdens een lange export gewoon kan blijven schrijven.
+        """
+        where, params = self._where(start_date, end_date)
+        where += " AND id > ?" if where else " WHERE id > ?"
+        sql = f"SELECT id, {names} FROM activities{where} ORDER BY id LIMIT {SQLITE_PAGE_ROWS}"
+        last_id = after
+        while True:
+            with self.lock:
+                page = self.conn.execute(sql, params + [last_id]).fetchmany(SQLITE_PAGE_ROWS)
+            yield from page
+            if len(page) < SQLITE_PAGE_ROWS:
+                return
+            last_id = page[-1][0]
+
+    def rows(self, start_date=None, end_date=None):
+        """Itereer over rijen (gesorteerd op invoegvolgorde)."""
+        self.flush()
+        columns = ", ".join(column for _, column, _ in SQLITE_COLUMNS)
+        for values in self._pages(columns, start_date, end_date):
+            yield self._row(values)
+
+    def select(self, columns, start_date=None, end_date=None):
+        """Alleen de gevraagde kolommen als tuples (waarden met hun SQLite type)."""
+        self.flush()
+        names = ", ".join('CAST(id AS TEXT)' if c == 'ID' else SQLITE_NAMES[c] for c in columns)
+        for values in self._pages(names, start_date, end_date):
+            yield tuple('' if v is None else v for v in values[1:])
+
+    def read_new(self, cursor=None):
+        """
+        Lees alleen rijen met een id hoger dan de vorige keer.
+        cursor is (hoogste id, aantal rijen t/m dat id); als dat aantal
+        gedaald is zijn er rijen verwijderd en wordt alles opnieuw gelezen.
+        De id (INTEGER PRIMARY KEY) is al stabiel, dus er zijn geen
+        tombstones: de set met verwijderde IDs is altijd leeg.
+        """
+        self.flush()
+        reset = cursor is None
+        if not reset:
+            with self.lock:
+                count = self.conn.execute(
+                    "SELECT COUNT(*) FROM activities WHERE id <= ?", (cursor[0],)
+                ).fetchone()[0]
+            reset = count != cursor[1]
+
+        last_id, count = (0, 0) if reset else cursor
+        columns = ", ".join(column for _, column, _ in SQLITE_COLUMNS)
+        rows = []
+        for values in self._pages(columns, after=last_id):
+            rows.append(self._row(values))
+            last_id = values[0]
+        count += len(rows)
+        return rows, (last_id, count), reset, set()
+
+    def aggregate(self, group_by, start_date=None, end_date=None, value='Duur (sec)'):
+        """Tel een kolom op per waarde van group_by (via GROUP BY)."""
+        self.flush()
+        key_column = SQLITE_NAMES[group_by]
+        value_column = SQLITE_NAMES[value]
+        where, params = self._where(start_date, end_date)
+        with self.lock:
+            result = self.conn.execute(
+                f"SELECT {key_column}, SUM({value_column}) FROM activities{where} "
+                f"GROUP BY {key_column}", params
+            ).fetchall()
+        return {('' if key is None else key): total or 0 for key, total in result}
+
+    def delete(self, ids):
+        """Verwijder rijen op basis van hun id."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        self.flush()
+        with self.lock, self.conn:
+            cursor = self.conn.executemany(
+                "DELETE FROM activities WHERE id = ?", [(i,) for i in ids]
+            )
+        return cursor.rowcount
+
+    def reassign(self, ids, project, rate=None):
+        """Zet rijen op id op een ander project (update via de primary key)."""
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        self.flush()
+        with self.lock, self.conn:
+            if rate is None:
+                cursor = self.conn.executemany(
+                    "UPDATE activities SET project = ? WHERE id = ?", [(project, i) for i in ids]
+                )
+            else:
+                # Bedrag in Python afronden, net als EditLog.apply_to en de dagtotalen
+                hours = {}
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    hours.update(self.conn.execute(
+                        f"SELECT id, duur_uren FROM activities WHERE id IN ({', '.join('?' * len(batch))})",
+                        batch
+                    ).fetchall())
+                cursor = self.conn.executemany(
+                    "UPDATE activities SET project = ?, tarief = ?, bedrag = ? WHERE id = ?",
+                    [(project, rate, round(float(hours[i] or 0) * float(rate), 2), i)
+                     for i in ids if i in hours]
+                )
+        return cursor.rowcount
+
+    def compact(self, max_gap=60):
+        """
+        Verwijderen gebeurt in SQLite direct; compaction geeft alleen de
+        vrijgekomen ruimte terug (VACUUM).
+        """
+        self.flush()
+        bytes_before = self.path.stat().st_size
+        with self.lock:
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self.conn.execute('VACUUM')
+        return {'bytes_before': bytes_before, 'bytes_after': self.path.stat().st_size}
+
+    def downsample(self, before_date, since=None):
+        """
+        Retentie: vervang per dag de rijen van vóór before_date door
+        synthetische uurrijen (zie downsample_rows), elke dag in één
+        transactie. Dagen vóór since zijn al eerder verwerkt.
+        """
+        self.flush()
+        with self.lock:
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        stats = {'downsampled': 0, 'synthetic': 0, 'bytes_before': self.path.stat().st_size}
+        with self.lock:
+            days = [day for (day,) in self.conn.execute(
+                "SELECT DISTINCT datum FROM activities WHERE datum < ? AND datum >= ? ORDER BY datum",
+                (before_date, since or '')
+            ).fetchall()]
+
+        columns = ", ".join(column for _, column, _ in SQLITE_COLUMNS)
+        for day in days:
+            with self.lock, self.conn:
+                # Lezen, verwijderen en invoegen in één schrijftransactie: een
+                # ander proces kan er intussen geen rijen voor deze dag tussen zetten
+                self.conn.execute("BEGIN IMMEDIATE")
+                rows = [self._row(values) for values in self.conn.execute(
+                    f"SELECT id, {columns} FROM activities WHERE datum = ? ORDER BY id", (day,)
+                )]
+                rows.sort(key=lambda row: str(row.get('Starttijd', '')))
+                synthetic = list(downsample_rows(rows, before_date, stats))
+                self.conn.execute("DELETE FROM activities WHERE datum = ?", (day,))
+                self.conn.executemany(self._insert_sql(), (self._values(r) for r in synthetic))
+
+        self.compact()
+        with self.lock:
+            # VACUUM in WAL mode landt pas na een checkpoint in het bestand
+            self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        stats['bytes_after'] = self.path.stat().st_size
+        return stats
+
+    def delete_range(self, start_date, end_date, ids=None):
+        """Verwijder alle rijen binnen een periode (met ids alleen die rijen)."""
+        self.flush()
+        with self.lock, self.conn:
+            if ids is None:
+                cursor = self.conn.execute(
+                    "DELETE FROM activities WHERE datum >= ? AND datum <= ?", (start_date, end_date)
+                )
+                return cursor.rowcount
+            deleted = 0
+            for row_id in ids:
+                deleted += self.conn.execute(
+                    "DELETE FROM activities WHERE id = ? AND datum >= ? AND datum <= ?",
+                    (int(row_id), start_date, end_date)
+                ).rowcount
+        return deleted
+
+    def count(self):
+        """Aantal rijen in de database."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def close(self):
+        """Schrijf de buffer weg en sluit de database verbinding."""
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+
+def migrate_csv_to_sqlite(csv_path, store, batch_size=1000):
+    """
+    Eenmalige migratie van een CSV log naar een SqliteActivityLog.
+    Leest de CSV streaming in batches, dus werkt ook voor zeer grote logs.
+    Ondersteunt zowel de 7-koloms als de 15-koloms layout.
+    Retourneert het aantal gemigreerde rijen.
+    """
+    migrated = 0
+    batch = []
+    before = store.aggregate('Datum')
+    # Via CsvActivityLog: ook dictionary-gecodeerde logs en tombstones
+    source = CsvActivityLog(csv_path, use_index=False)
+    for row in source.rows():
+        batch.append(normalize_row(row))
+        if len(batch) >= batch_size:
+            store.append_many(batch)
+            migrated += len(batch)
+            batch = []
+    if batch:
+        store.append_many(batch)
+        migrated += len(batch)
+    verify_copy(source, before, store.aggregate('Datum'))
+    return migrated
+
+
+def verify_copy(source, before, after):
+    """
+    Controleer na een migratie per dag dat het doel er precies de seconden
+    van de bron bij heeft gekregen (de bron wordt boven de drempel parallel
+    geteld). before/after: {datum: seconden} van het doel.
+    """
+    expected = source.totals(('Datum',), ('Duur (sec)',))
+    for (date,), (seconds,) in expected.items():
+        added = after.get(date, 0) - before.get(date, 0)
+        if abs(added - seconds) > 0.5:
+            raise ValueError(f"Migratie van {date} klopt niet: {added} van {seconds} seconden")
+
+
+def split_into_partitions(csv_path, partitioned_log):
+    """
+    Splits een bestaande (monolithische) CSV log in dag-partities.
+    Leest streaming en houdt maximaal één partitie tegelijk open.
+    Retourneert het aantal overgezette rijen.
+    """
+    fields = partitioned_log.fields
+    converted = 0
+    current_date = None
+    out = None
+    writer = None
+    before = partitioned_log.aggregate('Datum')
+    source = CsvActivityLog(csv_path, fields, use_index=False)
+
+    try:
+        for row in source.rows():
+            date = row['Datum']
+            if date != current_date:
+                if out:
+                    out.close()
+                path = partitioned_log.partition_path(date)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write_header = not path.exists()
+                out = open(path, 'a', newline='', encoding='utf-8')
+                writer = csv.writer(out, delimiter=';')
+                if write_header:
+                    writer.writerow(fields)
+                current_date = date
+
+            if fields is DETAILED_FIELDS:
+                row = normalize_row(row)
+            if not row.get('ID'):
+                row['ID'] = new_row_id()
+            writer.writerow([row.get(field, '') for field in fields])
+            converted += 1
+    finally:
+        if out:
+            out.close()
+    verify_copy(source, before, partitioned_log.aggregate('Datum'))
+    return converted
+
+
+def export_to_csv(log, output_path, start_date=None, end_date=None):
+    """Exporteer (een periode uit) een activity log naar een 15-koloms CSV (+ ID)."""
+    exported = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(DETAILED_FIELDS)
+        for values in log.select(DETAILED_FIELDS, start_date, end_date):
+            writer.writerow(values)
+            exported += 1
+    return exported
@@ -25,7 +25,13 @@ import time
 import platform
 from datetime import datetime, timedelta
 from pathlib import Path
-import csv
+
+from activity_store import (
+    BASIC_FIELDS,
+    CsvActivityLog,
+    PartitionedCsvLog,
+    split_into_partitions
+)
 
 # Detecteer besturingssysteem
 SYSTEM = platform.system()
@@ -36,9 +42,22 @@ DATA_DIR.mkdir(exist_ok=True)
 
 # Activity log bestand
 ACTIVITY_LOG = DATA_DIR / "activity_log.csv"
+ACTIVITY_PARTITIONS = DATA_DIR / "activity_log"
 CONFIG_FILE = DATA_DIR / "config.json"
 
 
+def open_activity_log(config):
+    """Open de activity log: één CSV bestand of dag-partities."""
+    buffer_options = {
+        "flush_rows": config.get("log_flush_rows", 10),
+        "flush_seconds": config.get("log_flush_seconds", 60),
+        "fsync": config.get("log_fsync", False),
+    }
+    if config.get("storage_backend") == "partitioned":
+        return PartitionedCsvLog(ACTIVITY_PARTITIONS, BASIC_FIELDS, **buffer_options)
+    return CsvActivityLog(ACTIVITY_LOG, BASIC_FIELDS, **buffer_options)
+
+
 def get_active_window_info():
     """
     Haal informatie op over het actieve venster.
@@ -174,12 +193,17 @@ class ActivityTracker:
         self.current_title = None
         self.current_start = None
         self.running = False
+        self.activity_log = open_activity_log(self.config)
 
     def load_config(self):
         """Laad configuratie."""
         default_config = {
             "interval_seconds": 5,
             "min_duration_seconds": 30,
+            "storage_backend": "csv",  # "csv" of "partitioned"
+            "log_flush_rows": 10,  # schrijf weg na zoveel activiteiten...
+            "log_flush_seconds": 60,  # ...of na zoveel seconden
+            "log_fsync": False,  # fsync na elke flush
             "rules": []  # [{"pattern": "klantnaam", "project": "Project X"}]
         }
 
@@ -229,27 +253,21 @@ class ActivityTracker:
 
         project = self.match_project(app_name, window_title)
 
-        # Voeg header toe als bestand niet bestaat
-        write_header = not ACTIVITY_LOG.exists()
-
-        with open(ACTIVITY_LOG, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, delimiter=';')
-            if write_header:
-                writer.writerow(['Datum', 'Starttijd', 'Eindtijd', 'Duur (sec)',
-                                'Applicatie', 'Venstertitel', 'Project'])
-
-            writer.writerow([
-                start_time.strftime('%Y-%m-%d'),
-                start_time.strftime('%H:%M:%S'),
-                end_time.strftime('%H:%M:%S'),
-                int(duration),
-                app_name,
-                window_title[:200],  # Limiet op titel lengte
-                project or ''
-            ])
+        self.activity_log.append({
+            'Datum': start_time.strftime('%Y-%m-%d'),
+            'Starttijd': start_time.strftime('%H:%M:%S'),
+            'Eindtijd': end_time.strftime('%H:%M:%S'),
+            'Duur (sec)': int(duration),
+            'Applicatie': app_name,
+            'Venstertitel': window_title[:200],  # Limiet op titel lengte
+            'Project': project or ''
+        })
 
     def track_once(self):
         """Voer één tracking check uit."""
+        # Schrijf gebufferde activiteiten weg als de flush-termijn verstreken is
+        self.activity_log.flush_if_due()
+
         app_name, window_title = get_active_window_info()
         now = datetime.now()
 
@@ -273,7 +291,7 @@ class ActivityTracker:
         """Start de tracking loop."""
         self.running = True
         print(f"Activity Tracker gestart op {SYSTEM}")
-        print(f"Logging naar: {ACTIVITY_LOG}")
+        print(f"Logging naar: {self.activity_log.path}")
         print(f"Interval: {self.config['interval_seconds']} seconden")
         print("Druk Ctrl+C om te stoppen\n")
 
@@ -291,36 +309,38 @@ class ActivityTracker:
                     datetime.now()
                 )
             print("\nTracker gestopt.")
+        finally:
+            self.activity_log.flush()
 
     def stop(self):
-        """Stop de tracking loop."""
+        """Stop de tracking loop en schrijf gebufferde activiteiten weg."""
         self.running = False
+        self.activity_log.flush()
 
 
-def get_daily_summary(date=None):
+def get_daily_summary(date=None, activity_log=None):
     """Genereer samenvatting voor een specifieke dag."""
     if date is None:
         date = datetime.now().strftime('%Y-%m-%d')
 
-    if not ACTIVITY_LOG.exists():
+    if activity_log is None:
+        activity_log = open_activity_log(ActivityTracker().config)
+
+    if not activity_log.path.exists():
         print("Geen activity log gevonden.")
         return
 
-    # Lees en filter log
+    # Lees en filter log (alleen de rijen van deze dag)
     activities = {}
     total_seconds = 0
 
-    with open(ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        for row in reader:
-            if row['Datum'] == date:
-                app = row['Applicatie']
-                duration = int(row['Duur (sec)'])
-                project = row.get('Project', '')
+    columns = ('Applicatie', 'Duur (sec)', 'Project')
+    for app, duration, project in activity_log.select(columns, date, date):
+        duration = int(duration)
 
-                key = project if project else app
-                activities[key] = activities.get(key, 0) + duration
-                total_seconds += duration
+        key = project if project else app
+        activities[key] = activities.get(key, 0) + duration
+        total_seconds += duration
 
     # Print samenvatting
     print(f"\n=== Activiteit Samenvatting voor {date} ===\n")
@@ -362,6 +382,9 @@ def main():
     # List rules command
     list_parser = subparsers.add_parser('list-rules', help='Toon alle regels')
 
+    # Splits monolithische log in dag-partities
+    partition_parser = subparsers.add_parser('partition', help='Splits CSV log in dag-partities')
+
     args = parser.parse_args()
 
     tracker = ActivityTracker()
@@ -369,7 +392,7 @@ def main():
     if args.command == 'start':
         tracker.run()
     elif args.command == 'summary':
-        get_daily_summary(args.date)
+        get_daily_summary(args.date, tracker.activity_log)
     elif args.command == 'add-rule':
         tracker.add_rule(args.pattern, args.project)
         print(f"Regel toegevoegd: '{args.pattern}' -> '{args.project}'")
@@ -379,6 +402,16 @@ def main():
             print(f"  '{rule['pattern']}' -> '{rule['project']}'")
         if not tracker.config["rules"]:
             print("  (geen regels)")
+    elif args.command == 'partition':
+        if not ACTIVITY_LOG.exists():
+            print(f"Bestand niet gevonden: {ACTIVITY_LOG}")
+            return
+        tracker.activity_log.flush()
+        partitioned = PartitionedCsvLog(ACTIVITY_PARTITIONS, BASIC_FIELDS)
+        converted = split_into_partitions(ACTIVITY_LOG, partitioned)
+        tracker.config["storage_backend"] = "partitioned"
+        tracker.save_config()
+        print(f"{converted} activiteiten verdeeld over partities in {ACTIVITY_PARTITIONS}")
     else:
         # Default: start tracking
         tracker.run()
@@ -21,11 +21,37 @@ import os
 import sys
 import json
 import time
+import threading
+import multiprocessing
 import platform
 import subprocess
 from datetime import datetime, timedelta
 from pathlib import Path
-import csv
+
+from activity_store import (
+    CsvActivityLog,
+    PartitionedCsvLog,
+    SqliteActivityLog,
+    migrate_csv_to_sqlite,
+    split_into_partitions,
+    export_to_csv,
+    EPOCH_FIELD,
+    clock,
+    epoch_seconds,
+    new_row_id
+)
+from archive import ColumnarArchive, ArchivedActivityLog, archive_month, closed_months
+from rollups import DailyRollups, compare_rollups
+from result_cache import ResultCache, file_version
+from importer import Importer, add_projects, detect_format
+from merge import merge_logs
+from sketches import SESSION_GAP, SketchStore, update_sketches
+from overlaps import IntervalIndex, resolve
+from reassign import bulk_reassign, row_filter
+from entry_repository import (
+    ActivityLogSource, EntryRepository, JsonEntrySource, PartitionedEntrySource, SOURCES,
+    TRAY_ENTRIES_DIR, TRAY_ENTRIES_FILE, manual_entry, tray_entry
+)
 
 # Detecteer besturingssysteem
 SYSTEM = platform.system()
@@ -46,9 +72,162 @@ DATA_DIR = get_data_dir()
 
 # Enhanced activity log bestand
 ACTIVITY_LOG = DATA_DIR / "activity_log_detailed.csv"
+ACTIVITY_DB = DATA_DIR / "activity_log.db"
+ACTIVITY_PARTITIONS = DATA_DIR / "activity_log"
+ROLLUPS_DIR = DATA_DIR / "rollups"
+ARCHIVE_DIR = DATA_DIR / "archive"
 CONFIG_FILE = DATA_DIR / "config.json"
+RESULT_CACHE_FILE = DATA_DIR / "result_cache.json"
+RETENTION_FILE = DATA_DIR / "retention.json"
+SKETCHES_DIR = DATA_DIR / "sketches"
+
+# Data bestanden van de desktop app
+PROJECTS_FILE = DATA_DIR / "projects.json"
+MANUAL_ENTRIES_FILE = DATA_DIR / "manual_entries.json"
 IDLE_THRESHOLD = 300  # 5 minuten idle = pauze
 
+DEFAULT_CONFIG = {
+    "interval_seconds": 5,
+    "min_duration_seconds": 30,
+    "idle_threshold_seconds": 300,
+    "track_urls": True,
+    "track_email_details": True,
+    "storage_backend": "csv",  # "csv", "partitioned" of "sqlite"
+    "log_flush_rows": 10,  # schrijf weg na zoveel activiteiten...
+    "log_flush_seconds": 60,  # ...of na zoveel seconden
+    "log_fsync": False,  # fsync na elke flush (veiliger, trager)
+    "auto_compact": False,  # compacteer de log op de achtergrond tijdens idle
+    "compact_interval_hours": 24,  # ...maximaal zo vaak
+    "compact_max_gap_seconds": 60,  # voeg rijen samen met maximaal zoveel tijd ertussen
+    "log_rotate_mb": 0,  # roteer de log naar een gecomprimeerd segment vanaf deze grootte (0 = uit)
+    "log_rotate_days": 0,  # ...of als de oudste rij ouder is dan zoveel dagen (0 = uit)
+    "log_compression": "gzip",  # "gzip" of "lzma" (kleiner, trager)
+    "log_format": "plain",  # "dict" (app, categorie, project, URL host als id), "epoch" of "dict+epoch"
+    "retention_raw_days": 0,  # ruwe rijen ouder dan zoveel dagen -> uurtotalen (0 = uit)
+    "overlap_precedence": ["manual", "tray", "auto"],  # bij overlap telt de eerste bron ([] = niet corrigeren)
+    "rules": []  # [{"pattern": "klantnaam", "project": "Project X"}]
+}
+
+
+def load_config():
+    """Laad configuratie, aangevuld met defaults."""
+    if CONFIG_FILE.exists():
+        try:
+            with open(CONFIG_FILE, 'r') as f:
+                return {**DEFAULT_CONFIG, **json.load(f)}
+        except:
+            pass
+    return dict(DEFAULT_CONFIG, rules=[])
+
+
+def open_activity_log(config=None, on_flush=None):
+    """
+    Open de activity log volgens de ingestelde storage backend.
+    on_flush(records) wordt na elke weggeschreven buffer aangeroepen.
+    """
+    if config is None:
+        config = load_config()
+    buffer_options = {
+        "flush_rows": config.get("log_flush_rows", 10),
+        "flush_seconds": config.get("log_flush_seconds", 60),
+        "fsync": config.get("log_fsync", False),
+        "on_flush": on_flush,
+    }
+    backend = config.get("storage_backend")
+    log_format = config.get("log_format", "plain")
+    if backend == "sqlite":
+        log = SqliteActivityLog(ACTIVITY_DB, **buffer_options)
+    elif backend == "partitioned":
+        log = PartitionedCsvLog(ACTIVITY_PARTITIONS, log_format=log_format, **buffer_options)
+    else:
+        log = CsvActivityLog(ACTIVITY_LOG, log_format=log_format, **buffer_options)
+    # Afgesloten maanden worden (indien gearchiveerd) uit het kolom-archief gelezen
+    return ArchivedActivityLog(log, ColumnarArchive(ARCHIVE_DIR))
+
+
+def retention_cutoff(raw_days, today=None):
+    """Eerste datum die nog ruw bewaard blijft."""
+    today = datetime.strptime(today, '%Y-%m-%d') if today else datetime.now()
+    return (today - timedelta(days=raw_days)).strftime('%Y-%m-%d')
+
+
+def load_retention_state():
+    """Tot welke datum is de log al teruggebracht naar uurrijen?"""
+    try:
+        with open(RETENTION_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def save_retention_state(state):
+    with open(RETENTION_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+
+def open_entry_repository(activity_log=None, cached=False):
+    """Repository over de activity log, handmatige entries en tray entries."""
+    if activity_log is None:
+        activity_log = open_activity_log()
+    return EntryRepository([
+        ActivityLogSource(activity_log, cached=cached),
+        JsonEntrySource('manual', MANUAL_ENTRIES_FILE, manual_entry),
+        PartitionedEntrySource('tray', TRAY_ENTRIES_DIR, tray_entry, legacy_path=TRAY_ENTRIES_FILE),
+    ])
+
+
+def auto_rollup_records(activity_log):
+    """Rollup records voor de activity log (per dag, project, categorie en app opgeteld)."""
+    if hasattr(activity_log, 'totals'):
+        # Grote CSV logs worden daarbij over meerdere processen verdeeld
+        totals = activity_log.totals(('Datum', 'Project', 'Categorie', 'Applicatie'),
+                                     ('Duur (sec)', 'Duur (uren)', 'Bedrag'))
+        for (date, project, category, app), (seconds, hours, amount) in \
+                sorted(totals.items(), key=lambda item: item[0][0]):
+            yield date, 'auto', project, category, app, seconds, hours, amount
+        return
+
+    columns = ('Datum', 'Project', 'Categorie', 'Applicatie', 'Duur (sec)', 'Duur (uren)', 'Bedrag')
+    for date, project, category, app, seconds, hours, amount in activity_log.select(columns):
+        yield (
+            date, 'auto', project, category, app,
+            float(seconds or 0), float(hours or 0), float(amount or 0)
+        )
+
+
+def manual_rollup_record(entry, rate=0):
+    """Rollup record voor een handmatige entry of timer sessie."""
+    hours = float(entry['hours'])
+    return (
+        entry['date'], 'manual',
+        entry['project'], 'handmatig', 'Handmatig',
+        hours * 3600, hours, round(hours * rate, 2)
+    )
+
+
+def _load_json_list(path):
+    if path.exists():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            pass
+    return []
+
+
+def rebuild_rollups(rollups, activity_log):
+    """Bouw de dagtotalen opnieuw op uit de activity log en handmatige entries."""
+    rates = {p['name']: p.get('rate', 0) for p in _load_json_list(PROJECTS_FILE)}
+
+    def records():
+        yield from auto_rollup_records(activity_log)
+        for entry in JsonEntrySource('manual', MANUAL_ENTRIES_FILE, manual_entry).raw:
+            yield manual_rollup_record(entry, rates.get(entry['project'], 0))
+
+    # Eerst de buffer wegschrijven: anders telt on_flush die rijen na de scan nog een keer
+    activity_log.flush()
+    rollups.rebuild(records())
+
 
 def run_applescript(script):
     """Voer AppleScript uit en retourneer resultaat."""
@@ -307,6 +486,13 @@ class EnhancedActivityTracker:
         # Project override - wordt gebruikt in plaats van auto-matching
         self.project_name = project_name
         self.project_rate = project_rate
+        self.rollups = DailyRollups(ROLLUPS_DIR)
+        # Dagtotalen van gebufferde rijen (per ID), bijgewerkt als de buffer wegschrijft
+        self.pending_rollups = {}
+        self.activity_log = open_activity_log(self.config, on_flush=self.write_rollups)
+        self.result_cache = ResultCache(RESULT_CACHE_FILE)
+        self.maintenance_thread = None
+        self.last_compact = time.monotonic()
 
     def set_project(self, project_name, project_rate=0):
         """Stel het actieve project in voor logging."""
@@ -315,24 +501,12 @@ class EnhancedActivityTracker:
 
     def load_config(self):
         """Laad configuratie."""
-        default_config = {
-            "interval_seconds": 5,
-            "min_duration_seconds": 30,
-            "idle_threshold_seconds": 300,
-            "track_urls": True,
-            "track_email_details": True,
-            "rules": []  # [{"pattern": "klantnaam", "project": "Project X"}]
-        }
-
         if CONFIG_FILE.exists():
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    return {**default_config, **json.load(f)}
-            except:
-                pass
+            return load_config()
 
-        self.save_config(default_config)
-        return default_config
+        config = dict(DEFAULT_CONFIG, rules=[])
+        self.save_config(config)
+        return config
 
     def save_config(self, config=None):
         """Sla configuratie op."""
@@ -348,6 +522,7 @@ class EnhancedActivityTracker:
             "project": project
         })
         self.save_config()
+        self.result_cache.invalidate()
 
     def match_project(self, activity):
         """Match activiteit met een project op basis van regels."""
@@ -393,41 +568,50 @@ class EnhancedActivityTracker:
             project = self.match_project(activity) or 'Auto'
             rate = 0
 
-        # Voeg header toe als bestand niet bestaat
-        write_header = not ACTIVITY_LOG.exists()
-
-        with open(ACTIVITY_LOG, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, delimiter=';')
-            if write_header:
-                writer.writerow([
-                    'Datum', 'Starttijd', 'Eindtijd', 'Duur (sec)', 'Duur (uren)',
-                    'Applicatie', 'Venstertitel', 'URL', 'Categorie',
-                    'Email Subject', 'Email Van', 'Project', 'Tarief', 'Bedrag', 'Was Idle'
-                ])
-
-            hours = round(duration / 3600, 2)
-            amount = round(hours * rate, 2)
-
-            writer.writerow([
-                start_time.strftime('%Y-%m-%d'),
-                start_time.strftime('%H:%M:%S'),
-                end_time.strftime('%H:%M:%S'),
-                int(duration),
-                hours,
-                activity.get('app_name', ''),
-                activity.get('window_title', '')[:200],
-                activity.get('url', '')[:500],
-                activity.get('category', ''),
-                activity.get('email_subject', '')[:200],
-                activity.get('email_from', '')[:100],
-                project,
-                rate,
-                amount,
-                'Ja' if self.is_idle else 'Nee'
-            ])
+        hours = round(duration / 3600, 2)
+        amount = round(hours * rate, 2)
+        category = activity.get('category', '')
+        app_name = activity.get('app_name', '')
+        date = start_time.strftime('%Y-%m-%d')
+        start = epoch_seconds(start_time)
+        row_id = new_row_id()
+
+        # De dagtotalen gaan mee in dezelfde flush als de rij zelf
+        self.pending_rollups[row_id] = (
+            date, 'auto', project, category, app_name, int(duration), hours, amount
+        )
+        self.activity_log.append({
+            'Datum': date,
+            EPOCH_FIELD: start,
+            'Starttijd': clock(start),
+            'Eindtijd': clock(epoch_seconds(end_time)),
+            'Duur (sec)': int(duration),
+            'Duur (uren)': hours,
+            'Applicatie': app_name,
+            'Venstertitel': activity.get('window_title', '')[:200],
+            'URL': activity.get('url', '')[:500],
+            'Categorie': category,
+            'Email Subject': activity.get('email_subject', '')[:200],
+            'Email Van': activity.get('email_from', '')[:100],
+            'Project': project,
+            'Tarief': rate,
+            'Bedrag': amount,
+            'Was Idle': 'Ja' if self.is_idle else 'Nee',
+            'ID': row_id
+        })
+
+    def write_rollups(self, records):
+        """Werk de dagtotalen bij voor een weggeschreven batch van log_activity."""
+        pending = [self.pending_rollups.pop(record.get('ID'), None) for record in records]
+        pending = [record for record in pending if record is not None]
+        if pending:
+            self.rollups.add_many(pending)
 
     def track_once(self):
         """Voer één tracking check uit."""
+        # Schrijf gebufferde activiteiten weg als de flush-termijn verstreken is
+        self.activity_log.flush_if_due()
+
         # Check idle status
         idle_seconds = get_idle_time()
         now = datetime.now()
@@ -445,6 +629,9 @@ class EnhancedActivityTracker:
                 self.current_activity = None
                 self.current_start = None
                 print(f"[{now.strftime('%H:%M:%S')}] Idle gedetecteerd")
+            self.maybe_rotate()
+            self.maybe_compact()
+            self.maybe_downsample()
             return
 
         # Niet meer idle
@@ -480,6 +667,88 @@ class EnhancedActivityTracker:
             else:
                 print(f"[{now.strftime('%H:%M:%S')}] {app} - {title}")
 
+    def maybe_compact(self):
+        """Start (tijdens idle) een compaction op de achtergrond als die weer aan de beurt is."""
+        if not self.config.get("auto_compact", False):
+            return
+        if self.maintenance_thread is not None and self.maintenance_thread.is_alive():
+            return
+        interval = self.config.get("compact_interval_hours", 24) * 3600
+        if time.monotonic() - self.last_compact < interval:
+            return
+
+        self.last_compact = time.monotonic()
+        self.maintenance_thread = threading.Thread(target=self.compact, daemon=True)
+        self.maintenance_thread.start()
+
+    def maybe_rotate(self):
+        """Roteer (tijdens idle) de log op de achtergrond als hij te groot of te oud is."""
+        max_mb = self.config.get("log_rotate_mb", 0)
+        max_days = self.config.get("log_rotate_days", 0)
+        if not (max_mb or max_days) or not hasattr(self.activity_log, 'rotate'):
+            return
+        if self.maintenance_thread is not None and self.maintenance_thread.is_alive():
+            return
+        if not self.activity_log.needs_rotation(int(max_mb * 1024 * 1024), max_days):
+            return
+
+        self.maintenance_thread = threading.Thread(target=self.rotate, daemon=True)
+        self.maintenance_thread.start()
+
+    def rotate(self):
+        """Roteer de activity log naar een gecomprimeerd segment."""
+        try:
+            segment = self.activity_log.rotate(self.config.get("log_compression", "gzip"))
+            if segment:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] Log geroteerd naar {segment.name}")
+            return segment
+        except Exception as e:
+            print(f"Fout bij roteren: {e}")
+
+    def compact(self):
+        """Compacteer de activity log (veilig naast het loggen)."""
+        try:
+            stats = self.activity_log.compact(self.config.get("compact_max_gap_seconds", 60))
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Log gecompacteerd: "
+                  f"{stats.get('bytes_before', 0) // 1024} KB -> {stats.get('bytes_after', 0) // 1024} KB")
+            return stats
+        except Exception as e:
+            print(f"Fout bij compacteren: {e}")
+
+    def maybe_downsample(self):
+        """Pas (tijdens idle) de retentie toe als er een nieuwe dag te verwerken is."""
+        raw_days = self.config.get("retention_raw_days", 0)
+        if not raw_days:
+            return
+        if self.maintenance_thread is not None and self.maintenance_thread.is_alive():
+            return
+        if load_retention_state().get("downsampled_before") == retention_cutoff(raw_days):
+            return
+
+        self.maintenance_thread = threading.Thread(target=self.downsample, daemon=True)
+        self.maintenance_thread.start()
+
+    def downsample(self, raw_days=None):
+        """
+        Vervang ruwe rijen ouder dan raw_days door synthetische uurrijen.
+        De dagtotalen blijven gelijk, dus rollups en rapporten veranderen niet.
+        """
+        try:
+            raw_days = raw_days or self.config.get("retention_raw_days", 0)
+            before_date = retention_cutoff(raw_days)
+            state = load_retention_state()
+            since = state.get("downsampled_before")
+            if since and since > before_date:
+                since = None  # retentie verlengd: niets overslaan
+            stats = self.activity_log.downsample(before_date, since)
+            save_retention_state({"downsampled_before": before_date})
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Retentie tot {before_date}: "
+                  f"{stats['downsampled']} rijen -> {stats['synthetic']} uurrijen, "
+                  f"{stats.get('bytes_before', 0) // 1024} KB -> {stats.get('bytes_after', 0) // 1024} KB")
+            return stats
+        except Exception as e:
+            print(f"Fout bij retentie: {e}")
+
     def run(self):
         """Start de tracking loop."""
         self.running = True
@@ -487,13 +756,16 @@ class EnhancedActivityTracker:
         print("Enhanced Activity Tracker Gestart")
         print("=" * 60)
         print(f"Platform: {SYSTEM}")
-        print(f"Logging naar: {ACTIVITY_LOG}")
+        print(f"Logging naar: {self.activity_log.path}")
         print(f"Interval: {self.config['interval_seconds']} seconden")
         print(f"Idle threshold: {self.config.get('idle_threshold_seconds', 300)} seconden")
         print(f"URL tracking: {'Aan' if self.config.get('track_urls', True) else 'Uit'}")
         print("=" * 60)
         print("Druk Ctrl+C om te stoppen\n")
 
+        if not self.rollups.exists():
+            rebuild_rollups(self.rollups, self.activity_log)
+
         try:
             while self.running:
                 self.track_once()
@@ -508,42 +780,74 @@ class EnhancedActivityTracker:
                 )
             print("\n" + "=" * 60)
             print("Tracker gestopt.")
-            print(f"Data opgeslagen in: {ACTIVITY_LOG}")
+            print(f"Data opgeslagen in: {self.activity_log.path}")
             print("=" * 60)
+        finally:
+            self.activity_log.flush()
 
     def stop(self):
-        """Stop de tracking loop."""
+        """Stop de tracking loop en schrijf gebufferde activiteiten weg."""
         self.running = False
+        self.flush()
+
+    def flush(self):
+        """Schrijf gebufferde activiteiten naar de log (bijv. voordat de UI leest)."""
+        self.activity_log.flush()
+
+
+def rollups_version(rollups, months=None):
+    """
+    Dataversie van de rollups voor de result cache: de schrijftellers van
+    de maanden van een periode, of (zonder maanden) de totale teller. De
+    config telt mee vanwege de regels.
+    """
+    return [file_version(CONFIG_FILE, rollups.directory / 'VERSION'), rollups.generation(months)]
 
 
-def get_daily_summary(date=None):
+def daily_totals(date, activity_log, rollups):
+    """Seconden per project, categorie en applicatie op één dag."""
+    # Tel op per project, categorie en applicatie (uit de dagtotalen als die er zijn)
+    def seconds_per(dimension, column):
+        if rollups.exists():
+            totals = rollups.day(date, dimension, sources=('auto',))
+            return {key: values[0] for key, values in totals.items() if values[0]}
+        return activity_log.aggregate(column, date, date)
+
+    by_project = {}
+    for project, seconds in seconds_per('project', 'Project').items():
+        project = project or 'Geen project'
+        by_project[project] = by_project.get(project, 0) + seconds
+
+    by_category = {}
+    for category, seconds in seconds_per('category', 'Categorie').items():
+        category = category or 'Overig'
+        by_category[category] = by_category.get(category, 0) + seconds
+
+    return by_project, by_category, seconds_per('app', 'Applicatie')
+
+
+def get_daily_summary(date=None, activity_log=None, rollups=None, cache=None):
     """Genereer uitgebreide samenvatting voor een specifieke dag."""
     if date is None:
         date = datetime.now().strftime('%Y-%m-%d')
 
-    if not ACTIVITY_LOG.exists():
+    if activity_log is None:
+        activity_log = open_activity_log()
+    if rollups is None:
+        rollups = DailyRollups(ROLLUPS_DIR)
+
+    if not activity_log.path.exists():
         print("Geen activity log gevonden.")
         return
 
-    # Lees en filter log
-    by_project = {}
-    by_category = {}
-    by_app = {}
-    total_seconds = 0
-
-    with open(ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f, delimiter=';')
-        for row in reader:
-            if row['Datum'] == date:
-                duration = int(row['Duur (sec)'])
-                project = row.get('Project', '') or 'Geen project'
-                category = row.get('Categorie', '') or 'Overig'
-                app = row['Applicatie']
-
-                by_project[project] = by_project.get(project, 0) + duration
-                by_category[category] = by_category.get(category, 0) + duration
-                by_app[app] = by_app.get(app, 0) + duration
-                total_seconds += duration
+    if cache is not None and rollups.exists():
+        by_project, by_category, by_app = cache.cached(
+            'daily_summary', [date], rollups_version(rollups, [date[:7]]),
+            lambda: daily_totals(date, activity_log, rollups)
+        )
+    else:
+        by_project, by_category, by_app = daily_totals(date, activity_log, rollups)
+    total_seconds = sum(by_app.values())
 
     # Print samenvatting
     print(f"\n{'=' * 60}")
@@ -584,6 +888,139 @@ def get_daily_summary(date=None):
     print(f"{'=' * 60}\n")
 
 
+def period_totals(start_date, end_date, rollups, sources=None):
+    """[{project: [seconden, uren, bedrag]}, [seconden, uren, bedrag]] over een periode."""
+    return [rollups.range_totals(start_date, end_date, sources),
+            rollups.range_total(start_date, end_date, sources)]
+
+
+def cached_period_totals(cache, rollups, start_date, end_date, sources=None):
+    """period_totals via de result cache."""
+    return cache.cached(
+        'period_totals', [start_date, end_date, sources], rollups_version(rollups),
+        lambda: period_totals(start_date, end_date, rollups, sources)
+    )
+
+
+def get_period_summary(start_date, end_date=None, activity_log=None, rollups=None, cache=None):
+    """
+    Uren en bedrag per project over een willekeurige periode (bijv. een
+    factuurperiode), auto-tracked en handmatig samen. Leest de Fenwick
+    index van de rollups, dus de lengte van de periode maakt niet uit.
+    """
+    end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+    label = f"{start_date or 'begin'} t/m {end_date}"
+    start_date = start_date or '0001-01-01'
+    if rollups is None:
+        rollups = DailyRollups(ROLLUPS_DIR)
+    if not rollups.exists():
+        rebuild_rollups(rollups, activity_log or open_activity_log())
+
+    if cache is not None:
+        per_project, total = cached_period_totals(cache, rollups, start_date, end_date)
+    else:
+        per_project, total = period_totals(start_date, end_date, rollups)
+
+    by_project = {}
+    for project, values in per_project.items():
+        totals = by_project.setdefault(project or 'Geen project', [0, 0, 0])
+        for i, value in enumerate(values):
+            totals[i] += value
+    total_seconds, total_hours, total_amount = total
+
+    print(f"\n{'=' * 60}")
+    print(f"SAMENVATTING - {label}")
+    print(f"{'=' * 60}\n")
+
+    if not total_hours:
+        print("Geen activiteiten gelogd.")
+        return
+
+    print("PER PROJECT:")
+    print("-" * 50)
+    for name, (_, hours, amount) in sorted(by_project.items(), key=lambda x: x[1][1], reverse=True):
+        percentage = (hours / total_hours) * 100
+        print(f"  {name:30} {hours:7.2f}u ({percentage:5.1f}%)  €{amount:9.2f}")
+
+    print(f"\n{'=' * 60}")
+    print(f"TOTAAL: {total_hours:.2f} uur  -  €{total_amount:.2f}")
+    print(f"{'=' * 60}\n")
+
+
+def get_analytics_summary(sketch, start_label, end_date, top=10, built=0):
+    """Print unieke sites en titels, top domeinen en sessieduur uit een (samengevoegde) DaySketch."""
+    print(f"\n{'='*60}")
+    print(f"ANALYSE - {start_label} t/m {end_date}")
+    print(f"{'='*60}")
+    if built:
+        print(f"({built} dag(en) opnieuw berekend)")
+
+    print(f"\nUnieke sites:  {sketch.hosts.count():>8}")
+    print(f"Unieke titels: {sketch.titles.count():>8}")
+
+    domains = sketch.domains.top(top)
+    if domains:
+        print(f"\nTOP {len(domains)} DOMEINEN (schatting):")
+        print("-" * 50)
+        for domain, seconds in domains:
+            print(f"  {domain[:35]:35} {seconds / 3600:7.2f}u")
+
+    sessions = sketch.sessions
+    if sessions.count():
+        print(f"\nSESSIEDUUR (zelfde app, max {SESSION_GAP}s pauze, {int(sessions.count())} sessies):")
+        print("-" * 50)
+        for label, q in (('mediaan', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            print(f"  {label:10} {sessions.quantile(q) / 60:8.1f} min")
+    print(f"\n{'='*60}\n")
+
+
+def get_overlap_report(entries, precedence, start_label, end_date, limit=50):
+    """Print entries die (deels) al door een bron met meer voorrang geteld worden."""
+    print(f"\n{'='*60}")
+    print(f"OVERLAP - {start_label} t/m {end_date} (voorrang: {' > '.join(precedence)})")
+    print(f"{'='*60}\n")
+
+    shown = 0
+    duplicated = {}
+    for entry, covered, sources in resolve(entries, precedence):
+        if not covered:
+            continue
+        duplicated[entry['source']] = duplicated.get(entry['source'], 0) + covered / 3600
+        if not limit or shown < limit:
+            print(f"  {entry['date']} {entry['start_time'][:5]:5}-{entry['end_time'][:5]:5} "
+                  f"{entry['source']:6} {entry['project'][:16]:16} {entry['description'][:30]:30} "
+                  f"{covered / 3600:5.2f}u ({', '.join(sources)})")
+        shown += 1
+
+    if not duplicated:
+        print("  Geen overlap gevonden.")
+    elif limit and shown > limit:
+        print(f"  ... en nog {shown - limit} entries")
+    for source, hours in sorted(duplicated.items()):
+        print(f"\nDubbel geteld ({source}): {hours:.2f} uur")
+    print(f"\n{'='*60}\n")
+
+
+def show_entries_at(repository, moment, precedence):
+    """Print de entries die op een moment liepen (en welke daarvan telt)."""
+    moment = datetime.strptime(moment, '%Y-%m-%d %H:%M')
+    # Ook de dag ervoor: entries over middernacht
+    previous = (moment - timedelta(days=1)).strftime('%Y-%m-%d')
+    index = IntervalIndex(repository.query(previous, moment.strftime('%Y-%m-%d'), order='asc'))
+    running = index.at(epoch_seconds(moment))
+    if not running:
+        print(f"Niets geregistreerd op {moment.strftime('%Y-%m-%d %H:%M')}")
+        return
+    rank = {source: i for i, source in enumerate(precedence)}
+    counted = min(rank.get(e['source'], len(precedence)) for e in running)
+    print(f"Op {moment.strftime('%Y-%m-%d %H:%M')}:")
+    for entry in running:
+        mark = '*' if rank.get(entry['source'], len(precedence)) == counted else ' '
+        print(f" {mark} {entry['start_time'][:5]:5}-{entry['end_time'][:5]:5} {entry['source']:6} "
+              f"{entry['project'][:20]:20} {entry['description'][:40]}")
+    print("(* = telt mee bij overlap)")
+
+
 def main():
     """Hoofdfunctie."""
     import argparse
@@ -597,6 +1034,10 @@ def main():
     # Summary command
     summary_parser = subparsers.add_parser('summary', help='Toon dagelijkse samenvatting')
     summary_parser.add_argument('--date', '-d', help='Datum (YYYY-MM-DD)', default=None)
+    summary_parser.add_argument('--from', dest='start_date', default=None,
+                                help='Totalen per project vanaf datum (YYYY-MM-DD)')
+    summary_parser.add_argument('--to', dest='end_date', default=None,
+                                help='Totalen per project t/m datum (YYYY-MM-DD)')
 
     # Add rule command
     rule_parser = subparsers.add_parser('add-rule', help='Voeg toewijzingsregel toe')
@@ -606,6 +1047,114 @@ def main():
     # List rules command
     list_parser = subparsers.add_parser('list-rules', help='Toon alle regels')
 
+    # Migratie naar SQLite
+    migrate_parser = subparsers.add_parser('migrate-sqlite', help='Migreer CSV log naar SQLite')
+    migrate_parser.add_argument('--source', '-s', help='CSV bestand (default: activity log)', default=None)
+
+    # Splits monolithische log in dag-partities
+    partition_parser = subparsers.add_parser('partition', help='Splits CSV log in dag-partities')
+    partition_parser.add_argument('--source', '-s', help='CSV bestand (default: activity log)', default=None)
+
+    # Dagtotalen opnieuw opbouwen
+    rollup_parser = subparsers.add_parser('rebuild-rollups', help='Bouw dagtotalen opnieuw op')
+    rollup_parser.add_argument('--check', action='store_true',
+                               help='Vergelijk bestaande dagtotalen met een volledige scan')
+
+    # Export naar CSV
+    export_parser = subparsers.add_parser('export-csv', help='Exporteer activity log naar CSV')
+    export_parser.add_argument('output', help='Doelbestand')
+    export_parser.add_argument('--from', dest='start', help='Vanaf datum (YYYY-MM-DD)', default=None)
+    export_parser.add_argument('--to', dest='end', help='Tot en met datum (YYYY-MM-DD)', default=None)
+
+    # Uren uit alle bronnen opvragen
+    entries_parser = subparsers.add_parser('entries', help='Toon geregistreerde uren (alle bronnen)')
+    entries_parser.add_argument('--from', dest='start', help='Vanaf datum (YYYY-MM-DD)', default=None)
+    entries_parser.add_argument('--to', dest='end', help='Tot en met datum (YYYY-MM-DD)', default=None)
+    entries_parser.add_argument('--project', '-p', action='append', help='Alleen dit project (herhaalbaar)')
+    entries_parser.add_argument('--source', action='append', choices=SOURCES,
+                                help='Alleen deze bron (herhaalbaar)')
+    entries_parser.add_argument('--limit', '-n', type=int, default=50, help='Maximaal aantal (0 = alles)')
+    entries_parser.add_argument('--oldest-first', action='store_true', help='Oudste eerst')
+
+    # Log compacteren
+    compact_parser = subparsers.add_parser('compact', help='Compacteer de activity log')
+    compact_parser.add_argument('--max-gap', type=int, default=None,
+                                help='Voeg rijen samen met maximaal zoveel seconden ertussen')
+
+    # Retentie: oude ruwe rijen terugbrengen naar uurtotalen
+    downsample_parser = subparsers.add_parser(
+        'downsample', help='Vervang oude ruwe rijen door uurtotalen per project/app'
+    )
+    downsample_parser.add_argument('--days', type=int, default=None,
+                                   help='Ruwe rijen bewaren voor zoveel dagen (default: retention_raw_days of 60)')
+
+    # Log roteren naar een gecomprimeerd segment
+    rotate_parser = subparsers.add_parser('rotate', help='Roteer de log naar een gecomprimeerd segment')
+    rotate_parser.add_argument('--compression', choices=['gzip', 'lzma'], default=None,
+                               help='Compressie (default: log_compression uit config)')
+
+    # Afgesloten maanden archiveren
+    archive_parser = subparsers.add_parser('archive', help='Archiveer afgesloten maanden')
+    archive_parser.add_argument('--month', '-m', help='Alleen deze maand (YYYY-MM)', default=None)
+    archive_parser.add_argument('--prune', action='store_true',
+                                help='Verwijder gearchiveerde maanden uit de gewone log')
+
+    # Uren uit andere bronnen importeren
+    import_parser = subparsers.add_parser(
+        'import', help='Importeer een CSV export, oude activity_log.csv of JSON van de browser app'
+    )
+    import_parser.add_argument('file', help='Bestand om te importeren')
+    import_parser.add_argument('--format', choices=['activity', 'timesheet', 'webapp'], default=None,
+                               help='Formaat (default: herkennen aan de inhoud)')
+    import_parser.add_argument('--batch', type=int, default=1000,
+                               help='Aantal rijen per keer wegschrijven')
+
+    # Logs van meerdere machines samenvoegen
+    merge_parser = subparsers.add_parser(
+        'merge', help='Voeg de logs van meerdere machines samen tot één chronologische log'
+    )
+    merge_parser.add_argument('inputs', nargs='+',
+                              help='CSV logs, segmenten (.csv.gz/.xz) of data mappen, één per machine')
+    merge_parser.add_argument('--output', '-o', required=True, help='Nieuwe log (mag nog niet bestaan)')
+
+    # Analyse van URLs, titels en sessies via sketches per dag
+    analytics_parser = subparsers.add_parser(
+        'analytics', help='Unieke sites, top domeinen en sessieduur over een periode'
+    )
+    analytics_parser.add_argument('--from', dest='start', help='Vanaf datum (YYYY-MM-DD)', default=None)
+    analytics_parser.add_argument('--to', dest='end', help='Tot en met datum (YYYY-MM-DD)', default=None)
+    analytics_parser.add_argument('--top', type=int, default=10, help='Aantal domeinen')
+    analytics_parser.add_argument('--include', action='append', default=[],
+                                  help='Sketches map van een andere machine meetellen (herhaalbaar)')
+
+    # Overlap tussen timer sessies, handmatige en auto-tracked uren
+    overlaps_parser = subparsers.add_parser(
+        'overlaps', help='Toon uren die door meerdere bronnen dubbel geteld worden'
+    )
+    overlaps_parser.add_argument('--from', dest='start', help='Vanaf datum (YYYY-MM-DD)', default=None)
+    overlaps_parser.add_argument('--to', dest='end', help='Tot en met datum (YYYY-MM-DD)', default=None)
+    overlaps_parser.add_argument('--precedence', default=None,
+                                 help='Voorrang van bronnen, bijv. manual,tray,auto (default: config)')
+    overlaps_parser.add_argument('--at', default=None,
+                                 help='Wat liep er op dit moment? (YYYY-MM-DD HH:MM)')
+    overlaps_parser.add_argument('--limit', '-n', type=int, default=50,
+                                 help='Maximaal aantal getoonde entries (0 = alles)')
+
+    # Uren in bulk naar een ander project verplaatsen
+    reassign_parser = subparsers.add_parser(
+        'reassign', help='Verplaats auto-tracked uren in bulk naar een ander project'
+    )
+    reassign_parser.add_argument('project', help='Nieuw project')
+    reassign_parser.add_argument('--from', dest='start', help='Vanaf datum (YYYY-MM-DD)', default=None)
+    reassign_parser.add_argument('--to', dest='end', help='Tot en met datum (YYYY-MM-DD)', default=None)
+    reassign_parser.add_argument('--app', help='Alleen deze applicatie', default=None)
+    reassign_parser.add_argument('--host', help='Alleen URLs van deze host (bijv. github.com)', default=None)
+    reassign_parser.add_argument('--title', help='Alleen als de venstertitel dit bevat', default=None)
+    reassign_parser.add_argument('--current', help='Alleen rijen die nu op dit project staan', default=None)
+    reassign_parser.add_argument('--rate', type=float, default=None,
+                                 help='Uurtarief (default: tarief van het project in projects.json)')
+    reassign_parser.add_argument('--dry-run', action='store_true', help='Alleen tonen, niets wijzigen')
+
     args = parser.parse_args()
 
     tracker = EnhancedActivityTracker()
@@ -613,7 +1162,12 @@ def main():
     if args.command == 'start':
         tracker.run()
     elif args.command == 'summary':
-        get_daily_summary(args.date)
+        if args.start_date or args.end_date:
+            tracker.flush()
+            get_period_summary(args.start_date, args.end_date, tracker.activity_log,
+                               tracker.rollups, tracker.result_cache)
+        else:
+            get_daily_summary(args.date, tracker.activity_log, tracker.rollups, tracker.result_cache)
     elif args.command == 'add-rule':
         tracker.add_rule(args.pattern, args.project)
         print(f"Regel toegevoegd: '{args.pattern}' -> '{args.project}'")
@@ -623,10 +1177,230 @@ def main():
             print(f"  '{rule['pattern']}' -> '{rule['project']}'")
         if not tracker.config["rules"]:
             print("  (geen regels)")
+    elif args.command == 'migrate-sqlite':
+        source = Path(args.source) if args.source else ACTIVITY_LOG
+        if not source.exists():
+            print(f"Bestand niet gevonden: {source}")
+            return
+        store = SqliteActivityLog(ACTIVITY_DB)
+        if store.count() > 0:
+            print(f"Database bevat al data: {ACTIVITY_DB}")
+            return
+        tracker.activity_log.flush()
+        migrated = migrate_csv_to_sqlite(source, store)
+        store.close()
+        tracker.config["storage_backend"] = "sqlite"
+        tracker.save_config()
+        print(f"{migrated} activiteiten gemigreerd naar {ACTIVITY_DB}")
+        print("Storage backend ingesteld op 'sqlite'")
+    elif args.command == 'partition':
+        source = Path(args.source) if args.source else ACTIVITY_LOG
+        if not source.exists():
+            print(f"Bestand niet gevonden: {source}")
+            return
+        tracker.activity_log.flush()
+        converted = split_into_partitions(source, PartitionedCsvLog(ACTIVITY_PARTITIONS))
+        tracker.config["storage_backend"] = "partitioned"
+        tracker.save_config()
+        print(f"{converted} activiteiten verdeeld over partities in {ACTIVITY_PARTITIONS}")
+        print("Storage backend ingesteld op 'partitioned'")
+    elif args.command == 'rebuild-rollups':
+        if args.check:
+            import tempfile
+            with tempfile.TemporaryDirectory() as tmp:
+                expected = DailyRollups(tmp)
+                rebuild_rollups(expected, tracker.activity_log)
+                differences = compare_rollups(expected.snapshot(), tracker.rollups.snapshot())
+            for date, source, dimension, key, exp, act in differences[:50]:
+                print(f"  {date} {source:6} {dimension:8} {key[:30]:30} "
+                      f"verwacht {exp[1]:.2f}u, gevonden {act[1]:.2f}u")
+            print(f"{len(differences)} verschillen gevonden")
+        else:
+            rebuild_rollups(tracker.rollups, tracker.activity_log)
+            print(f"Dagtotalen opnieuw opgebouwd in {ROLLUPS_DIR}")
+    elif args.command == 'compact':
+        max_gap = args.max_gap
+        if max_gap is None:
+            max_gap = tracker.config.get("compact_max_gap_seconds", 60)
+        stats = tracker.activity_log.compact(max_gap)
+        if 'rows' in stats:
+            print(f"{stats['rows']} rijen gelezen, {stats['kept']} over "
+                  f"({stats['deleted']} verwijderd, {stats['coalesced']} samengevoegd, "
+                  f"{stats['reassigned']} van project gewijzigd)")
+        print(f"Grootte: {stats.get('bytes_before', 0) // 1024} KB -> "
+              f"{stats.get('bytes_after', 0) // 1024} KB")
+    elif args.command == 'downsample':
+        raw_days = args.days or tracker.config.get("retention_raw_days") or 60
+        stats = tracker.downsample(raw_days)
+        if stats is not None:
+            print(f"{stats['downsampled']} rijen samengevoegd tot {stats['synthetic']} uurrijen")
+    elif args.command == 'rotate':
+        if not hasattr(tracker.activity_log, 'rotate'):
+            print("Roteren kan alleen met de CSV opslag (storage_backend 'csv').")
+            return
+        compression = args.compression or tracker.config.get("log_compression", "gzip")
+        segment = tracker.activity_log.rotate(compression)
+        if segment:
+            print(f"Log geroteerd naar {segment} ({segment.stat().st_size // 1024} KB)")
+        else:
+            print("Log is leeg, niets te roteren.")
+    elif args.command == 'archive':
+        archive = tracker.activity_log.archive
+        tracker.activity_log.flush()
+        if args.month:
+            if args.month >= datetime.now().strftime('%Y-%m'):
+                print(f"{args.month} is nog niet afgesloten.")
+                return
+            months = [args.month]
+        else:
+            # Met --prune ook gearchiveerde maanden die nog rijen in de log hebben
+            months = [m for m in closed_months(tracker.activity_log)
+                      if args.prune or m not in archive.months()]
+        if not months:
+            print("Geen maanden om te archiveren.")
+        for month in months:
+            try:
+                count = archive_month(tracker.activity_log, archive, month, prune=args.prune)
+            except ValueError as e:
+                print(e)
+                continue
+            size = archive.month_path(month).stat().st_size
+            print(f"{month}: {count} activiteiten gearchiveerd ({size // 1024} KB)"
+                  + (", verwijderd uit de log" if args.prune else ""))
+    elif args.command == 'entries':
+        tracker.activity_log.flush()
+        repository = open_entry_repository(tracker.activity_log)
+        entries = repository.query(args.start, args.end, projects=args.project,
+                                   sources=args.source, limit=args.limit or None,
+                                   order='asc' if args.oldest_first else 'desc')
+        for entry in entries:
+            print(f"  {entry['date']} {entry['start_time'][:5]:5} {entry['hours']:6.2f}u "
+                  f"{entry['source']:6} {entry['project'][:20]:20} {entry['description'][:40]}")
+        print(f"{len(entries)} entries, totaal {sum(e['hours'] for e in entries):.2f} uur")
+    elif args.command == 'import':
+        source = Path(args.file)
+        if not source.exists():
+            print(f"Bestand niet gevonden: {source}")
+            return
+        kind = args.format or detect_format(source)
+        tracker.activity_log.flush()
+        rates = {p['name']: p.get('rate', 0) for p in _load_json_list(PROJECTS_FILE)}
+        projects = {}  # projecten uit de JSON van de browser app (id -> project)
+
+        def rate(project):
+            if project not in rates:
+                rates[project] = next((p.get('rate', 0) for p in projects.values()
+                                       if p['name'] == project), 0)
+            return rates[project]
+
+        importer = Importer(
+            tracker.activity_log, JsonEntrySource('manual', MANUAL_ENTRIES_FILE, manual_entry),
+            tracker.rollups, rate=rate,
+            manual_rollup=lambda entry: manual_rollup_record(entry, rate(entry['project'])),
+            batch_size=args.batch
+        )
+        print(f"Importeren van {source} ({kind})...")
+        try:
+            stats = importer.run(source, kind, projects)
+        except ValueError as e:
+            print(f"Fout bij importeren: {e}")
+            return
+        added = add_projects(PROJECTS_FILE, projects)
+        if stats['imported']:
+            tracker.result_cache.invalidate()
+            if kind == 'activity':
+                # Geïmporteerde oude rijen meenemen bij de volgende retentie-ronde
+                save_retention_state({})
+        print(f"{stats['read']} rijen gelezen in {stats['seconds']:.1f}s "
+              f"({stats['read'] / max(stats['seconds'], 1e-9):.0f} rijen/s)")
+        print(f"  {stats['imported']} geïmporteerd ({stats['hours']:.2f} uur), "
+              f"{stats['duplicates']} al aanwezig, {stats['invalid']} ongeldig")
+        if stats['archived']:
+            print(f"  {stats['archived']} overgeslagen (maand staat in het archief)")
+        if stats['segments']:
+            print(f"  oudere rijen toegevoegd als {stats['segments']} gecomprimeerd(e) segment(en)")
+        if added:
+            print(f"  {added} project(en) toegevoegd aan {PROJECTS_FILE.name}")
+    elif args.command == 'merge':
+        tracker.activity_log.flush()
+        try:
+            stats = merge_logs(args.inputs, args.output)
+        except FileExistsError:
+            print(f"Bestand bestaat al: {args.output}")
+            return
+        except FileNotFoundError as e:
+            print(f"Bestand niet gevonden: {e}")
+            return
+        print(f"{stats['rows']} rijen uit {stats['inputs']} logs ({stats['runs']} delen) "
+              f"samengevoegd tot {stats['kept']} rijen in {args.output}")
+        print(f"  {stats['trimmed']} ingekort en {stats['dropped']} vervallen door overlap "
+              f"({stats['overlap_seconds'] / 3600:.2f} uur dubbel gelogd)")
+    elif args.command == 'analytics':
+        tracker.flush()
+        start = args.start or '0001-01-01'
+        end = args.end or datetime.now().strftime('%Y-%m-%d')
+        store = SketchStore(SKETCHES_DIR)
+        built = update_sketches(store, tracker.activity_log, tracker.rollups, start, end)
+        sketch = store.merged(start, end)
+        for directory in args.include:
+            SketchStore(directory).merged(start, end, into=sketch)
+        get_analytics_summary(sketch, args.start or 'begin', end, args.top, built)
+    elif args.command == 'overlaps':
+        tracker.activity_log.flush()
+        repository = open_entry_repository(tracker.activity_log)
+        precedence = (args.precedence.split(',') if args.precedence
+                      else tracker.config.get("overlap_precedence") or ['manual', 'tray', 'auto'])
+        if args.at:
+            show_entries_at(repository, args.at, precedence)
+        else:
+            end = args.end or datetime.now().strftime('%Y-%m-%d')
+            get_overlap_report(repository.query(args.start, end, order='asc'), precedence,
+                               args.start or 'begin', end, args.limit)
+    elif args.command == 'reassign':
+        if not any((args.start, args.end, args.app, args.host, args.title, args.current)):
+            print("Geef minstens één filter op (--from, --to, --app, --host, --title of --current)")
+            return
+        rate = args.rate
+        if rate is None:
+            rate = next((p.get('rate', 0) for p in _load_json_list(PROJECTS_FILE)
+                         if p['name'] == args.project), None)
+            if rate is None:
+                print(f"Project '{args.project}' staat niet in {PROJECTS_FILE.name}; tarief blijft ongewijzigd")
+        tracker.activity_log.flush()
+        stats = bulk_reassign(
+            tracker.activity_log, args.project, rate, args.start, args.end,
+            matches=row_filter(args.app, args.host, args.title, args.current),
+            rollups=tracker.rollups, dry_run=args.dry_run
+        )
+        if not args.dry_run and stats['rows']:
+            tracker.result_cache.invalidate()
+        verb = "zouden worden" if args.dry_run else "zijn"
+        print(f"{stats['rows']} rijen ({stats['hours']:.2f} uur) {verb} verplaatst naar {args.project}")
+        for project, hours in sorted(stats['projects'].items(), key=lambda item: -item[1]):
+            print(f"  van {project or '(geen project)'}: {hours:.2f} uur")
+        if stats['rows']:
+            print(f"  Bedrag: €{stats['amount_before']:.2f} -> €{stats['amount_after']:.2f}")
+
+    elif args.command == 'export-csv':
+        tracker.flush()
+        exported = export_to_csv(tracker.activity_log, args.output, args.start, args.end)
+        print(f"{exported} activiteiten geëxporteerd naar {args.output}")
+        if tracker.rollups.exists():
+            _, (_, hours, amount) = cached_period_totals(
+                tracker.result_cache, tracker.rollups,
+                args.start or '0001-01-01', args.end or datetime.now().strftime('%Y-%m-%d'), ['auto']
+            )
+        else:
+            # Zonder dagtotalen: de log zelf (parallel) optellen
+            totals = tracker.activity_log.totals((), ('Duur (uren)', 'Bedrag'), args.start, args.end)
+            hours, amount = totals.get((), (0, 0))
+        print(f"Totaal: {hours:.2f} uur - €{amount:.2f}")
     else:
         # Default: start tracking
         tracker.run()
 
 
 if __name__ == "__main__":
+    # Nodig voor de worker processen van de parallelle lezer in de gebouwde app
+    multiprocessing.freeze_support()
     main()
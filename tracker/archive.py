@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+Kolom-archief voor afgesloten maanden
+
+Oude maanden veranderen (bijna) nooit meer, maar jaaroverzichten en exports
+over lange periodes parsen anders elke keer miljoenen CSV regels. Daarom
+kan een afgesloten maand worden weggeschreven als één binair bestand met
+vaste-breedte kolommen (<map>/2026-09.arch):
+
+    TTARCH1\\n | uint32 lengte | JSON header | kolommen (8-byte uitgelijnd)
+
+De header bevat het aantal rijen, de positie van elke kolom en de string
+tabellen; tekstkolommen (project, app, titel, ...) zijn opgeslagen als
+index in hun string tabel. Lezers mmap'en het bestand en tellen direct op
+uit de kolommen, zonder tekst te parsen.
+"""
+
+import array
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from activity_store import (
+    DETAILED_FIELDS, EPOCH_FIELD, apply_reassign, downsample_rows, merge_totals, path_lock,
+    reassign_record, sum_rows, to_epoch, from_epoch, unscaled_totals
+)
+
+MAGIC = b'TTARCH1\n'
+
+# Numerieke kolommen: (naam, array type)
+NUMERIC_COLUMNS = [
+    ('start', 'q'),      # starttijd in seconden sinds 1970 (lokale tijd)
+    ('end', 'q'),        # eindtijd idem
+    ('duration', 'i'),   # Duur (sec)
+    ('hours', 'd'),      # Duur (uren)
+    ('rate', 'd'),       # Tarief
+    ('amount', 'd'),     # Bedrag
+    ('idle', 'B'),       # Was Idle (1 = Ja)
+]
+
+# Tekstkolommen (index in string tabel): naam -> CSV kolom
+STRING_COLUMNS = {
+    'app': 'Applicatie',
+    'title': 'Venstertitel',
+    'url': 'URL',
+    'category': 'Categorie',
+    'email_subject': 'Email Subject',
+    'email_from': 'Email Van',
+    'project': 'Project',
+}
+
+# Numerieke CSV kolommen die direct opgeteld kunnen worden
+VALUE_COLUMNS = {'Duur (sec)': 'duration', 'Duur (uren)': 'hours',
+                 'Tarief': 'rate', 'Bedrag': 'amount'}
+
+# Alle kolommen die een archief bewaart (om een maand te herschrijven)
+ARCHIVE_FIELDS = ['Datum', 'Starttijd', 'Eindtijd'] + list(VALUE_COLUMNS) + \
+    ['Was Idle'] + list(STRING_COLUMNS.values()) + ['ID']
+
+ID_WIDTH = 16
+
+def _number(value, default=0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class MonthArchive:
+    """Eén gemmapt archiefbestand (één maand)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Geen archiefbestand: {self.path}")
+        header_len = struct.unpack_from('<I', self._data, len(MAGIC))[0]
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._data[start:start + header_len])
+        self.rows = self.header['rows']
+        self.strings = self.header['strings']
+        self._columns = {}
+
+    def column(self, name):
+        """Kolom als memoryview (zero-copy) of array (andere byte order)."""
+        if name not in self._columns:
+            kind, offset, size = self.header['columns'][name]
+            view = memoryview(self._data)[offset:offset + size]
+            if kind == 'id':
+                column = view
+            elif self.header['byteorder'] == sys.byteorder:
+                column = view.cast(kind)
+            else:
+                column = array.array(kind, view)
+                column.byteswap()
+            self._columns[name] = column
+        return self._columns[name]
+
+    def row_id(self, index):
+        ids = self.column('id')
+        return bytes(ids[index * ID_WIDTH:(index + 1) * ID_WIDTH]).rstrip(b'\0').decode('ascii')
+
+    def index_range(self, start_date=None, end_date=None):
+        """Rij-indexen [begin, eind) binnen de periode (rijen staan op starttijd)."""
+        starts = self.column('start')
+        begin, end = 0, self.rows
+        if start_date:
+            begin = bisect.bisect_left(starts, to_epoch(start_date, '00:00:00'))
+        if end_date:
+            end = bisect.bisect_left(starts, to_epoch(end_date, '00:00:00') + 86400)
+        return begin, max(begin, end)
+
+    def getter(self, field):
+        """Functie index -> waarde (als tekst, zoals in de CSV) voor een CSV kolom."""
+        if field in ('Datum', 'Starttijd', 'Eindtijd'):
+            column = self.column('end' if field == 'Eindtijd' else 'start')
+            fmt = '%Y-%m-%d' if field == 'Datum' else '%H:%M:%S'
+            return lambda i: from_epoch(column[i]).strftime(fmt)
+        if field in VALUE_COLUMNS:
+            column = self.column(VALUE_COLUMNS[field])
+            return lambda i: str(column[i])
+        if field == 'Was Idle':
+            column = self.column('idle')
+            return lambda i: 'Ja' if column[i] else 'Nee'
+        if field == 'ID':
+            return self.row_id
+        for name, string_field in STRING_COLUMNS.items():
+            if string_field == field:
+                column, table = self.column(name), self.strings[name]
+                return lambda i: table[column[i]]
+        return lambda i: ''
+
+    def row(self, index, fields):
+        """Rij als dict met dezelfde kolommen als de CSV log."""
+        start = from_epoch(self.column('start')[index])
+        end = from_epoch(self.column('end')[index])
+        row = {
+            'Datum': start.strftime('%Y-%m-%d'),
+            'Starttijd': start.strftime('%H:%M:%S'),
+            'Eindtijd': end.strftime('%H:%M:%S'),
+            'Duur (sec)': str(self.column('duration')[index]),
+            'Duur (uren)': str(self.column('hours')[index]),
+            'Tarief': str(self.column('rate')[index]),
+            'Bedrag': str(self.column('amount')[index]),
+            'Was Idle': 'Ja' if self.column('idle')[index] else 'Nee',
+        }
+        for name, field in STRING_COLUMNS.items():
+            row[field] = self.strings[name][self.column(name)[index]]
+        row = {field: row.get(field, '') for field in fields if field != 'ID'}
+        row['ID'] = self.row_id(index)
+        return row
+
+    def close(self):
+        self._columns = {}
+        try:
+            self._data.close()
+        except BufferError:
+            # Er zijn nog views in gebruik; de GC ruimt de mmap later op
+            pass
+        self._file.close()
+
+
+def write_month(path, rows):
+    """
+    Schrijf rijen (dicts met CSV kolommen, chronologisch) als archiefbestand.
+    Atomisch via een tijdelijk bestand. Retourneert het aantal rijen.
+    """
+    path = Path(path)
+    numeric = {name: array.array(kind) for name, kind in NUMERIC_COLUMNS}
+    strings = {name: array.array('I') for name in STRING_COLUMNS}
+    tables = {name: {} for name in STRING_COLUMNS}
+    ids = bytearray()
+    count = 0
+
+    for row in rows:
+        if row.get(EPOCH_FIELD):
+            start = int(row[EPOCH_FIELD])
+            end = start + int(_number(row.get('Duur (sec)')))
+        else:
+            start = to_epoch(row['Datum'], row.get('Starttijd', ''))
+            end = to_epoch(row['Datum'], row.get('Eindtijd', '') or row.get('Starttijd', ''))
+            if end < start:
+                end += 86400  # over middernacht
+        numeric['start'].append(start)
+        numeric['end'].append(end)
+        numeric['duration'].append(int(_number(row.get('Duur (sec)'))))
+        numeric['hours'].append(_number(row.get('Duur (uren)')))
+        numeric['rate'].append(_number(row.get('Tarief')))
+        numeric['amount'].append(_number(row.get('Bedrag')))
+        numeric['idle'].append(1 if row.get('Was Idle') == 'Ja' else 0)
+        for name, field in STRING_COLUMNS.items():
+            value = str(row.get(field, '') or '')
+            table = tables[name]
+            if value not in table:
+                table[value] = len(table)
+            strings[name].append(table[value])
+        ids += str(row.get('ID', '')).encode('ascii')[:ID_WIDTH].ljust(ID_WIDTH, b'\0')
+        count += 1
+
+    # Lezers zoeken met bisect op starttijd, dus de rijen moeten gesorteerd zijn
+    starts = numeric['start']
+    if any(starts[i] > starts[i + 1] for i in range(count - 1)):
+        order = sorted(range(count), key=starts.__getitem__)
+        for columns in (numeric, strings):
+            for name, column in columns.items():
+                columns[name] = array.array(column.typecode, (column[i] for i in order))
+        ids = b''.join(ids[i * ID_WIDTH:(i + 1) * ID_WIDTH] for i in order)
+
+    blobs = [(name, kind, numeric[name].tobytes()) for name, kind in NUMERIC_COLUMNS]
+    blobs += [(name, 'I', strings[name].tobytes()) for name in STRING_COLUMNS]
+    blobs.append(('id', 'id', bytes(ids)))
+
+    def header_bytes(base):
+        columns, offset = {}, base
+        for name, kind, blob in blobs:
+            columns[name] = [kind, offset, len(blob)]
+            offset += len(blob) + (-len(blob) % 8)
+        header = {
+            'version': 1,
+            'rows': count,
+            'byteorder': sys.byteorder,
+            'columns': columns,
+            'strings': {name: list(table) for name, table in tables.items()},
+        }
+        return json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    # Kolommen beginnen na de header; de lengte van de header hangt van die
+    # offsets af, dus reken tot hij stabiel is
+    base = 0
+    while True:
+        encoded = header_bytes(base)
+        needed = len(MAGIC) + 4 + len(encoded)
+        needed += -needed % 8
+        if needed == base:
+            break
+        base = needed
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(encoded)))
+        f.write(encoded)
+        f.write(b'\0' * (base - f.tell()))
+        for _, _, blob in blobs:
+            f.write(blob)
+            f.write(b'\0' * (-len(blob) % 8))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+class ColumnarArchive:
+    """Map met één archiefbestand per afgesloten maand."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._open = {}  # maand -> (mtime_ns, size, MonthArchive)
+
+    def month_path(self, month):
+        return self.directory / f"{month}.arch"
+
+    def months(self):
+        """Gearchiveerde maanden (YYYY-MM), op volgorde."""
+        if not self.directory.exists():
+            return []
+        return sorted(path.stem for path in self.directory.glob('*.arch'))
+
+    def month(self, month):
+        """Open (gecached zolang het bestand niet wijzigt) het archief van een maand."""
+        stat = self.month_path(month).stat()
+        cached = self._open.get(month)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        if cached:
+            cached[2].close()
+        archive = MonthArchive(self.month_path(month))
+        self._open[month] = (stat.st_mtime_ns, stat.st_size, archive)
+        return archive
+
+    def write(self, month, rows):
+        """Archiveer de rijen van een maand."""
+        with path_lock(self.directory):
+            return write_month(self.month_path(month), rows)
+
+    def rows(self, month, start_date=None, end_date=None, fields=None):
+        """Itereer over de rijen van een gearchiveerde maand binnen de periode."""
+        archive = self.month(month)
+        begin, end = archive.index_range(start_date, end_date)
+        fields = fields or ['Datum'] + list(VALUE_COLUMNS) + list(STRING_COLUMNS.values())
+        for index in range(begin, end):
+            yield archive.row(index, fields)
+
+    def select(self, month, columns, start_date=None, end_date=None):
+        """Alleen de gevraagde kolommen als tuples, direct uit de kolommen."""
+        archive = self.month(month)
+        begin, end = archive.index_range(start_date, end_date)
+        getters = [archive.getter(column) for column in columns]
+        for index in range(begin, end):
+            yield tuple(get(index) for get in getters)
+
+    def aggregate(self, month, group_by, start_date=None, end_date=None, value='Duur (sec)'):
+        """Tel een kolom op per waarde van group_by, direct uit de kolommen."""
+        archive = self.month(month)
+        begin, end = archive.index_range(start_date, end_date)
+        values = archive.column(VALUE_COLUMNS[value])[begin:end]
+
+        if group_by == 'Datum':
+            # Rijen staan op starttijd: per dag is één aaneengesloten blok
+            starts = archive.column('start')
+            totals = {}
+            for index, amount in zip(range(begin, end), values):
+                key = from_epoch(starts[index] - starts[index] % 86400).strftime('%Y-%m-%d')
+                totals[key] = totals.get(key, 0) + amount
+            return totals
+
+        name = {field: name for name, field in STRING_COLUMNS.items()}[group_by]
+        keys = archive.column(name)[begin:end]
+        sums = [0] * len(archive.strings[name])
+        for key, amount in zip(keys, values):
+            sums[key] += amount
+        table = archive.strings[name]
+        return {table[i]: sums[i] for i in set(keys)}
+
+    def _find_ids(self, month, ids):
+        """De IDs uit ids die in een gearchiveerde maand voorkomen."""
+        data = bytes(self.month(month).column('id'))
+        hits = set()
+        for row_id in ids:
+            needle = row_id.encode('ascii')[:ID_WIDTH].ljust(ID_WIDTH, b'\0')
+            position = data.find(needle)
+            while position != -1 and position % ID_WIDTH:
+                position = data.find(needle, position + 1)
+            if position != -1:
+                hits.add(row_id)
+        return hits
+
+    def _rewrite(self, ids, change):
+        """
+        Herschrijf de maanden met rijen uit ids; change(rij) geeft de nieuwe
+        rij of None om hem weg te laten. Retourneert de gevonden IDs.
+        """
+        ids = {str(i) for i in ids}
+        found = set()
+        for month in self.months():
+            hits = self._find_ids(month, ids - found)
+            if not hits:
+                continue
+            rows = (change(row) if row['ID'] in hits else row
+                    for row in self.rows(month, fields=ARCHIVE_FIELDS))
+            self.write(month, [row for row in rows if row is not None])
+            found |= hits
+        return found
+
+    def delete(self, ids):
+        """
+        Verwijder rijen uit gearchiveerde maanden (herschrijft alleen de
+        betrokken maanden). Retourneert de IDs die gevonden zijn.
+        """
+        return self._rewrite(ids, lambda row: None)
+
+    def reassign(self, ids, project, rate=None):
+        """
+        Zet rijen in gearchiveerde maanden op een ander project (herschrijft
+        alleen de betrokken maanden). Retourneert de IDs die gevonden zijn.
+        """
+        record = reassign_record(None, project, rate)
+        return self._rewrite(ids, lambda row: apply_reassign(row, record))
+
+
+class ArchivedActivityLog:
+    """
+    Activity log met archief: gearchiveerde maanden worden uit het archief
+    gelezen, de rest uit de gewone log. Schrijven gaat altijd naar de
+    gewone log.
+    """
+
+    def __init__(self, log, archive):
+        self.log = log
+        self.archive = archive
+
+    def __getattr__(self, name):
+        return getattr(self.log, name)
+
+    def _segments(self, start_date, end_date):
+        """
+        Deel een periode op in ('archive', maand) en ('log', start, eind)
+        stukken, op volgorde.
+        """
+        months = [m for m in self.archive.months()
+                  if (not start_date or m >= start_date[:7]) and (not end_date or m <= end_date[:7])]
+        segments = []
+        cursor = start_date
+        for month in months:
+            first_day = f"{month}-01"
+            if cursor is None or cursor < first_day:
+                previous_day = (datetime.strptime(first_day, '%Y-%m-%d') - timedelta(days=1))
+                segments.append(('log', cursor, previous_day.strftime('%Y-%m-%d')))
+            segments.append(('archive', month))
+            year, number = int(month[:4]), int(month[5:])
+            cursor = f"{year + number // 12:04d}-{number % 12 + 1:02d}-01"
+        if not months:
+            segments.append(('log', start_date, end_date))
+        elif end_date is None or cursor <= end_date:
+            segments.append(('log', cursor, end_date))
+        return segments
+
+    def rows(self, start_date=None, end_date=None):
+        """Itereer over rijen; gearchiveerde maanden komen uit het archief."""
+        for segment in self._segments(start_date, end_date):
+            if segment[0] == 'archive':
+                fields = getattr(self.log, 'fields', DETAILED_FIELDS)
+                yield from self.archive.rows(segment[1], start_date, end_date, fields)
+            else:
+                yield from self.log.rows(segment[1], segment[2])
+
+    def _archive_version(self):
+        """[maand, inode, mtime, grootte] van elk archiefbestand."""
+        version = []
+        for month in self.archive.months():
+            try:
+                stat = self.archive.month_path(month).stat()
+            except OSError:
+                continue
+            version.append([month, stat.st_ino, stat.st_mtime_ns, stat.st_size])
+        return version
+
+    def read_new(self, cursor=None):
+        """
+        read_new van de log (zie CsvActivityLog.read_new), aangevuld met het
+        archief: bij een reset, of als het archief gewijzigd is (archive,
+        prune, delete), komen eerst alle gearchiveerde rijen en daarna de
+        log. Rijen van de log in gearchiveerde maanden tellen niet mee,
+        net als in rows(). cursor is (archiefversie, cursor van de log).
+        """
+        version = self._archive_version()
+        archive_changed = cursor is None or cursor[0] != version
+        rows, log_cursor, reset, removed = self.log.read_new(None if archive_changed else cursor[1])
+        months = {month for month, *_ in version}
+        if months:
+            rows = [row for row in rows if str(row.get('Datum', ''))[:7] not in months]
+        if reset or archive_changed:
+            fields = getattr(self.log, 'fields', DETAILED_FIELDS)
+            archived = [row for month in sorted(months)
+                        for row in self.archive.rows(month, fields=fields)]
+            rows, reset, removed = archived + rows, True, set()
+        return rows, (version, log_cursor), reset, removed
+
+    def select(self, columns, start_date=None, end_date=None):
+        """Alleen de gevraagde kolommen als tuples (zie CsvActivityLog.select)."""
+        for segment in self._segments(start_date, end_date):
+            if segment[0] == 'archive':
+                yield from self.archive.select(segment[1], columns, start_date, end_date)
+            else:
+                yield from self.log.select(columns, segment[1], segment[2])
+
+    def aggregate(self, group_by, start_date=None, end_date=None, value='Duur (sec)'):
+        """Tel een kolom op per waarde van group_by."""
+        totals = {}
+        for segment in self._segments(start_date, end_date):
+            if segment[0] == 'archive':
+                part = self.archive.aggregate(segment[1], group_by, start_date, end_date, value)
+            else:
+                part = self.log.aggregate(group_by, segment[1], segment[2], value)
+            for key, amount in part.items():
+                totals[key] = totals.get(key, 0) + amount
+        return totals
+
+    def totals(self, group_by, values, start_date=None, end_date=None, workers=None):
+        """
+        Exacte sommen per combinatie van group_by (zie CsvActivityLog.totals);
+        het CSV deel wordt boven de drempel parallel geteld.
+        """
+        group_by, values = tuple(group_by), tuple(values)
+        totals = {}
+        for segment in self._segments(start_date, end_date):
+            if segment[0] == 'archive':
+                rows = self.archive.select(segment[1], group_by + values, start_date, end_date)
+                sum_rows(rows, len(group_by), totals)
+            elif hasattr(self.log, 'totals'):
+                merge_totals(totals, self.log.totals(group_by, values, segment[1], segment[2],
+                                                     workers, scaled=True))
+            else:
+                rows = self.log.select(group_by + values, segment[1], segment[2])
+                sum_rows(rows, len(group_by), totals)
+        return unscaled_totals(totals)
+
+    def downsample(self, before_date, since=None):
+        """
+        Retentie over archief en log: gearchiveerde maanden die (deels) vóór
+        before_date liggen worden herschreven met synthetische uurrijen.
+        """
+        stats = {'downsampled': 0, 'synthetic': 0, 'bytes_before': 0, 'bytes_after': 0}
+        fields = getattr(self.log, 'fields', DETAILED_FIELDS)
+        # Lezen en herschrijven van een maand onder de lock van het archief
+        # (ook tussen processen), zodat een andere herschrijving er niet tussen komt
+        with path_lock(self.archive.directory):
+            for month in self.archive.months():
+                if f"{month}-01" >= before_date or (since and month < since[:7]):
+                    continue
+                path = self.archive.month_path(month)
+                stats['bytes_before'] += path.stat().st_size
+                rows = list(downsample_rows(self.archive.rows(month, fields=fields), before_date, stats))
+                self.archive.write(month, rows)
+                stats['bytes_after'] += path.stat().st_size
+
+        for key, value in self.log.downsample(before_date, since).items():
+            stats[key] = stats.get(key, 0) + value
+        return stats
+
+    def delete(self, ids):
+        """Verwijder rijen uit archief en log (ongearchiveerde kopieën inbegrepen)."""
+        ids = list(ids)
+        found = self.archive.delete(ids)
+        deleted = self.log.delete(ids)
+        return max(deleted, len(found))
+
+    def reassign(self, ids, project, rate=None):
+        """Zet rijen in archief en log op een ander project."""
+        ids = list(ids)
+        found = self.archive.reassign(ids, project, rate)
+        changed = self.log.reassign(ids, project, rate)
+        return max(changed, len(found))
+
+
+def archive_month(log, archive, month, prune=False):
+    """
+    Archiveer één (afgesloten) maand uit de log. Controleert de totalen van
+    het archief tegen de gearchiveerde rijen voordat er met prune=True uit
+    de log verwijderd wordt. Is de maand al gearchiveerd, dan worden de
+    rijen die nog in de log staan aangevuld. Retourneert het aantal
+    gearchiveerde rijen.
+    """
+    start_date, end_date = f"{month}-01", f"{month}-31"
+    source = log.log if isinstance(log, ArchivedActivityLog) else log
+    expected = {}
+
+    def counted(rows):
+        # Totalen van precies de rijen die geschreven worden (een ander proces
+        # kan intussen rijen toevoegen, dus niet opnieuw uit de log tellen)
+        for row in rows:
+            key = row.get('Project', '') or ''
+            expected[key] = expected.get(key, 0) + _number(row.get('Duur (sec)'))
+            yield row
+
+    archived = []
+    if archive.month_path(month).exists():
+        # Eerder gearchiveerd: bijv. rijen die tijdens een prune nog in de log
+        # kwamen. Archief en log samenvoegen (op ID, chronologisch).
+        archived = list(archive.rows(month, fields=ARCHIVE_FIELDS))
+        current = list(source.rows(start_date, end_date))
+        known = {row.get('ID') for row in current}
+        rows = sorted(current + [row for row in archived if row['ID'] not in known],
+                      key=lambda row: (str(row.get('Datum', '')), str(row.get('Starttijd', ''))))
+    else:
+        rows = source.rows(start_date, end_date)
+    count = archive.write(month, counted(rows))
+
+    actual = archive.aggregate(month, 'Project')
+    for key in set(expected) | set(actual):
+        if abs(expected.get(key, 0) - actual.get(key, 0)) > 0.5:
+            if archived:
+                archive.write(month, archived)  # vorige versie terug
+            else:
+                archive.month_path(month).unlink()
+            raise ValueError(f"Archief van {month} klopt niet ({key}); niet gearchiveerd")
+
+    if prune:
+        # Alleen de gearchiveerde rijen: wat een ander proces intussen nog in
+        # deze maand heeft gezet blijft in de log tot de volgende archive --prune
+        ids = {row['ID'] for row in archive.rows(month, fields=['ID'])}
+        source.delete_range(start_date, end_date, ids=ids)
+    return count
+
+
+def closed_months(log, today=None):
+    """Maanden vóór de huidige maand waarvoor de log rijen heeft."""
+    current = (today or datetime.now().strftime('%Y-%m-%d'))[:7]
+    source = log.log if isinstance(log, ArchivedActivityLog) else log
+    months = set()
+    for row in source.rows(None, None):
+        month = str(row.get('Datum', ''))[:7]
+        if month < current:
+            months.add(month)
+    return sorted(months)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: csv.DictReader vs. de kolom-lezer (select) van de activity log
+
+Maakt een synthetische 15-koloms log aan in een tijdelijke map en meet hoe
+lang het duurt om uren per dag op te tellen (zoals update_stats) met:
+- csv.DictReader over het hele bestand (de oude manier)
+- CsvActivityLog.rows() (een dict per rij)
+- CsvActivityLog.select() (alleen Datum en Duur (uren) als tuple)
+- CsvActivityLog.totals() serieel en verdeeld over meerdere processen
+zowel over de hele log als over één maand.
+
+Gebruik:
+    python3 bench_reader.py --rows 500000
+"""
+
+import argparse
+import csv
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from activity_store import CsvActivityLog
+
+APPS = ['Google Chrome', 'Code', 'Slack', 'Mail', 'Terminal', 'Finder']
+PROJECTS = ['Klant A', 'Klant B', 'Intern', 'Auto']
+
+
+def generate_log(path, rows, seed=42):
+    """Schrijf een chronologische synthetische log met rows rijen."""
+    rng = random.Random(seed)
+    log = CsvActivityLog(path, flush_rows=5000)
+    moment = datetime(2024, 1, 1, 8, 0, 0)
+    for i in range(rows):
+        seconds = rng.randint(30, 300)
+        end = moment + timedelta(seconds=seconds)
+        app = rng.choice(APPS)
+        log.append({
+            'Datum': moment.strftime('%Y-%m-%d'),
+            'Starttijd': moment.strftime('%H:%M:%S'),
+            'Eindtijd': end.strftime('%H:%M:%S'),
+            'Duur (sec)': seconds,
+            'Duur (uren)': round(seconds / 3600, 2),
+            'Applicatie': app,
+            # Af en toe een titel met ; of quotes zodat ook het langzame pad meedoet
+            'Venstertitel': f'Document {i}; "concept"' if i % 50 == 0 else f'Document {i}',
+            'URL': f'https://example.com/{i % 1000}' if app == 'Google Chrome' else '',
+            'Categorie': 'Development' if app in ('Code', 'Terminal') else 'Overig',
+            'Project': rng.choice(PROJECTS),
+            'Tarief': 0,
+            'Bedrag': 0,
+            'Was Idle': 'Nee',
+        })
+        moment = end + timedelta(seconds=rng.randint(0, 30))
+        if moment.hour >= 18:
+            moment = (moment + timedelta(days=1)).replace(hour=8, minute=0, second=0)
+    log.close()
+    return moment.strftime('%Y-%m-%d')
+
+
+def per_day_dictreader(path, start_date=None, end_date=None):
+    totals = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            date = row['Datum']
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+            totals[date] = totals.get(date, 0) + float(row.get('Duur (uren)', 0) or 0)
+    return totals
+
+
+def per_day_rows(log, start_date=None, end_date=None):
+    totals = {}
+    for row in log.rows(start_date, end_date):
+        date = row['Datum']
+        totals[date] = totals.get(date, 0) + float(row.get('Duur (uren)', 0) or 0)
+    return totals
+
+
+def per_day_select(log, start_date=None, end_date=None):
+    totals = {}
+    for date, hours in log.select(('Datum', 'Duur (uren)'), start_date, end_date):
+        totals[date] = totals.get(date, 0) + float(hours or 0)
+    return totals
+
+
+def per_day_totals(log, start_date=None, end_date=None, workers=1):
+    totals = log.totals(('Datum',), ('Duur (uren)',), start_date, end_date, workers=workers)
+    return {key[0]: sums[0] for key, sums in totals.items()}
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:32} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark van de activity log lezers')
+    parser.add_argument('--rows', type=int, default=200000, help='Aantal synthetische rijen')
+    parser.add_argument('--workers', type=int, default=4, help='Processen voor de parallelle telling')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'activity_log_detailed.csv'
+        print(f"Synthetische log met {args.rows} rijen genereren...")
+        last_date = generate_log(path, args.rows)
+        print(f"Grootte: {path.stat().st_size / 1024 / 1024:.1f} MB (t/m {last_date})\n")
+
+        log = CsvActivityLog(path)
+        month_start = last_date[:7] + '-01'
+        periods = [("Hele log", (None, None)),
+                   (f"Eén maand ({last_date[:7]})", (month_start, last_date))]
+        for title, period in periods:
+            print(f"{title}:")
+            expected, base = timed('csv.DictReader', per_day_dictreader, path, *period)
+            rows_result, _ = timed('CsvActivityLog.rows()', per_day_rows, log, *period)
+            select_result, fast = timed('CsvActivityLog.select()', per_day_select, log, *period)
+            serial, _ = timed('totals() serieel', per_day_totals, log, *period)
+            parallel, _ = timed(f'totals() {args.workers} processen', per_day_totals, log,
+                                *period, args.workers)
+            for result in (rows_result, select_result, serial):
+                assert result.keys() == expected.keys()
+                assert all(abs(result[k] - expected[k]) < 1e-9 for k in expected)
+            # Serieel en parallel moeten exact gelijk zijn
+            assert parallel == serial
+            print(f"  {'versnelling select vs DictReader':32} {base / fast:9.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ hiddenimports = [
     'psutil',
     'json',
     'csv',
+    'sqlite3',
     'threading',
 ]
 
@@ -48,6 +49,16 @@ if is_macos:
 
 # Voeg de activity_tracker_enhanced.py toe als data
 datas += [('activity_tracker_enhanced.py', '.')]
+datas += [('activity_store.py', '.')]
+datas += [('rollups.py', '.')]
+datas += [('archive.py', '.')]
+datas += [('entry_repository.py', '.')]
+datas += [('result_cache.py', '.')]
+datas += [('importer.py', '.')]
+datas += [('merge.py', '.')]
+datas += [('sketches.py', '.')]
+datas += [('overlaps.py', '.')]
+datas += [('reassign.py', '.')]
 
 # Analyse
 a = Analysis(
@@ -45,6 +45,7 @@ from tkinter import messagebox, filedialog
 import json
 import csv
 import threading
+import multiprocessing
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -56,18 +57,21 @@ from activity_tracker_enhanced import (
     EnhancedActivityTracker,
     get_active_window_info_enhanced,
     get_idle_time,
-    ACTIVITY_LOG,
-    DATA_DIR
+    rebuild_rollups,
+    manual_rollup_record,
+    open_entry_repository,
+    rollups_version,
+    PROJECTS_FILE
 )
+from entry_repository import TRAY_ROLLUPS_DIR, tray_rollup_record
+from overlaps import duplicate_totals, resolved_entries
+from reassign import bulk_reassign, row_filter
+from rollups import DailyRollups
 
 # Thema instellen
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-# Data bestanden
-PROJECTS_FILE = DATA_DIR / "projects.json"
-MANUAL_ENTRIES_FILE = DATA_DIR / "manual_entries.json"
-
 
 class TimeTrackerApp(ctk.CTk):
     """Hoofdapplicatie voor tijdregistratie."""
@@ -82,12 +86,20 @@ class TimeTrackerApp(ctk.CTk):
 
         # Data
         self.projects = self.load_projects()
-        self.manual_entries = self.load_manual_entries()
         self.tracker = EnhancedActivityTracker()
+        self.activity_log = self.tracker.activity_log
+        self.rollups = self.tracker.rollups
+        self.result_cache = self.tracker.result_cache
+        # Alle uren (auto, handmatig, tray) via één repository
+        self.repository = open_entry_repository(self.activity_log, cached=True)
+        self.manual_entries = self.repository.source('manual')
+        if not self.rollups.exists():
+            rebuild_rollups(self.rollups, self.activity_log)
 
         # Tracking state
         self.tracking_active = False
         self.tracking_thread = None
+        self.auto_tracker = None
         self.current_activity = None
         self.session_start = None
 
@@ -129,20 +141,10 @@ class TimeTrackerApp(ctk.CTk):
         with open(PROJECTS_FILE, 'w', encoding='utf-8') as f:
             json.dump(self.projects, f, indent=2, ensure_ascii=False)
 
-    def load_manual_entries(self):
-        """Laad handmatige entries."""
-        if MANUAL_ENTRIES_FILE.exists():
-            try:
-                with open(MANUAL_ENTRIES_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
-
-    def save_manual_entries(self):
-        """Sla handmatige entries op."""
-        with open(MANUAL_ENTRIES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.manual_entries, f, indent=2, ensure_ascii=False)
+    def get_project_rate(self, project_name):
+        """Uurtarief van een project (0 als onbekend)."""
+        project = next((p for p in self.projects if p['name'] == project_name), None)
+        return project.get('rate', 0) if project else 0
 
     def create_widgets(self):
         """Maak alle UI elementen."""
@@ -441,6 +443,14 @@ class TimeTrackerApp(ctk.CTk):
         )
         self.delete_selected_btn.pack(side="left", padx=5)
 
+        reassign_btn = ctk.CTkButton(
+            btn_frame,
+            text="🔀 Verplaats",
+            command=self.reassign_dialog,
+            width=100
+        )
+        reassign_btn.pack(side="left", padx=5)
+
         self.export_selected_btn = ctk.CTkButton(
             btn_frame,
             text="📥 Export",
@@ -552,64 +562,25 @@ class TimeTrackerApp(ctk.CTk):
             if self.timer_project_var.get() == project["name"]:
                 self.timer_project_var.set("Selecteer project...")
 
+    def flush_activity_log(self):
+        """Schrijf gebufferde auto-tracking activiteiten weg voordat we lezen."""
+        if self.auto_tracker:
+            self.auto_tracker.flush()
+
     def update_entries_list(self):
         """Update de entries lijst met datum/tijd en checkboxes."""
+        self.flush_activity_log()
         for widget in self.entries_list.winfo_children():
             widget.destroy()
 
         self.entry_checkboxes = {}
-        self.all_entries_data = []
-
-        # Combineer auto-tracked en handmatige entries
-        all_entries = []
-        entry_id = 0
-
-        # Laad auto-tracked entries
-        if ACTIVITY_LOG.exists():
-            try:
-                with open(ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f, delimiter=';')
-                    for row in reader:
-                        all_entries.append({
-                            'id': f"auto_{entry_id}",
-                            'date': row['Datum'],
-                            'start_time': row.get('Starttijd', ''),
-                            'end_time': row.get('Eindtijd', ''),
-                            'hours': float(row.get('Duur (uren)', 0) or 0),
-                            'project': row.get('Project', '') or 'Auto',
-                            'description': f"{row.get('Applicatie', '')} - {row.get('Venstertitel', '')[:40]}",
-                            'source': 'auto',
-                            'category': row.get('Categorie', ''),
-                            'rate': float(row.get('Tarief', 0) or 0),
-                            'amount': float(row.get('Bedrag', 0) or 0),
-                            'raw_row': row
-                        })
-                        entry_id += 1
-            except Exception as e:
-                print(f"Error loading auto entries: {e}")
-
-        # Voeg handmatige entries toe
-        for entry in self.manual_entries:
-            all_entries.append({
-                'id': f"manual_{entry.get('id', entry_id)}",
-                'date': entry['date'],
-                'start_time': entry.get('start_time', ''),
-                'end_time': entry.get('end_time', ''),
-                'hours': float(entry['hours']),
-                'project': entry['project'],
-                'description': entry.get('description', ''),
-                'source': 'manual',
-                'entry_ref': entry
-            })
-            entry_id += 1
-
-        # Sorteer op datum en tijd (nieuwste eerst)
-        all_entries.sort(key=lambda x: (x['date'], x.get('start_time', '')), reverse=True)
 
+        # Laatste 100 entries van alle bronnen (nieuwste eerst); de bronnen
+        # zijn al gesorteerd en worden alleen samengevoegd
+        all_entries = self.repository.query(limit=100)
         self.all_entries_data = all_entries
 
-        # Toon laatste 100 entries
-        for entry in all_entries[:100]:
+        for entry in all_entries:
             self.create_entry_row(entry)
 
         if not all_entries:
@@ -696,7 +667,7 @@ class TimeTrackerApp(ctk.CTk):
         ).grid(row=0, column=6, padx=2, pady=4)
 
         # Source indicator
-        source_text = "🤖" if entry.get('source') == 'auto' else "✍️"
+        source_text = {"auto": "🤖", "tray": "⏱️"}.get(entry.get('source'), "✍️")
         ctk.CTkLabel(
             row,
             text=source_text,
@@ -732,49 +703,132 @@ class TimeTrackerApp(ctk.CTk):
         ):
             return
 
-        # Verwijder handmatige entries
-        manual_ids_to_delete = set()
+        # Werk de dagtotalen bij
+        tray_rollups = None
         for entry in selected:
-            if entry['source'] == 'manual' and 'entry_ref' in entry:
-                manual_ids_to_delete.add(entry['entry_ref'].get('id'))
+            if entry['source'] == 'manual':
+                self.rollups.remove(*manual_rollup_record(
+                    entry['entry_ref'], self.get_project_rate(entry['project'])
+                ))
+            elif entry['source'] == 'tray':
+                tray_rollups = tray_rollups or DailyRollups(TRAY_ROLLUPS_DIR)
+                if tray_rollups.exists():
+                    tray_rollups.remove(*tray_rollup_record(entry['entry_ref']))
+            elif entry['source'] == 'auto':
+                row = entry['raw_row']
+                self.rollups.remove(
+                    row['Datum'], 'auto',
+                    row.get('Project', ''), row.get('Categorie', ''), row.get('Applicatie', ''),
+                    float(row.get('Duur (sec)', 0) or 0), entry['hours'], entry['amount']
+                )
 
-        if manual_ids_to_delete:
-            self.manual_entries = [
-                e for e in self.manual_entries
-                if e.get('id') not in manual_ids_to_delete
-            ]
-            self.save_manual_entries()
+        # Verwijder uit de bronnen (auto entries via tombstones in de log)
+        self.repository.delete(selected)
+        self.result_cache.invalidate()
 
-        # Verwijder auto entries uit CSV
-        auto_entries_to_keep = []
-        auto_deleted = 0
-        for entry in selected:
-            if entry['source'] == 'auto':
-                auto_deleted += 1
+        messagebox.showinfo("Verwijderd", f"{len(selected)} entries verwijderd.")
+        self.update_entries_list()
+        self.update_stats()
 
-        if auto_deleted > 0 and ACTIVITY_LOG.exists():
-            # Lees alle regels behalve de geselecteerde
-            selected_auto_ids = {e['id'] for e in selected if e['source'] == 'auto'}
-            try:
-                with open(ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f, delimiter=';')
-                    fieldnames = reader.fieldnames
-                    rows_to_keep = []
-                    row_id = 0
-                    for row in reader:
-                        if f"auto_{row_id}" not in selected_auto_ids:
-                            rows_to_keep.append(row)
-                        row_id += 1
-
-                # Schrijf terug
-                with open(ACTIVITY_LOG, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';')
-                    writer.writeheader()
-                    writer.writerows(rows_to_keep)
-            except Exception as e:
-                print(f"Error deleting auto entries: {e}")
+    def reassign_dialog(self):
+        """Dialoog om auto-tracked uren in bulk naar een ander project te verplaatsen."""
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Uren verplaatsen")
+        dialog.transient(self)
 
-        messagebox.showinfo("Verwijderd", f"{len(selected)} entries verwijderd.")
+        ctk.CTkLabel(
+            dialog,
+            text="Verplaats alle auto-tracked uren die voldoen aan:",
+            font=ctk.CTkFont(size=13, weight="bold")
+        ).grid(row=0, column=0, columnspan=2, padx=15, pady=(15, 10), sticky="w")
+
+        fields = {}
+        month_start = datetime.now().strftime('%Y-%m-01')
+        for row, (key, label, placeholder, default) in enumerate([
+            ('start', "Van:", "YYYY-MM-DD", month_start),
+            ('end', "Tot en met:", "YYYY-MM-DD", datetime.now().strftime('%Y-%m-%d')),
+            ('app', "Applicatie:", "bijv. Google Chrome", ''),
+            ('host', "URL host:", "bijv. github.com", ''),
+            ('title', "Titel bevat:", "bijv. Pull request", ''),
+        ], start=1):
+            ctk.CTkLabel(dialog, text=label).grid(row=row, column=0, padx=(15, 5), pady=4, sticky="w")
+            fields[key] = ctk.CTkEntry(dialog, width=220, placeholder_text=placeholder)
+            fields[key].grid(row=row, column=1, padx=(5, 15), pady=4)
+            if default:
+                fields[key].insert(0, default)
+
+        project_names = [p["name"] for p in self.projects]
+        ctk.CTkLabel(dialog, text="Nu op project:").grid(row=6, column=0, padx=(15, 5), pady=4, sticky="w")
+        fields['current'] = ctk.CTkComboBox(dialog, values=[''] + project_names, width=220)
+        fields['current'].set('')
+        fields['current'].grid(row=6, column=1, padx=(5, 15), pady=4)
+
+        ctk.CTkLabel(dialog, text="Naar project:").grid(row=7, column=0, padx=(15, 5), pady=4, sticky="w")
+        fields['project'] = ctk.CTkComboBox(dialog, values=project_names, width=220)
+        fields['project'].grid(row=7, column=1, padx=(5, 15), pady=4)
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.grid(row=8, column=0, columnspan=2, pady=15)
+        ctk.CTkButton(
+            btn_frame,
+            text="Verplaatsen",
+            command=lambda: self.reassign_entries(dialog, {k: f.get().strip() for k, f in fields.items()}),
+            width=110
+        ).pack(side="left", padx=5)
+        ctk.CTkButton(
+            btn_frame,
+            text="Annuleren",
+            command=dialog.destroy,
+            width=100,
+            fg_color="gray"
+        ).pack(side="left", padx=5)
+
+    def reassign_entries(self, dialog, values):
+        """Verplaats de rijen die aan het filter voldoen (na bevestiging)."""
+        project = values['project']
+        if not project:
+            messagebox.showwarning("Waarschuwing", "Kies het project waar de uren naartoe gaan.", parent=dialog)
+            return
+        if not any(values[key] for key in ('start', 'end', 'app', 'host', 'title', 'current')):
+            messagebox.showwarning("Waarschuwing", "Vul minstens één filter in.", parent=dialog)
+            return
+
+        self.flush_activity_log()
+        rate = self.get_project_rate(project)
+        options = dict(
+            start_date=values['start'] or None, end_date=values['end'] or None,
+            matches=row_filter(values['app'], values['host'], values['title'], values['current']),
+            rollups=self.rollups
+        )
+        try:
+            preview = bulk_reassign(self.activity_log, project, rate, dry_run=True, **options)
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon de uren niet ophalen: {e}", parent=dialog)
+            return
+        if not preview['rows']:
+            messagebox.showinfo("Niets gevonden", "Er zijn geen uren die aan het filter voldoen.", parent=dialog)
+            return
+
+        moved = "\n".join(f"  van {name or '(geen project)'}: {hours:.2f} uur"
+                           for name, hours in sorted(preview['projects'].items(), key=lambda item: -item[1]))
+        if not messagebox.askyesno(
+            "Bevestig verplaatsen",
+            f"{preview['rows']} rijen ({preview['hours']:.2f} uur) naar {project} verplaatsen?\n\n"
+            f"{moved}\n\nBedrag: €{preview['amount_before']:.2f} -> €{preview['amount_after']:.2f}",
+            parent=dialog
+        ):
+            return
+
+        try:
+            stats = bulk_reassign(self.activity_log, project, rate, **options)
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon de uren niet verplaatsen: {e}", parent=dialog)
+            return
+        self.repository.source('auto').reload()
+        self.result_cache.invalidate()
+        dialog.destroy()
+
+        messagebox.showinfo("Verplaatst", f"{stats['hours']:.2f} uur verplaatst naar {project}.")
         self.update_entries_list()
         self.update_stats()
 
@@ -818,7 +872,7 @@ class TimeTrackerApp(ctk.CTk):
                         entry.get('description', ''),
                         rate,
                         amount,
-                        'Auto' if entry['source'] == 'auto' else 'Handmatig'
+                        {'auto': 'Auto', 'tray': 'Tray'}.get(entry['source'], 'Handmatig')
                     ])
 
                     total_hours += entry['hours']
@@ -836,6 +890,7 @@ class TimeTrackerApp(ctk.CTk):
 
     def update_stats(self):
         """Update statistieken."""
+        self.flush_activity_log()
         today = datetime.now().strftime('%Y-%m-%d')
         week_start = (datetime.now() - timedelta(days=datetime.now().weekday())).strftime('%Y-%m-%d')
         month_start = datetime.now().strftime('%Y-%m-01')
@@ -845,39 +900,36 @@ class TimeTrackerApp(ctk.CTk):
         hours_month = 0
         amount_month = 0
 
-        # Tel handmatige entries
-        for entry in self.manual_entries:
-            entry_date = entry['date']
-            hours = float(entry['hours'])
-
-            if entry_date == today:
-                hours_today += hours
-            if entry_date >= week_start:
-                hours_week += hours
-            if entry_date >= month_start:
-                hours_month += hours
-                # Bereken bedrag
-                project = next((p for p in self.projects if p['name'] == entry['project']), None)
-                if project:
-                    amount_month += hours * project.get('rate', 0)
-
-        # Tel auto-tracked entries
-        if ACTIVITY_LOG.exists():
-            try:
-                with open(ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f, delimiter=';')
-                    for row in reader:
-                        entry_date = row['Datum']
-                        hours = float(row.get('Duur (uren)', 0) or 0)
-
-                        if entry_date == today:
-                            hours_today += hours
-                        if entry_date >= week_start:
-                            hours_week += hours
-                        if entry_date >= month_start:
-                            hours_month += hours
-            except:
-                pass
+        # Periode-totalen (auto-tracked + handmatig) uit de prefix-som index
+        def compute():
+            totals = [
+                self.rollups.range_total(today, today)[1],
+                self.rollups.range_total(week_start, today)[1],
+                self.rollups.range_total(month_start, today)[1],
+                # Bedrag van handmatige entries deze maand
+                self.rollups.range_total(month_start, today, sources=('manual',))[2],
+            ]
+            # Tijd die een timer sessie en auto-tracking allebei registreerden maar één keer
+            for (date, source), (hours, amount) in self.overlap_duplicates(
+                    min(week_start, month_start), today).items():
+                if date == today:
+                    totals[0] -= hours
+                if date >= week_start:
+                    totals[1] -= hours
+                if date >= month_start:
+                    totals[2] -= hours
+                    if source == 'manual':
+                        totals[3] -= amount
+            return totals
+
+        # De overlap-correctie leest de handmatige entries zelf (met hun tijden)
+        version = [rollups_version(self.rollups), self.manual_entries.version()]
+        try:
+            hours_today, hours_week, hours_month, amount_month = self.result_cache.cached(
+                'stats', [today, week_start, month_start], version, compute
+            )
+        except:
+            pass
 
         # Update labels
         self.stat_today.configure(text=f"{hours_today:.1f} uur")
@@ -885,6 +937,26 @@ class TimeTrackerApp(ctk.CTk):
         self.stat_month.configure(text=f"{hours_month:.1f} uur")
         self.stat_amount.configure(text=f"€{amount_month:.2f}")
 
+    def overlap_duplicates(self, start, end):
+        """
+        Dubbel getelde uren en bedragen per (datum, bron) volgens
+        overlap_precedence, alleen tussen de bronnen die in de statistieken
+        zitten (self.rollups: auto-tracked en handmatig, geen tray).
+        """
+        precedence = [s for s in self.tracker.config.get("overlap_precedence", [])
+                      if s in ('manual', 'auto')]
+        if len(precedence) < 2:
+            return {}
+        # Handmatige entries slaan geen bedrag op: net als in de dagtotalen uit het projecttarief
+        timed = [dict(e, amount=round(e['hours'] * self.get_project_rate(e['project']), 2))
+                 for e in self.repository.query(start, end, sources=['manual'], order='asc')
+                 if e.get('start_time')]
+        # Auto-tracked rijen alleen lezen op dagen met een timer sessie
+        entries = list(timed)
+        for date in sorted({e['date'] for e in timed}):
+            entries.extend(self.repository.query(date, date, sources=['auto'], order='asc'))
+        return duplicate_totals(entries, precedence)
+
     def start_timer(self):
         """Start de timer."""
         project_name = self.timer_project_var.get()
@@ -912,7 +984,7 @@ class TimeTrackerApp(ctk.CTk):
         hours = duration / 3600
 
         if hours >= 0.01:  # Minimaal ~30 seconden
-            self.manual_entries.append({
+            entry = {
                 'id': str(int(time.time() * 1000)),
                 'date': self.timer_start.strftime('%Y-%m-%d'),
                 'hours': round(hours, 2),
@@ -920,8 +992,9 @@ class TimeTrackerApp(ctk.CTk):
                 'description': f"Timer sessie",
                 'start_time': self.timer_start.strftime('%H:%M:%S'),
                 'end_time': datetime.now().strftime('%H:%M:%S')
-            })
-            self.save_manual_entries()
+            }
+            self.manual_entries.add(entry)
+            self.rollups.add(*manual_rollup_record(entry, self.get_project_rate(entry['project'])))
             self.update_entries_list()
             self.update_stats()
 
@@ -952,14 +1025,15 @@ class TimeTrackerApp(ctk.CTk):
                 messagebox.showwarning("Waarschuwing", "Vul alle velden correct in!")
                 return
 
-            self.manual_entries.append({
+            entry = {
                 'id': str(int(time.time() * 1000)),
                 'date': date,
                 'hours': hours,
                 'project': project,
                 'description': description
-            })
-            self.save_manual_entries()
+            }
+            self.manual_entries.add(entry)
+            self.rollups.add(*manual_rollup_record(entry, self.get_project_rate(project)))
 
             # Reset form
             self.entry_hours.delete(0, 'end')
@@ -1009,59 +1083,47 @@ class TimeTrackerApp(ctk.CTk):
             return
 
         try:
-            # Verzamel alle entries (handmatig + auto-tracked)
-            all_entries = []
+            self.flush_activity_log()
 
-            # Handmatige entries
-            for entry in self.manual_entries:
-                project = next((p for p in self.projects if p['name'] == entry['project']), None)
-                rate = project.get('rate', 0) if project else 0
-                amount = float(entry['hours']) * rate
+            # Alle entries (auto, handmatig, tray), oudste eerst
+            all_entries = []
+            entries = self.repository.query(order='asc')
+            precedence = self.tracker.config.get("overlap_precedence", [])
+            if precedence:
+                # Overlappende tijd van verschillende bronnen maar één keer
+                entries = resolved_entries(entries, precedence)
+            for entry in entries:
+                hours = entry['hours']
+                if entry['source'] == 'auto':
+                    row = entry['raw_row']
+                    description = f"{row.get('Applicatie', '')} - {row.get('Venstertitel', '')[:50]}"
+                    rate = row.get('Tarief', '')
+                else:
+                    description = entry['description']
+                    rate = ''
+
+                # Gebruik tarief/bedrag uit CSV als beschikbaar, anders lookup
+                if rate != '':
+                    rate = float(rate)
+                    amount = entry['amount']
+                else:
+                    rate = self.get_project_rate(entry['project'])
+                    amount = round(hours * rate, 2)
 
                 all_entries.append({
                     'date': entry['date'],
                     'project': entry['project'],
-                    'hours': float(entry['hours']),
-                    'description': entry.get('description', ''),
+                    'hours': hours,
+                    'description': description,
                     'rate': rate,
-                    'amount': round(amount, 2),
-                    'source': 'Handmatig'
+                    'amount': amount,
+                    'source': {'auto': 'Auto', 'tray': 'Tray'}.get(entry['source'], 'Handmatig')
                 })
 
-            # Auto-tracked entries
-            if ACTIVITY_LOG.exists():
-                with open(ACTIVITY_LOG, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f, delimiter=';')
-                    for row in reader:
-                        hours = float(row.get('Duur (uren)', 0) or 0)
-                        project_name = row.get('Project', '') or 'Auto'
-
-                        # Gebruik tarief/bedrag uit CSV als beschikbaar, anders lookup
-                        if 'Tarief' in row and row['Tarief']:
-                            rate = float(row['Tarief'])
-                            amount = float(row.get('Bedrag', 0) or 0)
-                        else:
-                            project = next((p for p in self.projects if p['name'] == project_name), None)
-                            rate = project.get('rate', 0) if project else 0
-                            amount = round(hours * rate, 2)
-
-                        all_entries.append({
-                            'date': row['Datum'],
-                            'project': project_name,
-                            'hours': hours,
-                            'description': f"{row['Applicatie']} - {row.get('Venstertitel', '')[:50]}",
-                            'rate': rate,
-                            'amount': amount,
-                            'source': 'Auto'
-                        })
-
             if not all_entries:
                 messagebox.showwarning("Geen data", "Er zijn geen uren om te exporteren.")
                 return
 
-            # Sorteer op datum
-            all_entries.sort(key=lambda x: x['date'])
-
             # Schrijf CSV
             with open(filename, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f, delimiter=';')
@@ -1155,9 +1217,11 @@ class TimeTrackerApp(ctk.CTk):
                     project_name=project_name,
                     project_rate=project_rate
                 )
+                self.auto_tracker = tracker
                 while self.tracking_active:
                     tracker.track_once()
                     time.sleep(5)
+                tracker.stop()
 
             self.tracking_thread = threading.Thread(target=track, daemon=True)
             self.tracking_thread.start()
@@ -1232,6 +1296,7 @@ class TimeTrackerApp(ctk.CTk):
 
         self.stop_hourly_check()
         self.tracking_active = False
+        self.flush_activity_log()
         self.destroy()
 
 
@@ -1242,4 +1307,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Nodig voor de worker processen van de parallelle lezer in de gebouwde app
+    multiprocessing.freeze_support()
     main()
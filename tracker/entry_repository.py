@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Eén plek om geregistreerde uren op te vragen voor Tijdregistratie
+
+Uren staan verspreid over drie bronnen:
+- 'auto': de activity log van de enhanced tracker
+- 'manual': handmatige entries en timer sessies van de desktop app
+- 'tray': timer entries van de tray app (tracker/data/entries/<maand>.json)
+
+Elke bron levert zijn entries al gesorteerd op (datum, starttijd); de
+repository voegt ze samen met een k-way merge (heapq.merge) in plaats van
+alles opnieuw te sorteren. Alle entries hebben dezelfde vorm:
+
+    {'id', 'date', 'start_time', 'end_time', 'hours', 'project',
+     'description', 'source', 'category', 'rate', 'amount'}
+
+plus 'raw_row' (auto) of 'entry_ref' (manual/tray) met het origineel.
+"""
+
+import heapq
+import json
+import os
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+from activity_store import EditLog, path_lock
+
+# Entries van de tray app
+TRAY_DATA_DIR = Path(__file__).parent / "data"
+TRAY_ENTRIES_FILE = TRAY_DATA_DIR / "entries.json"  # oude opslag, wordt gemigreerd
+TRAY_ENTRIES_DIR = TRAY_DATA_DIR / "entries"
+TRAY_ROLLUPS_DIR = TRAY_DATA_DIR / "rollups"
+
+SOURCES = ('auto', 'manual', 'tray')
+
+
+def entry_key(entry):
+    """Sorteersleutel: (datum, starttijd)."""
+    return entry['date'], entry.get('start_time', '')
+
+
+def auto_entry(row):
+    """Entry voor een rij uit de activity log."""
+    return {
+        'id': f"auto_{row['ID']}",
+        'date': row['Datum'],
+        'start_time': row.get('Starttijd', ''),
+        'end_time': row.get('Eindtijd', ''),
+        'hours': float(row.get('Duur (uren)', 0) or 0),
+        'project': row.get('Project', '') or 'Auto',
+        'description': f"{row.get('Applicatie', '')} - {row.get('Venstertitel', '')[:40]}",
+        'source': 'auto',
+        'category': row.get('Categorie', ''),
+        'rate': float(row.get('Tarief', 0) or 0),
+        'amount': float(row.get('Bedrag', 0) or 0),
+        'raw_row': row
+    }
+
+
+def manual_entry(entry):
+    """Entry voor een handmatige entry of timer sessie van de desktop app."""
+    return {
+        'id': f"manual_{entry.get('id')}",
+        'date': entry['date'],
+        'start_time': entry.get('start_time', ''),
+        'end_time': entry.get('end_time', ''),
+        'hours': float(entry['hours']),
+        'project': entry['project'],
+        'description': entry.get('description', ''),
+        'source': 'manual',
+        'category': 'handmatig',
+        'rate': 0,
+        'amount': 0,
+        'entry_ref': entry
+    }
+
+
+def tray_entry(entry):
+    """Entry voor een timer entry van de tray app."""
+    return {
+        'id': f"tray_{entry.get('id')}",
+        'date': entry['date'],
+        'start_time': entry.get('start_time', ''),
+        'end_time': entry.get('end_time', ''),
+        'hours': float(entry['hours']),
+        'project': entry['project_name'],
+        'description': entry.get('description', ''),
+        'source': 'tray',
+        'category': 'timer',
+        'rate': 0,
+        'amount': 0,
+        'entry_ref': entry
+    }
+
+
+def tray_rollup_record(entry):
+    """Rollup record (dagtotaal) voor een timer entry van de tray app."""
+    hours = float(entry["hours"])
+    return (entry["date"], "timer", entry["project_name"], "timer", "Tray",
+            hours * 3600, hours, 0)
+
+
+class SortedEntries:
+    """Entries gesorteerd op (datum, starttijd), met bisect op datum."""
+
+    def __init__(self, entries=()):
+        self.entries = sorted(entries, key=entry_key)
+        self.keys = [entry_key(e) for e in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry):
+        """Voeg een entry toe; achteraan (het gewone geval) zonder zoeken."""
+        key = entry_key(entry)
+        if not self.keys or key >= self.keys[-1]:
+            self.entries.append(entry)
+            self.keys.append(key)
+        else:
+            position = bisect_right(self.keys, key)
+            self.entries.insert(position, entry)
+            self.keys.insert(position, key)
+
+    def remove(self, ids):
+        """Verwijder entries op id."""
+        ids = set(ids)
+        kept = [(k, e) for k, e in zip(self.keys, self.entries) if e['id'] not in ids]
+        self.keys = [k for k, _ in kept]
+        self.entries = [e for _, e in kept]
+
+    def between(self, start_date=None, end_date=None, reverse=False):
+        """Entries binnen de periode, oplopend (of aflopend met reverse)."""
+        low = bisect_left(self.keys, (start_date, '')) if start_date else 0
+        high = bisect_left(self.keys, (end_date + '\x7f', '')) if end_date else len(self.keys)
+        if reverse:
+            return (self.entries[i] for i in range(high - 1, low - 1, -1))
+        return islice(self.entries, low, high)
+
+
+class ActivityLogSource:
+    """
+    De activity log als bron. Met cached=True worden de entries in het
+    geheugen gehouden en via read_new() bijgewerkt (voor de desktop app);
+    anders wordt per query gestreamd uit de log.
+    """
+
+    name = 'auto'
+
+    def __init__(self, activity_log, cached=False):
+        self.log = activity_log
+        self.cached = cached
+        self.cache = SortedEntries()
+        self.cursor = None
+
+    def refresh(self):
+        """Lees nieuwe (en vergeet verwijderde) rijen uit de log."""
+        if not self.cached:
+            return
+        try:
+            rows, self.cursor, reset, removed = self.log.read_new(self.cursor)
+            if reset:
+                self.cache = SortedEntries()
+            elif removed:
+                self.cache.remove(f"auto_{row_id}" for row_id in removed)
+            for row in rows:
+                self.cache.add(auto_entry(row))
+        except Exception as e:
+            print(f"Error loading auto entries: {e}")
+            self.cursor = None
+
+    def reload(self):
+        """Lees bij de volgende refresh alles opnieuw (bijv. na een projectwijziging)."""
+        self.cursor = None
+
+    def entries(self, start_date=None, end_date=None, reverse=False):
+        if self.cached:
+            return self.cache.between(start_date, end_date, reverse)
+        entries = (auto_entry(row) for row in self.log.rows(start_date, end_date))
+        # De log is chronologisch: omdraaien is genoeg
+        return reversed(list(entries)) if reverse else entries
+
+    def delete(self, entries):
+        """Verwijder entries uit de log (tombstones)."""
+        ids = [e['raw_row']['ID'] for e in entries]
+        if not ids:
+            return 0
+        try:
+            self.log.delete(ids)
+        except Exception as e:
+            print(f"Error deleting auto entries: {e}")
+            self.cursor = None
+        self.cache.remove(e['id'] for e in entries)
+        return len(ids)
+
+
+class EntryJournal(EditLog):
+    """
+    Append-only journal van een JSON lijst met entries (één record per regel):
+        {"op": "add", "entry": {...}}
+        {"op": "update", "id": "...", "fields": {...}}
+        {"op": "delete", "id": "..."}
+    Alle records zijn idempotent, zodat opnieuw afspelen na een snapshot
+    (of een crash halverwege het snapshotten) hetzelfde resultaat geeft.
+    """
+
+    def truncate(self, state):
+        """Verwijder de records tot state (die zitten in de snapshot)."""
+        with self.lock:
+            records, _, reset = self.read_from(state)
+            if reset:
+                return
+            if not records:
+                if self.path.exists():
+                    self.path.unlink()
+            else:
+                tmp = self.path.with_name(self.path.name + '.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                os.replace(tmp, self.path)
+
+
+class JsonEntrySource:
+    """
+    Entries uit een JSON lijst (handmatige entries of tray entries).
+
+    Het JSON bestand is een snapshot; wijzigingen worden als één regel aan
+    <bestand>.journal toegevoegd en bij het laden afgespeeld. Na
+    SNAPSHOT_EVERY records wordt de snapshot opnieuw geschreven (atomisch)
+    en het journal ingekort, zodat schrijven O(1) is en opstarten begrensd.
+    Wijzigingen van andere processen (desktop app en tray app) komen binnen
+    via refresh().
+    """
+
+    SNAPSHOT_EVERY = 500
+
+    def __init__(self, name, path, convert):
+        self.name = name
+        self.path = Path(path)
+        self.convert = convert
+        self.journal = EntryJournal(self.path.with_name(self.path.name + '.journal'))
+        self.lock = path_lock(self.path)
+        self.load()
+
+    @property
+    def raw(self):
+        """De entries in volgorde van toevoegen (zoals in de snapshot)."""
+        return list(self.by_id.values())
+
+    def _snapshot_stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_ino, stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def version(self):
+        """
+        Dataversie voor caches: inode, mtime en grootte van de snapshot en
+        inode en grootte van het (append-only) journal.
+        """
+        try:
+            stat = os.stat(self.journal.path)
+            journal = stat.st_ino, stat.st_size
+        except OSError:
+            journal = None
+        return [self._snapshot_stat(), journal]
+
+    def load(self):
+        """Laad de snapshot en speel het journal af."""
+        with self.lock:
+            self.snapshot_stat = self._snapshot_stat()
+            entries = []
+            if self.snapshot_stat:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        entries = json.load(f)
+                except:
+                    pass
+            self.by_id = {}
+            for number, entry in enumerate(entries):
+                # Oude entries zonder id krijgen er een op basis van hun plek
+                self.by_id[entry.setdefault('id', f"legacy-{number}")] = entry
+            self.sorted = SortedEntries(self.convert(e) for e in entries)
+            self.journal_state = None
+            self.pending = 0
+            self._replay()
+
+    def _replay(self):
+        records, self.journal_state, _ = self.journal.read_from(self.journal_state)
+        for record in records:
+            self._apply(record)
+        self.pending += len(records)
+
+    def _apply(self, record):
+        op = record.get('op')
+        if op == 'add':
+            entry = record['entry']
+            entry_id = entry.get('id')
+            if entry_id in self.by_id:
+                self.sorted.remove([self.convert(self.by_id[entry_id])['id']])
+            self.by_id[entry_id] = entry
+            self.sorted.add(self.convert(entry))
+        elif op == 'update':
+            entry = self.by_id.get(record.get('id'))
+            if entry is not None:
+                self.sorted.remove([self.convert(entry)['id']])
+                entry.update(record.get('fields', {}))
+                self.sorted.add(self.convert(entry))
+        elif op == 'delete':
+            entry = self.by_id.pop(record.get('id'), None)
+            if entry is not None:
+                self.sorted.remove([self.convert(entry)['id']])
+
+    def _write(self, records):
+        """Voeg records toe aan het journal en verwerk ze."""
+        with self.lock:
+            self.refresh()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.journal.append(records)
+            self._replay()
+            if self.pending >= self.SNAPSHOT_EVERY:
+                self.save()
+
+    def save(self):
+        """Schrijf een nieuwe snapshot en kort het journal in."""
+        with self.lock:
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.raw, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.journal.truncate(self.journal_state)
+            self.snapshot_stat = self._snapshot_stat()
+            self.journal_state = None
+            self.pending = 0
+            self._replay()
+
+    def refresh(self):
+        """Verwerk wijzigingen van andere processen."""
+        with self.lock:
+            if self._snapshot_stat() != self.snapshot_stat:
+                self.load()
+                return
+            records, state, reset = self.journal.read_from(self.journal_state)
+            if reset:
+                self.load()
+                return
+            for record in records:
+                self._apply(record)
+            self.journal_state = state
+            self.pending += len(records)
+
+    def add(self, entry):
+        """Voeg een (ruwe) entry toe."""
+        self._write([{'op': 'add', 'entry': entry}])
+
+    def add_many(self, entries):
+        """Voeg een batch (ruwe) entries toe met één journal regel per entry."""
+        if entries:
+            self._write([{'op': 'add', 'entry': entry} for entry in entries])
+
+    def update(self, entry, fields):
+        """Wijzig velden van een (ruwe) entry."""
+        self._write([{'op': 'update', 'id': entry.get('id'), 'fields': fields}])
+
+    def entries(self, start_date=None, end_date=None, reverse=False):
+        return self.sorted.between(start_date, end_date, reverse)
+
+    def delete(self, entries):
+        """Verwijder entries."""
+        ids = {e['entry_ref'].get('id') for e in entries}
+        if not ids:
+            return 0
+        self._write([{'op': 'delete', 'id': entry_id} for entry_id in ids])
+        return len(ids)
+
+
+class PartitionedEntrySource:
+    """
+    Entries verdeeld over één JsonEntrySource per maand (<map>/2026-10.json).
+    Alleen de lopende maand wordt bij het starten geladen; andere maanden
+    pas als een query ze nodig heeft, en er blijven er maximaal
+    KEEP_MONTHS in het geheugen.
+    """
+
+    KEEP_MONTHS = 3
+
+    def __init__(self, name, directory, convert, legacy_path=None):
+        self.name = name
+        self.directory = Path(directory)
+        self.convert = convert
+        self.loaded = OrderedDict()  # maand -> JsonEntrySource, minst recent eerst
+        if legacy_path:
+            self.migrate(Path(legacy_path))
+        self.month(datetime.now().strftime('%Y-%m'))
+
+    def month_path(self, month):
+        return self.directory / f"{month}.json"
+
+    def month(self, month):
+        """JsonEntrySource van een maand (geladen als dat nog niet zo was)."""
+        source = self.loaded.pop(month, None)
+        if source is None:
+            source = JsonEntrySource(self.name, self.month_path(month), self.convert)
+        self.loaded[month] = source
+        while len(self.loaded) > self.KEEP_MONTHS:
+            self.loaded.popitem(last=False)
+        return source
+
+    def months(self, start_date=None, end_date=None):
+        """Maanden met entries (snapshot of journal) binnen de periode."""
+        if not self.directory.exists():
+            return []
+        months = {path.name[:7] for path in self.directory.iterdir()
+                  if path.name.endswith(('.json', '.json.journal'))}
+        return sorted(m for m in months
+                      if not (start_date and m < start_date[:7])
+                      and not (end_date and m > end_date[:7]))
+
+    def migrate(self, legacy_path):
+        """Eenmalig: verdeel een oude JSON lijst (plus journal) over maanden."""
+        journal = legacy_path.with_name(legacy_path.name + '.journal')
+        if not legacy_path.exists() and not journal.exists():
+            return
+        with path_lock(legacy_path):
+            legacy = JsonEntrySource(self.name, legacy_path, self.convert)
+            per_month = {}
+            for entry in legacy.raw:
+                per_month.setdefault(entry['date'][:7], []).append(entry)
+            for month, entries in per_month.items():
+                target = JsonEntrySource(self.name, self.month_path(month), self.convert)
+                for entry in entries:
+                    target.by_id.setdefault(entry['id'], entry)
+                self.directory.mkdir(parents=True, exist_ok=True)
+                target.save()
+            for path in (legacy_path, journal):
+                try:
+                    os.replace(path, path.with_name(path.name + '.migrated'))
+                except OSError:
+                    pass
+
+    @property
+    def raw(self):
+        """Alle entries, maand voor maand (zonder ze in het geheugen te houden)."""
+        for month in self.months():
+            source = self.loaded.get(month)
+            if source is None:
+                source = JsonEntrySource(self.name, self.month_path(month), self.convert)
+            yield from source.raw
+
+    def refresh(self):
+        for source in list(self.loaded.values()):
+            source.refresh()
+
+    def entries(self, start_date=None, end_date=None, reverse=False):
+        months = self.months(start_date, end_date)
+        for month in reversed(months) if reverse else months:
+            yield from self.month(month).entries(start_date, end_date, reverse)
+
+    def add(self, entry):
+        self.month(entry['date'][:7]).add(entry)
+
+    def update(self, entry, fields):
+        """Wijzig velden van een entry (naar een andere maand als de datum wijzigt)."""
+        month = entry['date'][:7]
+        new_month = fields.get('date', entry['date'])[:7]
+        if new_month == month:
+            self.month(month).update(entry, fields)
+        else:
+            self.month(month).delete([self.convert(entry)])
+            self.month(new_month).add(dict(entry, **fields))
+
+    def delete(self, entries):
+        per_month = {}
+        for entry in entries:
+            per_month.setdefault(entry['date'][:7], []).append(entry)
+        return sum(self.month(month).delete(selected) for month, selected in per_month.items())
+
+
+class EntryRepository:
+    """Query API over alle bronnen met uren."""
+
+    def __init__(self, sources):
+        self.sources = {source.name: source for source in sources}
+
+    def source(self, name):
+        return self.sources.get(name)
+
+    def refresh(self):
+        """Werk gecachte bronnen bij."""
+        for source in self.sources.values():
+            source.refresh()
+
+    def _merged(self, start_date, end_date, projects, sources, reverse):
+        iterators = [source.entries(start_date, end_date, reverse)
+                     for name, source in self.sources.items()
+                     if sources is None or name in sources]
+        merged = heapq.merge(*iterators, key=entry_key, reverse=reverse)
+        if projects is not None:
+            merged = (e for e in merged if e['project'] in projects)
+        return merged
+
+    def query(self, start_date=None, end_date=None, projects=None, sources=None,
+              limit=None, order='desc'):
+        """
+        Entries binnen een periode, nieuwste eerst (order='desc') of oudste
+        eerst ('asc'). projects en sources zijn optionele collecties namen.
+        Met limit en zonder startdatum wordt eerst alleen het laatste stuk
+        van de periode gelezen en pas verder teruggegaan als dat nodig is.
+        """
+        reverse = order == 'desc'
+        self.refresh()
+        if reverse and limit and not start_date:
+            end = end_date or datetime.now().strftime('%Y-%m-%d')
+            for days in (7, 31, 366):
+                window_start = (datetime.strptime(end, '%Y-%m-%d')
+                                - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+                result = list(islice(self._merged(window_start, end_date, projects,
+                                                  sources, reverse), limit))
+                if len(result) >= limit:
+                    return result
+        return list(islice(self._merged(start_date, end_date, projects, sources, reverse),
+                           limit))
+
+    def totals(self, start_date=None, end_date=None, projects=None, sources=None):
+        """Uren per project binnen een periode."""
+        totals = {}
+        for entry in self._merged(start_date, end_date, projects, sources, False):
+            totals[entry['project']] = totals.get(entry['project'], 0) + entry['hours']
+        return totals
+
+    def delete(self, entries):
+        """Verwijder entries (gegroepeerd per bron). Retourneert het aantal."""
+        deleted = 0
+        for name, source in self.sources.items():
+            selected = [e for e in entries if e['source'] == name]
+            if selected:
+                deleted += source.delete(selected)
+        return deleted
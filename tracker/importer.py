@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Import van externe urenregistraties
+
+Leest grote bestanden streaming (constant geheugen) en schrijft ze in
+batches naar de opslag van de tracker:
+
+- 'activity':  een oude activity_log.csv van activity_tracker.py (of een
+               andere log van de tracker) -> rijen in de activity log
+- 'timesheet': een CSV export van een andere time tracker (Toggl,
+               Clockify, Harvest, een spreadsheet, ...) met minimaal een
+               datum en uren of duur -> handmatige entries
+- 'webapp':    de JSON van de browser app (de export van exportAllData of
+               de lijst onder 'timetracker_entries') -> handmatige entries
+
+Elke geïmporteerde rij krijgt een ID die een hash van zijn inhoud is (of
+van de eigen id van een entry van de browser app). Rijen zonder starttijd
+met dezelfde inhoud krijgen binnen een bestand een volgnummer, zodat twee
+echte gelijke entries allebei blijven. Een rij die al in de opslag staat
+wordt overgeslagen, dus hetzelfde bestand nog een keer importeren
+verandert niets. Een CSV log moet op datum
+gesorteerd blijven; rijen die ouder zijn dan de log komen daarom in een
+nieuw gecomprimeerd segment (zie CsvActivityLog.segment_writer).
+"""
+
+import csv
+import hashlib
+import json
+import time
+from datetime import datetime
+
+from activity_store import CsvActivityLog, normalize_row, path_lock
+
+BATCH_SIZE = 1000
+PROGRESS_SECONDS = 2.0
+
+# Kolomnamen (kleine letters) die andere trackers voor hetzelfde gebruiken
+DATE_COLUMNS = ('date', 'datum', 'start date', 'startdatum', 'day', 'dag')
+START_COLUMNS = ('start time', 'starttijd', 'begintijd', 'start')
+END_COLUMNS = ('end time', 'eindtijd', 'end')
+HOURS_COLUMNS = ('hours', 'uren', 'duration (decimal)', 'decimal duration',
+                 'duration (h)', 'duur (uren)', 'tijd (uren)')
+DURATION_COLUMNS = ('duration', 'duur', 'duration (h:mm)', 'tijd')
+PROJECT_COLUMNS = ('project', 'projectnaam', 'client', 'klant')
+DESCRIPTION_COLUMNS = ('description', 'beschrijving', 'omschrijving', 'notes',
+                       'notities', 'task', 'taak')
+
+# Velden die samen een rij uit een activity log identificeren
+KEY_FIELDS = ('Datum', 'Starttijd', 'Eindtijd', 'Duur (sec)', 'Applicatie', 'Venstertitel')
+
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y', '%Y/%m/%d')
+
+
+def content_id(prefix, *values):
+    """ID op basis van de inhoud (16 tekens, past ook in het archief)."""
+    data = json.dumps([str(v) for v in values], ensure_ascii=False).encode('utf-8')
+    return prefix + hashlib.sha1(data).hexdigest()[:16 - len(prefix)]
+
+
+def occurrence_id(seen, prefix, *values):
+    """
+    content_id voor rijen die alleen op inhoud te herkennen zijn: de tweede,
+    derde, ... rij met dezelfde inhoud in één bestand krijgt een volgnummer
+    erbij (seen: {id: aantal} van dat bestand). De eerste houdt zijn ID.
+    """
+    key = content_id(prefix, *values)
+    count = seen.get(key, 0)
+    seen[key] = count + 1
+    return content_id(prefix, *values, count) if count else key
+
+
+def detect_format(path):
+    """'webapp' (JSON), 'activity' (log van de tracker) of 'timesheet'."""
+    with open(path, 'rb') as f:
+        start = f.read(4096).lstrip(b'\xef\xbb\xbf \t\r\n')
+    if start[:1] in (b'[', b'{'):
+        return 'webapp'
+    header = start.split(b'\n', 1)[0].decode('utf-8', 'replace')
+    if 'Datum' in header and 'Duur (sec)' in header and 'Applicatie' in header:
+        return 'activity'
+    return 'timesheet'
+
+
+def parse_date(value):
+    """Datum in een gangbaar formaat (eventueel met tijd erachter) -> 'YYYY-MM-DD'."""
+    value = str(value or '').strip().replace('T', ' ').split(' ')[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_hours(value):
+    """'1.5', '1,5', '1:30' of '01:30:00' -> uren (None als ongeldig)."""
+    value = str(value or '').strip()
+    if not value:
+        return None
+    try:
+        if ':' in value:
+            parts = [float(p) for p in value.split(':')]
+            parts += [0] * (3 - len(parts))
+            return parts[0] + parts[1] / 60 + parts[2] / 3600
+        return float(value.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def iter_json_array(f, keys, chunk_size=65536):
+    """
+    Streaming lezer voor de elementen van een JSON lijst: de lijst op het
+    hoogste niveau, of de eerste lijst onder een van de keys. Er staat
+    steeds maar één element (plus een blok van de file) in het geheugen.
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size)
+    position = 0
+
+    def fill():
+        nonlocal buffer, position
+        more = f.read(chunk_size)
+        buffer = buffer[position:] + more
+        position = 0
+        return bool(more)
+
+    # Zoek het begin van de lijst
+    stripped = buffer.lstrip('﻿ \t\r\n')
+    while not stripped and fill():
+        stripped = buffer.lstrip('﻿ \t\r\n')
+    if stripped.startswith('['):
+        position = len(buffer) - len(stripped) + 1
+    while not position:
+        found = [i for i in (buffer.find(f'"{key}"') for key in keys) if i != -1]
+        if found:
+            bracket = buffer.find('[', min(found))
+            if bracket != -1:
+                position = bracket + 1
+                break
+        else:
+            buffer = buffer[-64:]  # alleen een mogelijk half gelezen key bewaren
+        if not fill():
+            return
+
+    while True:
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or not fill():
+                break
+        if position >= len(buffer) or buffer[position] == ']':
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            if not fill():
+                raise
+            continue
+        position = end
+        yield element
+
+
+def activity_key(values):
+    """Vingerafdruk van een rij (waarden van KEY_FIELDS), onafhankelijk van de backend."""
+    values = list(values)
+    try:
+        values[3] = f"{float(values[3] or 0):.3f}"
+    except ValueError:
+        pass
+    return content_id('i', *values)
+
+
+def read_activity(path):
+    """Rijen uit een log van de tracker (via CsvActivityLog: ook oude layouts en tombstones)."""
+    log = CsvActivityLog(path, use_index=False)
+    for row in log.rows():
+        record = normalize_row(row)
+        record['ID'] = activity_key(record[field] for field in KEY_FIELDS)
+        yield record
+
+
+def read_timesheet(path, stats):
+    """Handmatige entries uit een CSV export van een andere time tracker."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+
+        def column(candidates):
+            return next((columns[c] for c in candidates if c in columns), None)
+
+        date_column = column(DATE_COLUMNS)
+        start_column = column(START_COLUMNS)
+        end_column = column(END_COLUMNS)
+        hours_column = column(HOURS_COLUMNS)
+        duration_column = column(DURATION_COLUMNS)
+        project_column = column(PROJECT_COLUMNS)
+        description_column = column(DESCRIPTION_COLUMNS)
+        seen = {}
+        if not (date_column or start_column) or not (hours_column or duration_column):
+            raise ValueError("Geen kolommen voor datum en uren/duur gevonden "
+                             f"(kolommen: {', '.join(reader.fieldnames or [])})")
+
+        for row in reader:
+            date = parse_date(row.get(date_column or start_column))
+            hours = parse_hours(row.get(hours_column or duration_column))
+            if not date or hours is None or hours <= 0:
+                stats['invalid'] += 1
+                continue
+            start = str(row.get(start_column, '') or '').strip() if start_column else ''
+            start = start.replace('T', ' ').split(' ')[-1] if start else ''
+            end = str(row.get(end_column, '') or '').strip() if end_column else ''
+            end = end.replace('T', ' ').split(' ')[-1] if end else ''
+            entry = {
+                'date': date,
+                'hours': round(hours, 4),
+                'project': str(row.get(project_column, '') or '').strip() if project_column else '',
+                'description': str(row.get(description_column, '') or '').strip()
+                if description_column else '',
+            }
+            if start:
+                entry['start_time'] = start
+            if end:
+                entry['end_time'] = end
+            values = (entry['date'], start, entry['hours'], entry['project'], entry['description'])
+            # Met starttijd is dezelfde inhoud echt dezelfde entry
+            entry['id'] = content_id('import-', *values) if start else occurrence_id(seen, 'import-', *values)
+            yield entry
+
+
+def read_webapp(path, stats, projects=None):
+    """
+    Handmatige entries uit de JSON van de browser app. Projecten staan daar
+    als projectId; de namen (en tarieven) komen uit de 'projects' lijst van
+    hetzelfde bestand, die eerst apart gestreamd wordt.
+    """
+    if projects is None:
+        projects = {}
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for project in iter_json_array(f, ('projects', 'timetracker_projects')):
+            if isinstance(project, dict) and 'id' in project and 'name' in project:
+                projects[project['id']] = project
+
+    seen = {}
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for item in iter_json_array(f, ('entries', 'timetracker_entries')):
+            if not isinstance(item, dict):
+                stats['invalid'] += 1
+                continue
+            date = parse_date(item.get('date'))
+            hours = parse_hours(item.get('hours'))
+            if not date or hours is None or hours <= 0:
+                stats['invalid'] += 1
+                continue
+            project = projects.get(item.get('projectId'), {}).get('name') or str(item.get('projectId') or '')
+            entry = {
+                'date': date,
+                'hours': round(hours, 4),
+                'project': project,
+                'description': item.get('description', '') or '',
+            }
+            if item.get('id'):
+                # De browser app geeft elke entry een eigen id (Utils.generateId)
+                entry['id'] = content_id('import-', 'webapp', item['id'])
+            else:
+                entry['id'] = occurrence_id(seen, 'import-', entry['date'], '', entry['hours'],
+                                            entry['project'], entry['description'])
+            yield entry
+
+
+class Importer:
+    """
+    Schrijft geïmporteerde rijen in batches weg en houdt de dagtotalen bij.
+
+    activity_log: de activity log van de tracker
+    manual_entries: JsonEntrySource met de handmatige entries
+    rollups: DailyRollups (of None)
+    rate: functie(project) -> uurtarief
+    manual_rollup: functie(entry) -> rollup record voor een handmatige entry
+    """
+
+    def __init__(self, activity_log, manual_entries, rollups=None, rate=None,
+                 manual_rollup=None, batch_size=BATCH_SIZE, progress=print):
+        self.activity_log = activity_log
+        self.manual_entries = manual_entries
+        self.rollups = rollups
+        self.rate = rate or (lambda project: 0)
+        self.manual_rollup = manual_rollup
+        self.batch_size = batch_size
+        self.progress = progress
+        archive = getattr(activity_log, 'archive', None)
+        self.archived = set(archive.months()) if archive is not None else set()
+
+    def run(self, path, kind=None, projects=None):
+        """
+        Importeer een bestand. Retourneert statistieken: read, imported,
+        duplicates, archived (overgeslagen), invalid, hours, segments en
+        seconds.
+        """
+        kind = kind or detect_format(path)
+        stats = {'format': kind, 'read': 0, 'imported': 0, 'duplicates': 0,
+                 'archived': 0, 'invalid': 0, 'hours': 0.0, 'segments': 0}
+        self.started = self.reported = time.monotonic()
+
+        if kind == 'activity':
+            self._keys = (None, set())  # (datum, vingerafdrukken van de rijen op die datum)
+            self.previous = None
+            self.segment = None
+            # Een CSV log moet chronologisch blijven: oudere rijen gaan naar een segment
+            self.log_last = (self.activity_log.last_date() or ''
+                             if hasattr(self.activity_log, 'segment_writer') else None)
+            self._import(read_activity(path), self._is_logged, self._write_activity, stats)
+            self._close_segment(stats)
+        elif kind == 'timesheet':
+            self._import(read_timesheet(path, stats), self._is_manual, self._write_manual, stats)
+        elif kind == 'webapp':
+            self._import(read_webapp(path, stats, projects), self._is_manual,
+                         self._write_manual, stats)
+        else:
+            raise ValueError(f"Onbekend formaat: {kind}")
+
+        stats['seconds'] = time.monotonic() - self.started
+        return stats
+
+    def _import(self, records, skip, write, stats):
+        self.batch, self.write, self.stats = [], write, stats
+        for record in records:
+            stats['read'] += 1
+            reason = skip(record)
+            if reason:
+                stats[reason] += 1
+            else:
+                self.batch.append(record)
+                if len(self.batch) >= self.batch_size:
+                    self.flush_batch()
+            if self.progress and time.monotonic() - self.reported >= PROGRESS_SECONDS:
+                self.reported = time.monotonic()
+                self.report(stats)
+        self.flush_batch()
+
+    def flush_batch(self):
+        if self.batch:
+            self.write(self.batch, self.stats)
+            self.batch = []
+
+    def report(self, stats):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        self.progress(f"  {stats['read']} gelezen, {stats['imported']} geïmporteerd, "
+                      f"{stats['duplicates']} dubbel ({stats['read'] / elapsed:.0f} rijen/s)")
+
+    # ==================== ACTIVITY LOG ====================
+
+    def _is_logged(self, record):
+        """
+        Reden om de rij over te slaan ('duplicates' of 'archived'), of None.
+        Vergelijkt vingerafdrukken (SQLite bewaart de ID niet) met de rijen
+        in de log op dezelfde datum. Springt het bestand terug in de tijd,
+        dan wordt eerst alles weggeschreven, zodat die rijen meetellen.
+        """
+        date = record['Datum']
+        if self.previous is not None and date < self.previous:
+            self.flush_batch()
+            self._close_segment(self.stats)
+        self.previous = date
+
+        current, keys = self._keys
+        if current != date:
+            keys = {activity_key(values) for values in self.activity_log.select(
+                KEY_FIELDS, date, date)}
+            self._keys = (date, keys)
+        if record['ID'] in keys:
+            return 'duplicates'
+        keys.add(record['ID'])
+        if date[:7] in self.archived:
+            # Gearchiveerde maanden worden alleen uit het archief gelezen
+            return 'archived'
+        return None
+
+    def _write_activity(self, records, stats):
+        """Schrijf een batch (oplopende datums) naar de log of een nieuw segment."""
+        rollup_records = []
+        for record in records:
+            rate = float(record.get('Tarief') or 0) or self.rate(record['Project'])
+            hours = float(record['Duur (uren)'] or 0)
+            record['Tarief'] = rate
+            record['Bedrag'] = round(hours * rate, 2)
+            rollup_records.append((
+                record['Datum'], 'auto', record['Project'], record['Categorie'],
+                record['Applicatie'], float(record['Duur (sec)'] or 0), hours, record['Bedrag']
+            ))
+            stats['hours'] += hours
+
+        older = 0
+        if self.log_last is not None:
+            older = next((i for i, r in enumerate(records) if r['Datum'] >= self.log_last),
+                         len(records))
+        if older:
+            if self.segment is None:
+                self.segment = self.activity_log.segment_writer()
+            self.segment.append_many(records[:older])
+        if older < len(records):
+            self.activity_log.append_many(records[older:])
+            if self.log_last is not None:
+                self.log_last = records[-1]['Datum']
+
+        if self.rollups is not None and self.rollups.exists():
+            self.rollups.add_many(rollup_records)
+        stats['imported'] += len(records)
+
+    def _close_segment(self, stats):
+        if self.segment is not None:
+            if self.segment.close() is not None:
+                stats['segments'] += 1
+            self.segment = None
+
+    # ==================== HANDMATIGE ENTRIES ====================
+
+    def _is_manual(self, entry):
+        return 'duplicates' if entry['id'] in self.manual_entries.by_id else None
+
+    def _write_manual(self, entries, stats):
+        # Dubbele entries binnen één batch maar één keer
+        unique = list({entry['id']: entry for entry in entries}.values())
+        stats['duplicates'] += len(entries) - len(unique)
+        self.manual_entries.add_many(unique)
+        if self.rollups is not None and self.rollups.exists() and self.manual_rollup:
+            self.rollups.add_many([self.manual_rollup(entry) for entry in unique])
+        stats['imported'] += len(unique)
+        stats['hours'] += sum(entry['hours'] for entry in unique)
+
+
+def add_projects(path, projects):
+    """Voeg projecten uit de browser app toe aan projects.json (als de naam nog ontbreekt)."""
+    if not projects:
+        return 0
+    with path_lock(path):
+        existing = []
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    existing = json.load(f)
+            except:
+                pass
+        names = {p.get('name') for p in existing}
+        added = 0
+        for project in projects.values():
+            if project['name'] in names:
+                continue
+            existing.append({
+                'id': str(project['id']),
+                'name': project['name'],
+                'color': project.get('color', '#3498db'),
+                'rate': project.get('rate', 0),
+            })
+            names.add(project['name'])
+            added += 1
+        if added:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(existing, f, indent=2, ensure_ascii=False)
+        return added
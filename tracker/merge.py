@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Logs van meerdere machines samenvoegen
+
+Wie de tracker op een laptop en een desktop draait heeft per machine een
+eigen activity_log_detailed.csv (met eventueel geroteerde, gecomprimeerde
+segmenten). merge_logs voegt die samen tot één chronologische log met een
+k-way merge over een heap: van elk chronologisch deel (segment of log)
+staat steeds maar één rij in het geheugen, hoe groot de logs ook zijn.
+
+Tijd die op twee machines tegelijk gelogd is wordt maar één keer geteld:
+de rij die het eerst begon houdt zijn tijd, een rij van een andere machine
+die daarmee overlapt wordt aan het begin ingekort (duur, uren en bedrag
+naar rato) of vervalt als hij er helemaal binnen valt. Rijen van dezelfde
+machine worden niet tegen elkaar ingekort (bijv. de uurrijen van de
+retentie, die op hetzelfde uur beginnen).
+"""
+
+import heapq
+from pathlib import Path
+
+from activity_store import (
+    SEGMENT_OPENERS, CsvActivityLog, clock, from_epoch, normalize_row, to_epoch
+)
+
+LOG_NAME = "activity_log_detailed.csv"
+BATCH_SIZE = 1000
+
+
+def open_runs(path):
+    """
+    Chronologische delen van één invoer: een CSV log (met zijn segmenten),
+    een los segment (.csv.gz / .csv.xz) of een data map met een
+    activity_log_detailed.csv.
+    """
+    path = Path(path)
+    if path.is_dir():
+        path = path / LOG_NAME
+    if path.suffix in SEGMENT_OPENERS:
+        # <log>.<eerste>_<laatste>.csv.gz hoort bij <log>.csv (dictionary, edits)
+        log = CsvActivityLog(path.with_name(path.name.split('.')[0] + '.csv'), use_index=False)
+        return log.runs([path])
+    if not path.exists():
+        raise FileNotFoundError(path)
+    return CsvActivityLog(path, use_index=False).runs()
+
+
+def _timed(rows, machine):
+    """(start, machine, rij) met de start in seconden sinds 1970."""
+    for row in rows:
+        try:
+            start = to_epoch(str(row.get('Datum', '')), str(row.get('Starttijd', '')))
+        except ValueError:
+            continue  # rij zonder geldige datum
+        yield start, machine, row
+
+
+def resolve_overlaps(timed_rows, stats):
+    """
+    Loop in volgorde van starttijd over (start, machine, rij) en kort rijen
+    in die overlappen met tijd die een andere machine al gelogd heeft.
+    Per machine wordt alleen bijgehouden tot wanneer hij tijd heeft
+    geclaimd, dus het geheugen hangt af van het aantal machines.
+    Een ingekorte rij begint later; hij wacht in een kleine heap tot alle
+    eerdere rijen geschreven zijn, zodat de uitvoer chronologisch blijft.
+    """
+    covered = {}  # machine -> einde (epoch) van de tot nu toe geclaimde tijd
+    pending = []  # (start, volgnummer, rij)
+    for number, (start, machine, row) in enumerate(timed_rows):
+        stats['rows'] += 1
+        while pending and pending[0][0] <= start:
+            yield heapq.heappop(pending)[2]
+
+        seconds = int(float(row.get('Duur (sec)') or 0))
+        end = start + seconds
+        cover = max((until for other, until in covered.items() if other != machine),
+                    default=None)
+
+        if cover is not None and seconds > 0 and start < cover:
+            if end <= cover:
+                stats['dropped'] += 1
+                stats['overlap_seconds'] += seconds
+                continue
+            # Alleen het deel na de overlap blijft over
+            row = normalize_row(row)
+            kept = end - cover
+            factor = kept / seconds
+            row['Datum'] = from_epoch(cover).strftime('%Y-%m-%d')
+            row['Starttijd'] = clock(cover)
+            row['Duur (sec)'] = kept
+            row['Duur (uren)'] = round(float(row['Duur (uren)'] or 0) * factor, 6)
+            row['Bedrag'] = round(float(row['Bedrag'] or 0) * factor, 6)
+            stats['trimmed'] += 1
+            stats['overlap_seconds'] += seconds - kept
+            start = cover
+
+        covered[machine] = max(covered.get(machine, end), end)
+        stats['kept'] += 1
+        heapq.heappush(pending, (start, number, row))
+
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def merge_logs(inputs, output, batch_size=BATCH_SIZE):
+    """
+    Voeg de logs in inputs samen tot een nieuwe log op output (die mag nog
+    niet bestaan). Retourneert statistieken: rows, kept, trimmed, dropped
+    en overlap_seconds.
+    """
+    output = Path(output)
+    if output.exists() and output.stat().st_size > 0:
+        raise FileExistsError(output)
+
+    streams = []
+    for machine, path in enumerate(inputs):
+        streams.extend(_timed(run, machine) for run in open_runs(path))
+
+    stats = {'inputs': len(inputs), 'runs': len(streams), 'rows': 0, 'kept': 0,
+             'trimmed': 0, 'dropped': 0, 'overlap_seconds': 0}
+    merged = heapq.merge(*streams, key=lambda item: item[0])
+
+    log = CsvActivityLog(output)
+    batch = []
+    for row in resolve_overlaps(merged, stats):
+        batch.append(normalize_row(row))
+        if len(batch) >= batch_size:
+            log.append_many(batch)
+            batch = []
+    if batch:
+        log.append_many(batch)
+    log.close()
+    return stats
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Overlap tussen entries van verschillende bronnen
+
+Een timer sessie (handmatig of tray) en de auto-tracked rijen van dezelfde
+periode beschrijven dezelfde tijd; zonder correctie wordt die dubbel
+geteld in de statistieken en exports. Hier wordt elke entry met een
+start- en eindtijd een interval (seconden sinds 1970):
+
+- IntervalIndex: gesorteerd op start met een prefix-maximum van de
+  eindtijden; opbouw O(n log n), daarna "wat deed ik om 14:32" en "wat
+  overlapt met dit interval" met een binary search.
+- resolve: per bron (in volgorde van voorrang) de vereniging van de
+  intervallen van de bronnen met meer voorrang; een entry telt alleen
+  voor het deel dat daar buiten valt. Ook O(n log n).
+
+Entries zonder tijden (handmatige uren zonder start/eind) tellen altijd
+volledig mee.
+"""
+
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+
+from activity_store import to_epoch
+
+DEFAULT_PRECEDENCE = ('manual', 'tray', 'auto')
+
+
+@lru_cache(maxsize=1 << 17)
+def _clock_seconds(value):
+    """'9:05' of '09:05:00' -> seconden na middernacht (None als ongeldig)."""
+    parts = value.strip().split(':')
+    if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts):
+        return None
+    parts += ['0'] * (3 - len(parts))
+    hours, minutes, seconds = (int(p) for p in parts)
+    if hours > 23 or minutes > 59 or seconds > 59:
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
+@lru_cache(maxsize=4096)
+def _midnight(date):
+    """Middernacht van een datum in seconden sinds 1970 (één strptime per dag)."""
+    return to_epoch(date, '00:00:00')
+
+
+def entry_interval(entry):
+    """(start, eind) van een entry in seconden sinds 1970, of None zonder tijden."""
+    start_time = _clock_seconds(str(entry.get('start_time') or ''))
+    if start_time is None:
+        return None
+    try:
+        start = _midnight(entry['date']) + start_time
+    except ValueError:
+        return None
+    end_time = _clock_seconds(str(entry.get('end_time') or ''))
+    if end_time is not None:
+        end = start - start_time + end_time
+        if end < start:
+            end += 86400  # over middernacht
+    else:
+        end = start + int(round(float(entry.get('hours') or 0) * 3600))
+    return (start, end) if end > start else None
+
+
+class IntervalIndex:
+    """Intervallen van entries, voor punt- en bereikvragen."""
+
+    def __init__(self, entries):
+        items = []
+        for entry in entries:
+            interval = entry_interval(entry)
+            if interval:
+                items.append((interval[0], interval[1], entry))
+        items.sort(key=lambda item: (item[0], item[1]))
+        self.starts = [start for start, _, _ in items]
+        self.ends = [end for _, end, _ in items]
+        self.entries = [entry for _, _, entry in items]
+        # Grootste eindtijd t/m positie i: teruglopen kan stoppen zodra die <= t is
+        self.max_end = list(accumulate(self.ends, max))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def overlapping(self, start, end):
+        """Entries waarvan het interval [start, end) raakt, op volgorde van start."""
+        result = []
+        i = bisect_left(self.starts, end) - 1
+        while i >= 0 and self.max_end[i] > start:
+            if self.ends[i] > start:
+                result.append(self.entries[i])
+            i -= 1
+        result.reverse()
+        return result
+
+    def at(self, moment):
+        """Entries die op moment (seconden sinds 1970) liepen."""
+        return self.overlapping(moment, moment + 1)
+
+
+def _union(intervals):
+    """Vereniging van (start, eind) paren als gesorteerde, disjuncte lijsten."""
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _covered(union, start, end):
+    """Aantal seconden van [start, end) binnen een vereniging."""
+    starts, ends = union
+    covered = 0
+    i = bisect_left(starts, end) - 1
+    while i >= 0 and ends[i] > start:
+        covered += min(end, ends[i]) - max(start, starts[i])
+        i -= 1
+    return max(covered, 0)
+
+
+def resolve(entries, precedence=DEFAULT_PRECEDENCE):
+    """
+    Geef per entry (in de oorspronkelijke volgorde) (entry, overlap
+    seconden, bronnen) terug: het aantal seconden dat al door een bron
+    met meer voorrang gedekt wordt en welke bronnen dat zijn. Bronnen die
+    niet in precedence staan komen achteraan. Overlap binnen dezelfde bron
+    wordt niet gecorrigeerd.
+    """
+    entries = list(entries)
+    rank = {source: i for i, source in enumerate(precedence)}
+    levels = {}
+    for position, entry in enumerate(entries):
+        interval = entry_interval(entry)
+        if interval:
+            level = (rank.get(entry['source'], len(precedence)), entry['source'])
+            levels.setdefault(level, []).append((position, interval))
+
+    result = [(entry, 0, ()) for entry in entries]
+    higher = ([], [])  # vereniging van alle bronnen met meer voorrang
+    per_source = []  # (bron, vereniging) van de bronnen met meer voorrang
+    for level in sorted(levels):
+        items = levels[level]
+        for position, (start, end) in items:
+            covered = _covered(higher, start, end)
+            if covered:
+                sources = tuple(name for name, union in per_source
+                                if _covered(union, start, end))
+                result[position] = (entries[position], covered, sources)
+        intervals = [interval for _, interval in items]
+        per_source.append((level[1], _union(intervals)))
+        higher = _union(list(zip(*higher)) + intervals)
+    return result
+
+
+def resolved_entries(entries, precedence=DEFAULT_PRECEDENCE):
+    """
+    Entries met uren en bedrag verminderd met het deel dat al door een bron
+    met meer voorrang geteld is; volledig gedekte entries vallen weg.
+    """
+    for entry, covered, _ in resolve(entries, precedence):
+        if not covered:
+            yield entry
+            continue
+        start, end = entry_interval(entry)
+        factor = 1 - covered / (end - start)
+        if factor <= 0:
+            continue
+        entry = dict(entry)
+        entry['hours'] = round(entry['hours'] * factor, 6)
+        entry['amount'] = round(float(entry.get('amount') or 0) * factor, 2)
+        yield entry
+
+
+def duplicate_totals(entries, precedence=DEFAULT_PRECEDENCE):
+    """Dubbel getelde uren en bedrag per (datum, bron): {(datum, bron): [uren, bedrag]}."""
+    totals = {}
+    for entry, covered, _ in resolve(entries, precedence):
+        if covered:
+            start, end = entry_interval(entry)
+            fraction = covered / (end - start)
+            total = totals.setdefault((entry['date'], entry['source']), [0.0, 0.0])
+            total[0] += entry['hours'] * fraction
+            total[1] += float(entry.get('amount') or 0) * fraction
+    return totals
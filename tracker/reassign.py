@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Uren in bulk naar een ander project verplaatsen
+
+Verkeerd toegewezen auto-tracked uren (bijv. alle GitHub tijd van een
+maand die bij Klant A hoort) corrigeren zonder ze per scherm te
+selecteren: alle rijen die aan een filter voldoen (periode, applicatie,
+URL host, stuk van de venstertitel, huidig project) krijgen in één keer
+een ander Project, met het Tarief van dat project en een opnieuw
+berekend Bedrag.
+
+De log zelf wordt daarvoor niet herschreven: een CSV log krijgt
+reassign records in zijn edits bestand (die compact later verwerkt),
+SQLite een UPDATE op de primary key en gearchiveerde maanden worden
+één keer herschreven. De dagtotalen worden met het verschil bijgewerkt.
+"""
+
+from sketches import url_host
+
+
+def row_filter(app=None, host=None, title=None, project=None):
+    """
+    Filterfunctie voor rijen; lege criteria doen niet mee. app en project
+    moeten gelijk zijn (hoofdletterongevoelig), host komt overeen met de
+    host van de URL of een subdomein daarvan, title is een stuk van de
+    venstertitel.
+    """
+    app = (app or '').lower()
+    host = (host or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    title = (title or '').lower()
+    project = (project or '').lower()
+
+    def matches(row):
+        if app and str(row.get('Applicatie', '')).lower() != app:
+            return False
+        if project and str(row.get('Project', '')).lower() != project:
+            return False
+        if title and title not in str(row.get('Venstertitel', '')).lower():
+            return False
+        if host:
+            row_host = url_host(str(row.get('URL', ''))).lower()
+            if row_host != host and not row_host.endswith('.' + host):
+                return False
+        return True
+    return matches
+
+
+def _rollup_record(row, project, amount, sign=1):
+    """Rollup record (zie auto_rollup_records) voor een rij, met sign=-1 om af te trekken."""
+    return (
+        row.get('Datum', ''), 'auto', project, row.get('Categorie', ''), row.get('Applicatie', ''),
+        sign * float(row.get('Duur (sec)', 0) or 0), sign * float(row.get('Duur (uren)', 0) or 0),
+        sign * amount
+    )
+
+
+def bulk_reassign(log, project, rate=None, start_date=None, end_date=None, matches=None,
+                  rollups=None, dry_run=False):
+    """
+    Zet alle rijen van log binnen de periode waarvoor matches(rij) waar is
+    op project (met rate ook Tarief en Bedrag). Rijen die al op dat project
+    en tarief staan tellen niet mee. Met dry_run wordt alleen geteld.
+
+    Retourneert statistieken: rows, hours, amount_before, amount_after en
+    per oud project de verplaatste uren (projects).
+    """
+    stats = {'rows': 0, 'hours': 0.0, 'amount_before': 0.0, 'amount_after': 0.0, 'projects': {}}
+    ids = []
+    records = []
+    # Eerst alles verzamelen: het archief mag niet herschreven worden terwijl
+    # er nog uit gelezen wordt, en zo gaat er één batch naar de log
+    for row in log.rows(start_date, end_date):
+        if matches and not matches(row):
+            continue
+        old_project = row.get('Project', '')
+        old_amount = float(row.get('Bedrag', 0) or 0)
+        hours = float(row.get('Duur (uren)', 0) or 0)
+        if rate is None:
+            new_amount = old_amount
+        else:
+            new_amount = round(hours * float(rate), 2)
+        if old_project == project and (rate is None or float(row.get('Tarief', 0) or 0) == float(rate)):
+            continue
+
+        stats['rows'] += 1
+        stats['hours'] += hours
+        stats['amount_before'] += old_amount
+        stats['amount_after'] += new_amount
+        stats['projects'][old_project] = stats['projects'].get(old_project, 0) + hours
+        ids.append(row['ID'])
+        if rollups is not None:
+            records.append(_rollup_record(row, old_project, old_amount, -1))
+            records.append(_rollup_record(row, project, new_amount))
+
+    if dry_run or not ids:
+        return stats
+
+    log.reassign(ids, project, rate)
+    if records and rollups.exists():
+        rollups.add_many(records)
+    return stats
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Persistente LRU cache voor leesresultaten (samenvattingen, statistieken).
+
+Een resultaat wordt opgeslagen onder de naam van de functie plus de
+query-parameters, samen met de dataversie waarop het berekend is (grootte
+en mtime van de bronbestanden, zie file_version). Bij een andere versie
+telt het als een miss en wordt het opnieuw berekend. Omdat de cache op
+schijf staat, is een samenvatting van een afgesloten dag ook na het
+herstarten van de app of de CLI direct beschikbaar.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+from activity_store import path_lock
+
+MAX_ENTRIES = 256
+
+
+def file_version(*paths):
+    """Versie van een reeks bestanden: [[grootte, mtime_ns] of None per pad]."""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append([stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            version.append(None)
+    return version
+
+
+class ResultCache:
+    """
+    LRU cache van {sleutel: [versie, resultaat]} in één JSON bestand.
+    Resultaten moeten JSON-serialiseerbaar zijn (tuples komen terug als lists).
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.lock = path_lock(self.path)
+        self.entries = OrderedDict()
+        self._stat = None
+
+    def _refresh(self):
+        """Laad het bestand opnieuw als een ander proces het gewijzigd heeft."""
+        stat = file_version(self.path)[0]
+        if stat == self._stat:
+            return
+        self._stat = stat
+        self.entries = OrderedDict()
+        if stat is None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(list(self.entries.items()), f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+            self._stat = file_version(self.path)[0]
+        except OSError:
+            pass
+
+    @staticmethod
+    def key(name, params):
+        return json.dumps([name, params], sort_keys=True, ensure_ascii=False)
+
+    def cached(self, name, params, version, compute):
+        """Resultaat van compute() voor (name, params), zolang version gelijk is."""
+        key = self.key(name, params)
+        # Via JSON zodat een hit en een miss hetzelfde type teruggeven
+        version = json.loads(json.dumps(version))
+        with self.lock:
+            self._refresh()
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                return entry[1]
+
+        result = json.loads(json.dumps(compute(), ensure_ascii=False))
+        with self.lock:
+            self._refresh()
+            self.entries[key] = [version, result]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._save()
+        return result
+
+    def invalidate(self):
+        """Gooi alle resultaten weg (na verwijderen of een gewijzigde regel)."""
+        with self.lock:
+            self.entries = OrderedDict()
+            self._save()
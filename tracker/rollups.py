@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Gematerialiseerde dagtotalen voor Tijdregistratie
+
+Bij elke geschreven activiteit of handmatige entry worden per dag de
+totalen (seconden, uren, bedrag) bijgewerkt per project, categorie en
+applicatie. Statistieken en samenvattingen lezen dan een paar honderd
+totalen in plaats van de complete historie opnieuw op te tellen.
+
+Opslag: één JSON bestand per maand (<map>/2026-10.json):
+    {datum: {bron: {dimensie: {sleutel: [seconden, uren, bedrag]}}}}
+
+Bronnen: 'auto' (activity log), 'manual' (handmatig/timer), 'timer' (tray)
+
+Elke schrijfactie verhoogt de tellers in <map>/GENERATION (per maand en
+in totaal); caches gebruiken die als dataversie, omdat mtime en grootte
+van een bestand dat in place of binnen dezelfde tick wijzigt niet
+betrouwbaar zijn.
+
+Daarnaast staat in <map>/prefix.bin een Fenwick index over de dagtotalen
+per project, zodat het totaal over een willekeurige periode (factuur-
+periode, week, maand) O(log dagen) kost in plaats van een scan.
+"""
+
+import array
+import json
+import mmap
+import os
+import struct
+from datetime import date as _date
+from pathlib import Path
+
+from activity_store import path_lock
+
+DIMENSIONS = ('project', 'category', 'app')
+
+INDEX_MAGIC = b'TTFENW1\n'
+# magic, dirty, capaciteit (dagen), basisdag (ordinal), aantal bomen, generatie
+_INDEX_HEADER = struct.Struct('<8sIIIII4x')
+_NODE = struct.Struct('<3d')  # seconden, uren, bedrag
+
+
+def _add_totals(target, values):
+    """Tel [seconden, uren, bedrag] op bij target (in place)."""
+    for i, value in enumerate(values):
+        target[i] = round(target[i] + value, 6)
+
+
+def _ordinal(day):
+    return _date.fromisoformat(day).toordinal()
+
+
+class PrefixSumIndex:
+    """
+    Fenwick (binary indexed) bomen over de dagtotalen per (bron, project),
+    plus per bron één boom met het totaal van alle projecten.
+
+    prefix.bin: header, dan per boom `capaciteit` nodes van drie doubles.
+    De sleutels van de bomen staan in prefix.keys. Een nieuwe
+    activiteit werkt O(log dagen) nodes in place bij; een periode-totaal
+    leest er evenveel. Tijdens schrijven staat de dirty vlag aan: na een
+    crash wordt de index opnieuw opgebouwd uit de rollups.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.keys_path = self.path.with_suffix('.keys')
+        self.lock = path_lock(self.path)
+        self._keys = (None, [])  # (generatie, [(bron, project), ...])
+
+    def _read_header(self, f):
+        f.seek(0)
+        data = f.read(_INDEX_HEADER.size)
+        if len(data) < _INDEX_HEADER.size:
+            return None
+        header = _INDEX_HEADER.unpack(data)
+        return header if header[0] == INDEX_MAGIC else None
+
+    def _load_keys(self, generation, count):
+        """Sleutels van de bomen (None als ze niet bij de index horen)."""
+        if self._keys[0] != generation or len(self._keys[1]) < count:
+            try:
+                with open(self.keys_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._keys = (data['generation'], [tuple(k) for k in data['keys']])
+            except (OSError, ValueError, KeyError):
+                return None
+        if self._keys[0] != generation or len(self._keys[1]) < count:
+            return None
+        return self._keys[1][:count]
+
+    def _save_keys(self, generation, keys):
+        tmp = self.keys_path.with_name(self.keys_path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'generation': generation, 'keys': keys}, f, ensure_ascii=False)
+        os.replace(tmp, self.keys_path)
+        self._keys = (generation, [tuple(k) for k in keys])
+
+    def mark_dirty(self):
+        """Zet de dirty vlag (vóór het bijwerken van de rollups zelf)."""
+        with self.lock:
+            try:
+                with open(self.path, 'r+b') as f:
+                    if self._read_header(f):
+                        f.seek(8)
+                        f.write(struct.pack('<I', 1))
+            except OSError:
+                pass
+
+    def add_many(self, records):
+        """
+        Verwerk (datum, bron, project, seconden, uren, bedrag) records.
+        Retourneert False als de index (opnieuw) opgebouwd moet worden:
+        ontbreekt, is dirty of een datum valt buiten de capaciteit.
+        """
+        with self.lock:
+            try:
+                f = open(self.path, 'r+b')
+            except OSError:
+                return False
+            with f:
+                header = self._read_header(f)
+                if header is None:
+                    return False
+                _, dirty, capacity, base, count, generation = header
+                keys = self._load_keys(generation, count)
+                if keys is None or dirty:
+                    return False
+
+                deltas = {}
+                for day, source, project, seconds, hours, amount in records:
+                    position = _ordinal(day) - base + 1
+                    if not 1 <= position <= capacity:
+                        return False
+                    for key in ((source, project or ''), (source, None)):
+                        delta = deltas.setdefault((key, position), [0.0, 0.0, 0.0])
+                        delta[0] += seconds
+                        delta[1] += hours
+                        delta[2] += amount
+
+                # Nieuwe bomen achteraan toevoegen (eerst de sleutels)
+                positions = {key: i for i, key in enumerate(keys)}
+                new_keys = sorted({key for key, _ in deltas if key not in positions},
+                                  key=lambda k: (k[0], k[1] is not None, k[1] or ''))
+                if new_keys:
+                    keys = keys + new_keys
+                    self._save_keys(generation, [list(k) for k in keys])
+                    f.seek(_INDEX_HEADER.size + count * capacity * _NODE.size)
+                    f.write(bytes(len(new_keys) * capacity * _NODE.size))
+                    positions = {key: i for i, key in enumerate(keys)}
+
+                f.seek(0)
+                f.write(_INDEX_HEADER.pack(INDEX_MAGIC, 1, capacity, base, len(keys), generation))
+                f.flush()
+                for (key, position), delta in deltas.items():
+                    offset = _INDEX_HEADER.size + positions[key] * capacity * _NODE.size
+                    while position <= capacity:
+                        node_offset = offset + (position - 1) * _NODE.size
+                        f.seek(node_offset)
+                        values = _NODE.unpack(f.read(_NODE.size))
+                        f.seek(node_offset)
+                        f.write(_NODE.pack(*(v + d for v, d in zip(values, delta))))
+                        position += position & -position
+                f.seek(8)
+                f.write(struct.pack('<I', 0))
+        return True
+
+    def rebuild(self, snapshot, today=None):
+        """Bouw de index opnieuw op uit een rollups snapshot ({datum: {bron: ...}})."""
+        days = sorted(snapshot)
+        last = max(days[-1] if days else '', today or _date.today().isoformat())
+        base = (_ordinal(days[0]) if days else _ordinal(last)) - 366
+        capacity = 1024
+        while capacity < _ordinal(last) - base + 1 + 2 * 366:
+            capacity *= 2
+
+        trees = {}
+        for day in days:
+            position = _ordinal(day) - base + 1
+            for source, dimensions in snapshot[day].items():
+                for project, values in dimensions.get('project', {}).items():
+                    for key in ((source, project), (source, None)):
+                        tree = trees.get(key)
+                        if tree is None:
+                            tree = trees[key] = array.array('d', bytes(capacity * _NODE.size))
+                        for i in range(3):
+                            tree[(position - 1) * 3 + i] += values[i]
+
+        # O(n) opbouw: tel elke node op bij zijn ouder
+        for tree in trees.values():
+            for position in range(1, capacity + 1):
+                parent = position + (position & -position)
+                if parent <= capacity:
+                    for i in range(3):
+                        tree[(parent - 1) * 3 + i] += tree[(position - 1) * 3 + i]
+
+        keys = sorted(trees, key=lambda k: (k[0], k[1] is not None, k[1] or ''))
+        with self.lock:
+            generation = (self._keys[0] or 0) + 1
+            try:
+                with open(self.path, 'rb') as f:
+                    header = self._read_header(f)
+                    if header:
+                        generation = max(generation, header[5] + 1)
+            except OSError:
+                pass
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._save_keys(generation, [list(k) for k in keys])
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(_INDEX_HEADER.pack(INDEX_MAGIC, 0, capacity, base, len(keys), generation))
+                for key in keys:
+                    f.write(trees[key].tobytes())
+            os.replace(tmp, self.path)
+
+    def totals(self, start_date, end_date, sources=None, by_project=True):
+        """
+        Totalen over een periode: {project: [seconden, uren, bedrag]} of
+        (by_project=False) {bron: [...]}. None als de index niet bruikbaar is.
+        """
+        with self.lock:
+            try:
+                f = open(self.path, 'rb')
+            except OSError:
+                return None
+            with f:
+                header = self._read_header(f)
+                if header is None or header[1]:
+                    return None
+                _, _, capacity, base, count, generation = header
+                keys = self._load_keys(generation, count)
+                if keys is None:
+                    return None
+                if not count:
+                    return {}
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    low = min(max(_ordinal(start_date) - base, 0), capacity)
+                    high = min(max(_ordinal(end_date) - base + 1, 0), capacity)
+                    result = {}
+                    for index, (source, project) in enumerate(keys):
+                        if (sources and source not in sources) or \
+                                (project is None) == by_project:
+                            continue
+                        offset = _INDEX_HEADER.size + index * capacity * _NODE.size
+                        values = [0.0, 0.0, 0.0]
+                        for position, sign in ((high, 1), (low, -1)):
+                            while position > 0:
+                                node = _NODE.unpack_from(data, offset + (position - 1) * _NODE.size)
+                                for i in range(3):
+                                    values[i] += sign * node[i]
+                                position -= position & -position
+                        target = result.setdefault(project if by_project else source, [0, 0, 0])
+                        _add_totals(target, values)
+                    return {key: values for key, values in result.items() if any(values)}
+
+
+class DailyRollups:
+    """Dagtotalen per project, categorie en applicatie."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._cache = {}  # maand -> ((inode, mtime_ns, size), data)
+        self.index = PrefixSumIndex(self.directory / 'prefix.bin')
+        self._update_index = True
+
+    def exists(self):
+        """Zijn de rollups al eens opgebouwd?"""
+        return (self.directory / 'VERSION').exists()
+
+    def generations(self):
+        """Schrijftellers: {maand: n, '': totaal} (leeg als er nog niets geschreven is)."""
+        try:
+            with open(self.directory / 'GENERATION', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def generation(self, months=None):
+        """Schrijfteller van de maanden, of (zonder maanden) van alle rollups."""
+        generations = self.generations()
+        if months:
+            return [generations.get(month, 0) for month in months]
+        return generations.get('', 0)
+
+    def _bump_generation(self, months):
+        """Verhoog de tellers (onder path_lock(map))."""
+        generations = self.generations()
+        for month in list(months) + ['']:
+            generations[month] = generations.get(month, 0) + 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / 'GENERATION'
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(generations, f, sort_keys=True)
+        os.replace(tmp, path)
+
+    def month_path(self, month):
+        return self.directory / f"{month}.json"
+
+    def _load_month(self, month):
+        """Laad een maandbestand (gecached zolang het bestand niet wijzigt)."""
+        path = self.month_path(month)
+        try:
+            stat = path.stat()
+        except OSError:
+            return {}
+
+        # Andere processen vervangen het bestand (os.replace): nieuwe inode
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(month)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self._cache[month] = (version, data)
+        return data
+
+    def _save_month(self, month, data):
+        """Schrijf een maandbestand atomisch weg."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.month_path(month)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+        stat = path.stat()
+        self._cache[month] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), data)
+
+    def add(self, date, source, project, category, app, seconds, hours, amount):
+        """Tel een activiteit op bij de totalen van zijn dag."""
+        self.add_many([(date, source, project, category, app, seconds, hours, amount)])
+
+    def remove(self, date, source, project, category, app, seconds, hours, amount):
+        """Trek een (verwijderde) activiteit af van de totalen."""
+        self.add(date, source, project, category, app, -seconds, -hours, -amount)
+
+    def add_many(self, records):
+        """Verwerk meerdere (date, source, project, category, app, sec, uren, bedrag) tuples."""
+        by_month = {}
+        for record in records:
+            by_month.setdefault(record[0][:7], []).append(record)
+
+        with path_lock(self.directory):
+            update_index = self._update_index and self.exists()
+            if update_index:
+                self.index.mark_dirty()
+            index_records = []
+            for month, month_records in by_month.items():
+                data = self._load_month(month)
+                for date, source, project, category, app, seconds, hours, amount in month_records:
+                    values = (float(seconds), float(hours), float(amount))
+                    day = data.setdefault(date, {}).setdefault(source, {})
+                    for dimension, key in zip(DIMENSIONS, (project, category, app)):
+                        totals = day.setdefault(dimension, {}).setdefault(key or '', [0, 0, 0])
+                        _add_totals(totals, values)
+                    index_records.append((date, source, project, *values))
+                self._save_month(month, data)
+            if by_month:
+                self._bump_generation(by_month)
+
+            if update_index and not self.index.add_many(index_records):
+                self.index.rebuild(self.snapshot())
+
+    def day(self, date, dimension='project', sources=None):
+        """Totalen van één dag: {sleutel: [seconden, uren, bedrag]}."""
+        return self.totals(date, date, dimension, sources)
+
+    def _days(self, start_date, end_date):
+        """Itereer (datum, per-bron data) voor alle dagen in de periode."""
+        if not self.directory.exists():
+            return
+        for path in sorted(self.directory.glob('*.json')):
+            month = path.stem
+            if month < start_date[:7] or month > end_date[:7]:
+                continue
+            for date, day in sorted(self._load_month(month).items()):
+                if start_date <= date <= end_date:
+                    yield date, day
+
+    def totals(self, start_date, end_date, dimension='project', sources=None):
+        """Totalen over een periode per sleutel van een dimensie."""
+        result = {}
+        for _, day in self._days(start_date, end_date):
+            for source, dimensions in day.items():
+                if sources and source not in sources:
+                    continue
+                for key, values in dimensions.get(dimension, {}).items():
+                    _add_totals(result.setdefault(key, [0, 0, 0]), values)
+        return result
+
+    def per_day(self, start_date, end_date, sources=None):
+        """Dagtotalen over een periode: {datum: [seconden, uren, bedrag]}."""
+        result = {}
+        for date, day in self._days(start_date, end_date):
+            for source, dimensions in day.items():
+                if sources and source not in sources:
+                    continue
+                for values in dimensions.get('project', {}).values():
+                    _add_totals(result.setdefault(date, [0, 0, 0]), values)
+        return result
+
+    def range_totals(self, start_date, end_date, sources=None):
+        """
+        Totalen per project over een willekeurige periode via de Fenwick
+        index (O(log dagen) per project); valt terug op een scan als de
+        index (nog) niet bruikbaar is.
+        """
+        result = self._indexed(start_date, end_date, sources, True)
+        if result is None:
+            result = self.totals(start_date, end_date, 'project', sources)
+        return result
+
+    def range_total(self, start_date, end_date, sources=None):
+        """Totaal [seconden, uren, bedrag] over een periode (alle projecten)."""
+        result = [0, 0, 0]
+        per_source = self._indexed(start_date, end_date, sources, False)
+        if per_source is None:
+            per_source = self.totals(start_date, end_date, 'project', sources)
+        for values in per_source.values():
+            _add_totals(result, values)
+        return result
+
+    def _indexed(self, start_date, end_date, sources, by_project):
+        result = self.index.totals(start_date, end_date, sources, by_project)
+        if result is None and self.exists():
+            # Index ontbreekt of is na een crash dirty: opnieuw opbouwen
+            with path_lock(self.directory):
+                self.index.rebuild(self.snapshot())
+            result = self.index.totals(start_date, end_date, sources, by_project)
+        return result
+
+    def rebuild(self, records, batch_size=5000):
+        """
+        Bouw alle rollups opnieuw op uit ruwe data.
+        records: iterable van (date, source, project, category, app, sec, uren, bedrag).
+        """
+        with path_lock(self.directory):
+            months = []
+            if self.directory.exists():
+                for path in self.directory.glob('*.json'):
+                    months.append(path.stem)
+                    path.unlink()
+            self._cache = {}
+            # Ook maanden die na de rebuild leeg zijn krijgen een nieuwe versie
+            self._bump_generation(months)
+
+            # De index wordt aan het eind in één keer opgebouwd
+            self._update_index = False
+            try:
+                batch = []
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        self.add_many(batch)
+                        batch = []
+                if batch:
+                    self.add_many(batch)
+            finally:
+                self._update_index = True
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.index.rebuild(self.snapshot())
+            (self.directory / 'VERSION').write_text('1\n')
+
+    def snapshot(self):
+        """Alle rollups als één dict (voor vergelijking met een volledige scan)."""
+        result = {}
+        if self.directory.exists():
+            for path in sorted(self.directory.glob('*.json')):
+                result.update(self._load_month(path.stem))
+        return result
+
+
+def compare_rollups(expected, actual, tolerance=0.005):
+    """
+    Vergelijk twee snapshots; retourneert een lijst met verschillen
+    als (datum, bron, dimensie, sleutel, verwacht, gevonden).
+    """
+    differences = []
+    for date in sorted(set(expected) | set(actual)):
+        for source in sorted(set(expected.get(date, {})) | set(actual.get(date, {}))):
+            exp_source = expected.get(date, {}).get(source, {})
+            act_source = actual.get(date, {}).get(source, {})
+            for dimension in DIMENSIONS:
+                exp_dim = exp_source.get(dimension, {})
+                act_dim = act_source.get(dimension, {})
+                for key in sorted(set(exp_dim) | set(act_dim)):
+                    exp_values = exp_dim.get(key, [0, 0, 0])
+                    act_values = act_dim.get(key, [0, 0, 0])
+                    if any(abs(a - b) > tolerance for a, b in zip(exp_values, act_values)):
+                        differences.append((date, source, dimension, key, exp_values, act_values))
+    return differences
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Streaming sketches voor analyses over jaren aan URL en titel data
+
+Exacte tellingen (alle unieke URLs of titels in een dict) groeien mee met
+de historie. Deze sketches hebben een vaste grootte, worden in één pass
+over de rijen gevuld en zijn samen te voegen, zodat de sketches per dag
+bewaard kunnen worden en een periode (of meerdere machines) uit de
+opgeslagen dagen samengesteld wordt:
+
+- HyperLogLog: aantal unieke waarden (sites, titels), ~1.6% fout
+- CountMinSketch + kandidaten heap: tijd per domein en de top N domeinen
+- TDigest: percentielen van de sessieduur
+
+Opslag: <map>/2026-10.json met per dag de geserialiseerde sketches en de
+versie van de data waaruit ze berekend zijn (zie SketchStore).
+"""
+
+import array
+import base64
+import calendar
+import hashlib
+import heapq
+import json
+import math
+import os
+import zlib
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from activity_store import path_lock
+
+FORMAT = 1
+SESSION_GAP = 60  # seconden pauze waarna een nieuwe sessie begint
+TOP_CANDIDATES = 64  # domeinen die per dag als kandidaat voor de top N bewaard worden
+
+
+def _digest(value):
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+
+
+def _pack(data):
+    return base64.b64encode(zlib.compress(bytes(data))).decode('ascii')
+
+
+def _unpack(text):
+    return zlib.decompress(base64.b64decode(text))
+
+
+def url_host(url):
+    """'https://www.github.com/org' -> 'github.com' ('' als er geen host is)."""
+    if not url:
+        return ''
+    try:
+        host = urlsplit(url if '//' in url else f"//{url}").hostname or ''
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+class HyperLogLog:
+    """Schatting van het aantal unieke waarden in 2^p registers."""
+
+    def __init__(self, p=12, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    def add(self, value):
+        x = int.from_bytes(_digest(value)[:8], 'big')
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)  # kleine aantallen: linear counting
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'p': self.p, 'r': _pack(self.registers)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['p'], _unpack(data['r']))
+
+
+class CountMinSketch:
+    """
+    Geschatte som per sleutel (hier: seconden per domein) in depth rijen
+    van width tellers; een schatting is nooit te laag.
+    """
+
+    def __init__(self, width=512, depth=4, counts=None):
+        self.width = width
+        self.depth = depth
+        self.counts = array.array('Q', counts if counts is not None else bytes(8 * width * depth))
+
+    def _cells(self, value):
+        digest = _digest(value)
+        a = int.from_bytes(digest[:8], 'big')
+        b = int.from_bytes(digest[8:], 'big') | 1
+        return [row * self.width + (a + row * b) % self.width for row in range(self.depth)]
+
+    def add(self, value, weight=1):
+        for cell in self._cells(value):
+            self.counts[cell] += weight
+
+    def estimate(self, value):
+        return min(self.counts[cell] for cell in self._cells(value))
+
+    def merge(self, other):
+        for cell, count in enumerate(other.counts):
+            self.counts[cell] += count
+        return self
+
+    def to_dict(self):
+        return {'w': self.width, 'd': self.depth, 'c': _pack(self.counts.tobytes())}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['w'], data['d'], _unpack(data['c']))
+
+
+class TopDomains:
+    """
+    Count-min sketch met een heap van de zwaarste kandidaten, zodat de top
+    N bepaald kan worden zonder alle domeinen te bewaren.
+    """
+
+    def __init__(self, sketch=None, candidates=(), size=TOP_CANDIDATES):
+        self.sketch = sketch or CountMinSketch()
+        self.size = size
+        self.candidates = {}  # domein -> laatste schatting
+        self.heap = []  # (schatting, domein), met verouderde entries
+        for domain in candidates:
+            self._offer(domain)
+
+    def _offer(self, domain):
+        estimate = self.sketch.estimate(domain)
+        if domain not in self.candidates:
+            # Vol: alleen opnemen als hij de lichtste kandidaat verdringt
+            while len(self.candidates) >= self.size:
+                lightest, name = self.heap[0]
+                if self.candidates.get(name) != lightest:
+                    heapq.heappop(self.heap)
+                    continue
+                if estimate <= lightest:
+                    return
+                heapq.heappop(self.heap)
+                del self.candidates[name]
+        self.candidates[domain] = estimate
+        heapq.heappush(self.heap, (estimate, domain))
+        if len(self.heap) > 4 * self.size:
+            self.heap = [(e, d) for d, e in self.candidates.items()]
+            heapq.heapify(self.heap)
+
+    def add(self, domain, weight):
+        self.sketch.add(domain, weight)
+        self._offer(domain)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        for domain in list(self.candidates) + list(other.candidates):
+            self.candidates.pop(domain, None)
+            self._offer(domain)
+        return self
+
+    def top(self, n):
+        """[(domein, geschatte seconden)], zwaarste eerst."""
+        return heapq.nlargest(n, ((d, self.sketch.estimate(d)) for d in self.candidates),
+                              key=lambda item: item[1])
+
+    def to_dict(self):
+        return {'cms': self.sketch.to_dict(), 'top': sorted(self.candidates)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(CountMinSketch.from_dict(data['cms']), data['top'])
+
+
+class TDigest:
+    """
+    Merging t-digest: gewogen centroids, fijn aan de randen en grof in het
+    midden, voor percentielen met een vaste hoeveelheid geheugen.
+    """
+
+    def __init__(self, compression=100, centroids=(), minimum=None, maximum=None):
+        self.compression = compression
+        self.centroids = [list(c) for c in centroids]
+        self.buffer = []
+        self.min = minimum
+        self.max = maximum
+
+    def add(self, value, weight=1):
+        self.buffer.append([value, weight])
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.buffer) >= 5 * self.compression:
+            self.compress()
+
+    def compress(self):
+        if not self.buffer:
+            return
+        items = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = sum(weight for _, weight in items)
+        merged = [list(items[0])]
+        cumulative = 0
+        for mean, weight in items[1:]:
+            current = merged[-1]
+            q = (cumulative + current[1] + weight / 2) / total
+            if current[1] + weight <= max(1, 4 * total * q * (1 - q) / self.compression):
+                current[0] += (mean - current[0]) * weight / (current[1] + weight)
+                current[1] += weight
+            else:
+                cumulative += current[1]
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def merge(self, other):
+        other.compress()
+        for mean, weight in other.centroids:
+            self.buffer.append([mean, weight])
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        self.compress()
+        return self
+
+    def count(self):
+        return sum(w for _, w in self.centroids) + sum(w for _, w in self.buffer)
+
+    def quantile(self, q):
+        """Geschatte waarde op kwantiel q (0..1), None als de digest leeg is."""
+        self.compress()
+        if not self.centroids:
+            return None
+        total = sum(weight for _, weight in self.centroids)
+        position = q * total
+        cumulative = 0
+        previous_mean, previous_center = self.min, 0
+        for mean, weight in self.centroids:
+            center = cumulative + weight / 2
+            if position <= center:
+                if center == previous_center:
+                    return mean
+                return previous_mean + (mean - previous_mean) * (position - previous_center) / (center - previous_center)
+            previous_mean, previous_center = mean, center
+            cumulative += weight
+        if total == previous_center:
+            return self.max
+        return previous_mean + (self.max - previous_mean) * (position - previous_center) / (total - previous_center)
+
+    def to_dict(self):
+        self.compress()
+        return {'c': [[round(m, 3), w] for m, w in self.centroids], 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(centroids=data['c'], minimum=data['min'], maximum=data['max'])
+
+
+class DaySketch:
+    """Alle sketches van één dag (of samengevoegd: van een periode)."""
+
+    def __init__(self, hosts=None, titles=None, domains=None, sessions=None):
+        self.hosts = hosts or HyperLogLog()
+        self.titles = titles or HyperLogLog()
+        self.domains = domains or TopDomains()
+        self.sessions = sessions or TDigest()
+        self._session = None  # (app, start, eind) van de lopende sessie
+
+    def add_row(self, row):
+        """Verwerk een rij van de activity log (rijen van één dag, op volgorde)."""
+        seconds = int(float(row.get('Duur (sec)') or 0))
+        host = url_host(row.get('URL', ''))
+        if host:
+            self.hosts.add(host)
+            self.domains.add(host, seconds)
+        title = row.get('Venstertitel', '')
+        if title:
+            self.titles.add(title)
+
+        start = _clock_seconds(row.get('Starttijd'))
+        if start is None:
+            return
+        app = row.get('Applicatie', '')
+        session = self._session
+        if session and session[0] == app and 0 <= start - session[2] <= SESSION_GAP:
+            session[2] = max(session[2], start + seconds)
+        else:
+            self.end_session()
+            self._session = [app, start, start + seconds]
+
+    def end_session(self):
+        if self._session:
+            self.sessions.add(self._session[2] - self._session[1])
+            self._session = None
+
+    def merge(self, other):
+        self.hosts.merge(other.hosts)
+        self.titles.merge(other.titles)
+        self.domains.merge(other.domains)
+        self.sessions.merge(other.sessions)
+        return self
+
+    def to_dict(self):
+        self.end_session()
+        return {'hosts': self.hosts.to_dict(), 'titles': self.titles.to_dict(),
+                'domains': self.domains.to_dict(), 'sessions': self.sessions.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(HyperLogLog.from_dict(data['hosts']), HyperLogLog.from_dict(data['titles']),
+                   TopDomains.from_dict(data['domains']), TDigest.from_dict(data['sessions']))
+
+
+def _clock_seconds(value):
+    try:
+        hours, minutes, seconds = str(value).split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    except ValueError:
+        return None
+
+
+def sketch_days(rows):
+    """Itereer (datum, DaySketch) over chronologische rijen, één dag tegelijk in het geheugen."""
+    date, sketch = None, None
+    for row in rows:
+        row_date = str(row.get('Datum', ''))
+        if row_date != date:
+            if sketch is not None:
+                sketch.end_session()
+                yield date, sketch
+            date, sketch = row_date, DaySketch()
+        sketch.add_row(row)
+    if sketch is not None:
+        sketch.end_session()
+        yield date, sketch
+
+
+class SketchStore:
+    """
+    Sketches per dag, één JSON bestand per maand:
+        {"2026-10-18": {"format": 1, "version": ..., "sketch": {...}}}
+    version is een vingerafdruk van de rijen van die dag (zie
+    day_versions); bij een andere vingerafdruk wordt de dag opnieuw
+    berekend. In <map>/GENERATION staat per maand de schrijfteller van de
+    dagtotalen bij de laatste controle.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.lock = path_lock(self.directory)
+
+    def month_path(self, month):
+        return self.directory / f"{month}.json"
+
+    def _load_month(self, month):
+        try:
+            with open(self.month_path(month), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def versions(self, start_date, end_date):
+        """{datum: versie} van de opgeslagen dagen in de periode."""
+        result = {}
+        for month, data in self._months(start_date, end_date):
+            for date, entry in data.items():
+                if start_date <= date <= end_date and entry.get('format') == FORMAT:
+                    result[date] = entry.get('version')
+        return result
+
+    def _months(self, start_date, end_date):
+        if not self.directory.exists():
+            return
+        for path in sorted(self.directory.glob('*.json')):
+            if start_date[:7] <= path.stem <= end_date[:7]:
+                yield path.stem, self._load_month(path.stem)
+
+    def save(self, days):
+        """Bewaar [(datum, versie, DaySketch)] (per maand één keer herschrijven)."""
+        by_month = {}
+        for date, version, sketch in days:
+            by_month.setdefault(date[:7], {})[date] = {
+                'format': FORMAT, 'version': version, 'sketch': sketch.to_dict()
+            }
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for month, entries in by_month.items():
+                data = self._load_month(month)
+                data.update(entries)
+                path = self.month_path(month)
+                tmp = path.with_name(path.name + '.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp, path)
+
+    def generations(self):
+        """{maand: schrijfteller van de dagtotalen} bij de laatste controle."""
+        try:
+            with open(self.directory / 'GENERATION', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_generations(self, generations):
+        """Werk de tellers van de gecontroleerde maanden bij."""
+        with self.lock:
+            data = self.generations()
+            data.update(generations)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / 'GENERATION'
+            tmp = path.with_name(path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, sort_keys=True)
+            os.replace(tmp, path)
+
+    def remove(self, dates):
+        """Verwijder opgeslagen dagen (waarvan de log geen rijen meer heeft)."""
+        by_month = {}
+        for date in dates:
+            by_month.setdefault(date[:7], []).append(date)
+        with self.lock:
+            for month, month_dates in by_month.items():
+                data = self._load_month(month)
+                for date in month_dates:
+                    data.pop(date, None)
+                path = self.month_path(month)
+                if not data:
+                    path.unlink(missing_ok=True)
+                    continue
+                tmp = path.with_name(path.name + '.tmp')
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(tmp, path)
+
+    def merged(self, start_date, end_date, into=None):
+        """DaySketch van alle opgeslagen dagen in de periode samengevoegd."""
+        result = into or DaySketch()
+        for _, data in self._months(start_date, end_date):
+            for date, entry in sorted(data.items()):
+                if start_date <= date <= end_date and entry.get('format') == FORMAT:
+                    result.merge(DaySketch.from_dict(entry['sketch']))
+        return result
+
+
+def day_versions(activity_log, start_date, end_date):
+    """
+    Vingerafdruk per dag: {datum: [aantal rijen, XOR van de hashes van hun
+    IDs]}. Elke toegevoegde, verwijderde of vervangen (downsample) rij geeft
+    een andere vingerafdruk, ook als de totale duur gelijk blijft.
+    """
+    versions = {}
+    for date, row_id in activity_log.select(('Datum', 'ID'), start_date, end_date):
+        version = versions.setdefault(str(date), [0, 0])
+        version[0] += 1
+        version[1] ^= int.from_bytes(_digest(str(row_id))[:8], 'little')
+    return versions
+
+
+def _month_ranges(months, start_date, end_date):
+    """(maand, eerste dag, laatste dag) van elke maand, begrensd door de periode."""
+    for month in months:
+        last = calendar.monthrange(int(month[:4]), int(month[5:7]))[1]
+        yield month, max(start_date, f"{month}-01"), min(end_date, f"{month}-{last:02d}")
+
+
+def update_sketches(store, activity_log, rollups=None, start_date='0001-01-01', end_date='9999-12-31',
+                    batch_days=50):
+    """
+    Bereken de sketches van dagen in de periode die ontbreken of verouderd
+    zijn (andere vingerafdruk, zie day_versions); aaneengesloten dagen
+    worden in één pass over de log gelezen en dagen zonder rijen vervallen.
+    Met dagtotalen worden alleen maanden gecontroleerd waarvan de
+    schrijfteller sinds de vorige keer veranderd is.
+    Retourneert het aantal (opnieuw) berekende dagen.
+    """
+    stored = store.versions(start_date, end_date)
+    checked = {}
+    if rollups is not None and rollups.exists():
+        generations = rollups.generations()
+        seen = store.generations()
+        months = {path.stem for path in rollups.directory.glob('*.json')}
+        months |= {month for month in generations if month}
+        months |= {date[:7] for date in stored}
+        months = sorted(m for m in months if start_date[:7] <= m <= end_date[:7])
+        versions = {}
+        for month, first, last in _month_ranges(months, start_date, end_date):
+            generation = generations.get(month)
+            if generation is not None and seen.get(month) == generation:
+                # Niets geschreven sinds de vorige controle
+                versions.update((d, v) for d, v in stored.items() if d[:7] == month)
+                continue
+            versions.update(day_versions(activity_log, first, last))
+            checked[month] = generation
+    else:
+        versions = day_versions(activity_log, start_date, end_date)
+    days = sorted(versions)
+    stale = {date for date in days if stored.get(date) != versions[date]}
+    runs, run = [], []
+    for date in days:
+        if date in stale:
+            run.append(date)
+        elif run:
+            runs.append((run[0], run[-1]))
+            run = []
+    if run:
+        runs.append((run[0], run[-1]))
+
+    built, batch = 0, []
+    for first, last in runs:
+        for date, sketch in sketch_days(activity_log.rows(first, last)):
+            if date not in stale:
+                continue
+            stale.discard(date)
+            batch.append((date, versions[date], sketch))
+            built += 1
+            if len(batch) >= batch_days:
+                store.save(batch)
+                batch = []
+    if batch:
+        store.save(batch)
+    # Verouderde dagen zonder rijen (alles verwijderd) en dagen die uit de log verdwenen zijn
+    gone = stale | (set(stored) - set(versions))
+    if gone:
+        store.remove(gone)
+    checked = {month: generation for month, generation in checked.items() if generation is not None}
+    if checked:
+        store.save_generations(checked)
+    return built
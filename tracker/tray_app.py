@@ -20,13 +20,18 @@ import threading
 from pathlib import Path
 from datetime import datetime
 
+from rollups import DailyRollups
+from entry_repository import PartitionedEntrySource, tray_entry, tray_rollup_record
+
 # Data directory
 DATA_DIR = Path(__file__).parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
 PROJECTS_FILE = DATA_DIR / "projects.json"
 TIMER_FILE = DATA_DIR / "timer_state.json"
-ENTRIES_FILE = DATA_DIR / "entries.json"
+ENTRIES_FILE = DATA_DIR / "entries.json"  # oude opslag, wordt gemigreerd
+ENTRIES_DIR = DATA_DIR / "entries"
+ROLLUPS_DIR = DATA_DIR / "rollups"
 
 
 class TimeTrackerTray:
@@ -34,7 +39,15 @@ class TimeTrackerTray:
 
     def __init__(self):
         self.projects = self.load_projects()
-        self.entries = self.load_entries()
+        # Alleen de lopende maand wordt geladen; oudere maanden pas als nodig
+        self.entries = PartitionedEntrySource('tray', ENTRIES_DIR, tray_entry,
+                                              legacy_path=ENTRIES_FILE)
+        self.rollups = DailyRollups(ROLLUPS_DIR)
+        if not self.rollups.exists():
+            self.rollups.rebuild(tray_rollup_record(e) for e in self.entries.raw)
+        # Lopend totaal van vandaag: (datum, mtime van de rollups) -> uren
+        self.today_stamp = None
+        self.today_hours = 0
         self.current_project = None
         self.timer_start = None
         self.timer_running = False
@@ -68,21 +81,6 @@ class TimeTrackerTray:
         with open(PROJECTS_FILE, 'w', encoding='utf-8') as f:
             json.dump(projects, f, indent=2, ensure_ascii=False)
 
-    def load_entries(self):
-        """Laad time entries uit bestand."""
-        if ENTRIES_FILE.exists():
-            try:
-                with open(ENTRIES_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
-
-    def save_entries(self):
-        """Sla entries op."""
-        with open(ENTRIES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.entries, f, indent=2, ensure_ascii=False)
-
     def save_timer_state(self):
         """Sla huidige timer state op."""
         state = {
@@ -147,8 +145,11 @@ class TimeTrackerTray:
             "description": ""
         }
 
-        self.entries.append(entry)
-        self.save_entries()
+        self.entries.add(entry)
+        self.rollups.add(*tray_rollup_record(entry))
+        if self.today_stamp and self.today_stamp[0] == entry["date"]:
+            self.today_hours += entry["hours"]
+            self.today_stamp = (entry["date"], self._rollup_stamp(entry["date"]))
 
         print(f"Timer gestopt: {hours:.2f} uur geregistreerd voor {self.current_project['name']}")
 
@@ -168,10 +169,23 @@ class TimeTrackerTray:
         seconds = int(elapsed % 60)
         return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
+    def _rollup_stamp(self, date):
+        """mtime van het rollup bestand van een maand (None als het er niet is)."""
+        try:
+            return self.rollups.month_path(date[:7]).stat().st_mtime_ns
+        except OSError:
+            return None
+
     def get_today_hours(self):
         """Bereken totaal uren vandaag."""
         today = datetime.now().strftime("%Y-%m-%d")
-        total = sum(e["hours"] for e in self.entries if e["date"] == today)
+        # Alleen opnieuw optellen bij een nieuwe dag of als een ander proces
+        # (bijv. de desktop app) de dagtotalen heeft gewijzigd
+        stamp = (today, self._rollup_stamp(today))
+        if stamp != self.today_stamp:
+            self.today_hours = sum(hours for _, hours, _ in self.rollups.day(today).values())
+            self.today_stamp = stamp
+        total = self.today_hours
 
         # Tel lopende timer mee
         if self.timer_running and self.timer_start: